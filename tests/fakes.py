@@ -0,0 +1,47 @@
+import time
+import struct
+import threading
+
+
+class FakeParser(object):
+    handler = None
+
+
+class FakeArmPort(object):
+    """
+    Stand-in of the control SocketPort, answers the requests (or not) in the writing thread
+    :param reply: reply(frame) => payload bytes of the reply, None to never answer it
+    """
+    port_type = 'main-socket'
+
+    def __init__(self, reply=None):
+        self.rx_parse = FakeParser()
+        self.reply = reply
+        self.last_send_time = 0
+        self.writes = []
+        self.write_times = []
+        self.lock = threading.Lock()
+
+    def write(self, data):
+        data = bytes(data)
+        with self.lock:
+            self.writes.append(data)
+            self.write_times.append(time.monotonic())
+            self.last_send_time = time.monotonic()
+        # a write can hold several frames (batch)
+        offset = 0
+        while offset + 7 <= len(data):
+            length = struct.unpack('>H', data[offset + 4:offset + 6])[0]
+            frame = data[offset:offset + 6 + length]
+            offset += 6 + length
+            payload = self.reply(frame) if self.reply is not None else None
+            if payload is not None:
+                self.rx_parse.handler(reply_frame(frame, payload))
+        return 0
+
+    def frames(self, funcode):
+        return [(t, d) for t, d in zip(self.write_times, self.writes) if d[6] == funcode]
+
+
+def reply_frame(request, payload=b'', state=0):
+    return bytes(request[0:4]) + struct.pack('>HBB', len(payload) + 2, request[6], state) + bytes(payload)
@@ -0,0 +1,96 @@
+import ast
+import asyncio
+import inspect
+import struct
+import textwrap
+
+import pytest
+
+from xarm.core.config.x_config import XCONF
+from xarm.core.wrapper.uxbus_cmd import UxbusCmd
+from xarm.core.wrapper.uxbus_cmd_async import AsyncUxbusCmd, COMMANDS
+from xarm.core.wrapper.uxbus_cmd_tcp import UxbusCmdTcp
+from fakes import FakeArmPort
+
+PRIMITIVES = ('set_nu8', 'getset_nu8', 'get_nu8', 'set_nu16', 'get_nu16', 'set_nfp32', 'set_nfp32_with_bytes',
+              'set_nint32', 'get_nfp32', 'get_nfp32_with_datas', 'swop_nfp32', 'is_nfp32')
+
+
+def _echo(frame):
+    # get_fk answers its first 6 angles, get_state the state 2, the tgpio reads 0x12345678
+    if frame[6] == XCONF.UxbusReg.GET_STATE:
+        return b'\x02'
+    if frame[6] == XCONF.UxbusReg.TGPIO_R16B:
+        return b'\x12\x34\x56\x78'
+    return frame[7:7 + 24]
+
+
+def _self_calls(node):
+    return [c for c in ast.walk(node) if isinstance(c, ast.Call) and isinstance(c.func, ast.Attribute)
+            and isinstance(c.func.value, ast.Name) and c.func.value.id == 'self']
+
+
+@pytest.mark.parametrize('name', sorted(COMMANDS))
+def test_command_returns_the_call_of_an_awaitable(name):
+    func = ast.parse(textwrap.dedent(inspect.getsource(getattr(UxbusCmd, name)))).body[0]
+    assert not func.decorator_list
+    returns = [node for node in ast.walk(func) if isinstance(node, ast.Return)]
+    awaitables = set(PRIMITIVES) | COMMANDS
+    assert returns
+    for node in returns:
+        assert node.value in _self_calls(node) and node.value.func.attr in awaitables
+    # no other command is called for its result
+    io_calls = [c for c in _self_calls(func) if hasattr(UxbusCmd, c.func.attr) and not c.func.attr.startswith('_')]
+    assert io_calls == [node.value for node in returns]
+
+
+def test_primitives_are_coroutines():
+    for name in PRIMITIVES:
+        assert inspect.iscoroutinefunction(getattr(AsyncUxbusCmd, name))
+
+
+def test_command_is_one_transaction():
+    port = FakeArmPort(_echo)
+    cmd = UxbusCmdTcp(port, pipelined=True)
+    core = AsyncUxbusCmd(cmd)
+
+    async def run():
+        return await core.get_fk([1, 2, 3, 4, 5, 6, 0]), await core.get_state(), await core.tgpio_addr_r16(0x0A0A)
+
+    fk, state, value = asyncio.run(run())
+    assert len(port.writes) == 3
+    assert fk == cmd.get_fk([1, 2, 3, 4, 5, 6, 0])
+    assert state == [0, 2] and value == [0, 0x12345678]
+    # the same request as the blocking command but the bus_flag
+    assert port.writes[0][2:] == port.writes[3][2:]
+    assert not cmd._pending
+
+
+def test_requests_are_pipelined():
+    port = FakeArmPort(_echo)
+    core = AsyncUxbusCmd(UxbusCmdTcp(port, pipelined=True))
+
+    async def run():
+        return await asyncio.gather(*[core.move_line([i, 0, 0, 0, 0, 0], 100, 2000, 0) for i in range(50)])
+
+    assert [ret[0] for ret in asyncio.run(run())] == [0] * 50
+    assert len(port.writes) == 50
+    assert sorted(struct.unpack('<f', frame[7:11])[0] for frame in port.writes) == list(range(50))
+
+
+def test_timeout_drops_the_transaction():
+    port = FakeArmPort()
+    cmd = UxbusCmdTcp(port, pipelined=True)
+    cmd.set_timeout(0.05)
+    ret = asyncio.run(AsyncUxbusCmd(cmd).get_state())
+    assert ret[0] == XCONF.UxbusState.ERR_TOUT
+    assert not cmd._pending
+
+
+def test_commands_of_several_transactions_are_not_awaitable():
+    core = AsyncUxbusCmd(UxbusCmdTcp(FakeArmPort(_echo), pipelined=True))
+    with pytest.raises(AttributeError):
+        core.tgpio_get_digital
+    with pytest.raises(AttributeError):
+        core.set_prot_flag
+    assert core.cmd.set_prot_flag(2) == 0
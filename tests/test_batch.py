@@ -0,0 +1,45 @@
+import struct
+
+from xarm.core.config.x_config import XCONF
+from xarm.core.wrapper.uxbus_cmd_tcp import UxbusCmdTcp, TX2_BUS_FLAG_MAX, TX2_BATCH_CHUNK
+from fakes import FakeArmPort
+
+
+def _echo_angles(frame):
+    # the reply of get_fk carries the first 6 angles of the request back
+    return frame[7:7 + 24]
+
+
+def test_batch_larger_than_the_bus_flag_window():
+    port = FakeArmPort(_echo_angles)
+    cmd = UxbusCmdTcp(port)
+    count = TX2_BUS_FLAG_MAX + 1000
+    with cmd.batch(timeout=1) as batch:
+        for i in range(count):
+            cmd.get_fk([i, 0, 0, 0, 0, 0, 0])
+    assert batch.codes == [0] * count
+    for i, ret in enumerate(batch.results):
+        assert struct.unpack('<f', bytes(ret[1:5]))[0] == i
+    assert not cmd._pending
+    assert len(port.writes) == -(-count // TX2_BATCH_CHUNK)
+
+
+def test_submit_many_in_chunks():
+    port = FakeArmPort(lambda frame: b'')
+    cmd = UxbusCmdTcp(port)
+    codes = cmd.submit_many([('set_state', 0)] * (TX2_BATCH_CHUNK * 2 + 1))
+    assert codes == [0] * (TX2_BATCH_CHUNK * 2 + 1)
+    assert len(port.writes) == 3
+
+
+def test_batch_is_dropped_on_error():
+    port = FakeArmPort(lambda frame: b'')
+    cmd = UxbusCmdTcp(port)
+    try:
+        with cmd.batch() as batch:
+            cmd.set_state(0)
+            raise ValueError
+    except ValueError:
+        pass
+    assert batch.codes == [XCONF.UxbusState.ERR_NOTTCP]
+    assert not port.writes
@@ -0,0 +1,48 @@
+import random
+
+from xarm.core.utils.clock_sync import ClockSync
+
+OFFSET = 1000.0  # host clock - controller clock
+DRIFT = 50e-6  # host seconds gained per controller second
+MIN_DELAY = 0.0002
+
+
+def _feed(clock, start, seconds, rate=100, seed=0):
+    """
+    Frames sent by the controller every 1 / rate seconds, received after a random delay
+    :return: the controller time of the last frame
+    """
+    rnd = random.Random(seed)
+    controller_time = start
+    for _ in range(int(seconds * rate)):
+        controller_time += 1.0 / rate
+        sent = controller_time + OFFSET + DRIFT * controller_time
+        clock.add(controller_time, sent + MIN_DELAY + rnd.expovariate(1 / 0.002))
+    return controller_time
+
+
+def test_not_synced_without_samples():
+    clock = ClockSync()
+    assert not clock.synced
+    assert clock.to_host(1.0) is None and clock.offset is None
+
+
+def test_converges_to_the_send_time_and_the_drift():
+    clock = ClockSync()
+    last = _feed(clock, 0, 30)
+    assert clock.synced and clock.samples == 3000
+    sent = last + OFFSET + DRIFT * last
+    # the lower envelope is the send time plus the minimal delay
+    assert abs(clock.to_host(last) - sent - MIN_DELAY) < 0.0001
+    assert abs(clock.drift - DRIFT) < 5e-6
+
+
+def test_controller_clock_jump_resyncs():
+    clock = ClockSync()
+    _feed(clock, 0, 10)
+    # the controller restarted, its clock begins again from 0
+    last = _feed(clock, 0, 10, seed=1)
+    assert clock.resyncs == 1
+    assert clock.samples == 1000
+    sent = last + OFFSET + DRIFT * last
+    assert abs(clock.to_host(last) - sent - MIN_DELAY) < 0.0001
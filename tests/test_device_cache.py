@@ -0,0 +1,55 @@
+import json
+import os
+
+from xarm.core.utils.device_cache import DeviceCache
+from xarm.x3 import XArm
+
+
+def _sn_ret(robot_sn, control_box_sn):
+    return [0] + list('{}\0{}\0'.format(robot_sn, control_box_sn).encode())
+
+
+def test_update_writes_the_file_and_lookup_reads_it_back(tmp_path):
+    filename = str(tmp_path / 'sdk' / 'devices.json')
+    DeviceCache(filename).update('192.168.1.10', 'XI1303', version='v1', axis=7)
+    device = DeviceCache(filename).lookup('192.168.1.10')
+    assert device['version'] == 'v1' and device['axis'] == 7 and device['robot_sn'] == 'XI1303'
+    assert DeviceCache(filename).lookup('192.168.1.11') is None
+    assert os.listdir(str(tmp_path / 'sdk')) == ['devices.json']
+
+
+def test_failed_write_keeps_the_previous_file(tmp_path):
+    filename = str(tmp_path / 'devices.json')
+    cache = DeviceCache(filename)
+    cache.update('192.168.1.10', 'XI1303', version='v1')
+    with open(filename, 'r', encoding='utf-8') as f:
+        before = f.read()
+    # not serializable, json.dump fails halfway through the temporary file
+    cache.update('192.168.1.10', 'XI1303', version=object())
+    with open(filename, 'r', encoding='utf-8') as f:
+        assert f.read() == before
+    assert json.loads(before)['devices']['XI1303']['version'] == 'v1'
+    assert os.listdir(str(tmp_path)) == ['devices.json']
+
+
+def test_unchanged_facts_are_not_written_again(tmp_path, monkeypatch):
+    cache = DeviceCache(str(tmp_path / 'devices.json'))
+    saves = []
+    save = cache._save
+    monkeypatch.setattr(cache, '_save', lambda: saves.append(1) or save())
+    cache.update('192.168.1.10', 'XI1303', version='v1')
+    cache.update('192.168.1.10', 'XI1303', version='v1')
+    cache.update('192.168.1.11', 'XI1303', version='v1')
+    assert len(saves) == 2
+
+
+def test_cached_arm_is_trusted_only_if_version_and_sn_match():
+    arm = XArm('127.0.0.1', do_not_open=True)
+    arm._version = 'v1'
+    device = {'version': 'v1', 'robot_sn': 'XI1303'}
+    assert arm._device_cache_matches(device, _sn_ret('XI1303', 'AC1303'))
+    assert not arm._device_cache_matches(device, _sn_ret('XI1304', 'AC1303'))
+    assert not arm._device_cache_matches(device, [1])
+    assert not arm._device_cache_matches(device, None)
+    arm._version = 'v2'
+    assert not arm._device_cache_matches(device, _sn_ret('XI1303', 'AC1303'))
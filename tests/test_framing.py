@@ -0,0 +1,112 @@
+import os
+import queue
+import struct
+
+from xarm.core.config.x_config import XCONF
+from xarm.core.comm.uxbus_cmd_protocol import Ux2HexProtocol
+from xarm.core.utils import crc16
+from xarm.core.wrapper.uxbus_cmd_ser import UxbusCmdSer
+from xarm.core.wrapper.uxbus_cmd_tcp import UxbusCmdTcp
+from fakes import FakeArmPort
+
+
+def _crc_bitwise(data):
+    crc = 0xFFFF
+    for byte in data:
+        crc ^= byte
+        for _ in range(8):
+            crc = (crc >> 1) ^ 0xA001 if crc & 1 else crc >> 1
+    return bytes((crc & 0xFF, crc >> 8))
+
+
+def test_crc_modbus():
+    for size in range(0, 300, 7):
+        data = os.urandom(size)
+        assert crc16.crc_modbus(data) == _crc_bitwise(data)
+        assert crc16.crc_modbus(list(data)) == _crc_bitwise(data)
+        assert crc16.crc_modbus(memoryview(bytearray(data))) == _crc_bitwise(data)
+
+
+class FakeSerialPort(object):
+    """
+    The requests are framed by a Ux2HexProtocol as the controller would, every one is answered
+    """
+    def __init__(self, payload=b''):
+        # the controller sees the ids the other way round
+        self.device = Ux2HexProtocol(queue.Queue(), XCONF.SerialConf.UXBUS_DEF_TOID, XCONF.SerialConf.UXBUS_DEF_FROMID)
+        self.payload = payload
+        self.requests = []
+
+    def flush(self, *args):
+        return 0
+
+    def write(self, data):
+        self.device.put(bytes(data))
+        return 0
+
+    def read(self, timeout=None):
+        if self.device.rx_que.empty():
+            return -1
+        request = self.device.rx_que.get()
+        self.requests.append(request)
+        reply = bytes([XCONF.SerialConf.UXBUS_DEF_FROMID, XCONF.SerialConf.UXBUS_DEF_TOID, len(self.payload) + 1, 0]) + self.payload
+        return reply + crc16.crc_modbus(reply)
+
+
+def test_serial_round_trip():
+    port = FakeSerialPort()
+    cmd = UxbusCmdSer(port)
+    assert cmd.set_state(0) == [0]
+    assert port.requests[-1].hex() == 'aa55020c008914'
+    assert cmd.motion_en(8, 1) == [0]
+    assert port.requests[-1][3:6] == bytes([XCONF.UxbusReg.MOTION_EN, 8, 1])
+    assert cmd.set_tcp_offset([1, 2, 3, 4, 5, 6]) == [0]
+    assert struct.unpack('<6f', port.requests[-1][4:-2]) == (1, 2, 3, 4, 5, 6)
+
+
+def test_serial_reply_payload():
+    port = FakeSerialPort(struct.pack('<6f', 1, 2, 3, 4, 5, 6))
+    cmd = UxbusCmdSer(port)
+    assert cmd.get_tcp_pose() == [0, 1, 2, 3, 4, 5, 6]
+
+
+def test_serial_bad_crc_is_dropped():
+    port = FakeSerialPort()
+    frame = bytearray(b'\xaa\x55\x02\x0c\x00\x89\x14')
+    frame[-1] ^= 0xFF
+    port.write(frame)
+    assert port.read() == -1
+
+
+def test_tcp_frames():
+    port = FakeArmPort(lambda frame: b'')
+    cmd = UxbusCmdTcp(port)
+    cmd.set_tcp_offset([1, 2, 3, 4, 5, 6])
+    cmd.set_state(4)
+    cmd.move_line([1, 2, 3, 4, 5, 6], 7, 8, 9, only_check_type=1)
+    offset, state, move = port.writes
+    assert offset == struct.pack('>HHHB', 1, 2, 25, XCONF.UxbusReg.SET_TCP_OFFSET) + struct.pack('<6f', 1, 2, 3, 4, 5, 6)
+    assert state == struct.pack('>HHHBB', 2, 2, 2, XCONF.UxbusReg.SET_STATE, 4)
+    assert move == struct.pack('>HHHB', 3, 2, 38, XCONF.UxbusReg.MOVE_LINE) + struct.pack('<9f', 1, 2, 3, 4, 5, 6, 7, 8, 9) + bytes([1])
+
+
+def test_tcp_frames_are_recycled():
+    port = FakeArmPort(lambda frame: b'')
+    cmd = UxbusCmdTcp(port)
+    sent = []
+    cmd._submit, submit = (lambda funcode, send_data, **kwargs: sent.append(send_data) or submit(funcode, send_data, **kwargs)), cmd._submit
+    cmd.set_tcp_offset([1, 2, 3, 4, 5, 6])
+    cmd.set_world_offset([6, 5, 4, 3, 2, 1])
+    assert sent[0] is sent[1]
+    assert port.writes[1] == struct.pack('>HHHB', 2, 2, 25, XCONF.UxbusReg.SET_WORLD_OFFSET) + struct.pack('<6f', 6, 5, 4, 3, 2, 1)
+
+
+def test_tcp_frame_is_not_recycled_without_reply():
+    port = FakeArmPort(lambda frame: None)
+    cmd = UxbusCmdTcp(port)
+    cmd.set_timeout(0.01)
+    sent = []
+    cmd._submit, submit = (lambda funcode, send_data, **kwargs: sent.append(send_data) or submit(funcode, send_data, **kwargs)), cmd._submit
+    cmd.set_tcp_offset([1, 2, 3, 4, 5, 6])
+    cmd.set_world_offset([6, 5, 4, 3, 2, 1])
+    assert sent[0] is not sent[1]
@@ -0,0 +1,24 @@
+import logging
+import logging.config
+
+from xarm.core.utils.log import logger
+
+
+def test_set_level_is_not_patched_on_the_instance():
+    assert 'setLevel' not in vars(logger)
+
+
+def test_set_level_clears_the_level_cache():
+    level = logger.level
+    try:
+        logger.setLevel(logging.WARNING)
+        assert not logger.isEnabledFor(logging.INFO)
+        logger.setLevel(logging.INFO)
+        assert logger.isEnabledFor(logging.INFO)
+    finally:
+        logger.setLevel(level)
+
+
+def test_dict_config_does_not_disable_the_sdk_logger():
+    logging.config.dictConfig({'version': 1, 'disable_existing_loggers': True})
+    assert not logger.disabled
@@ -0,0 +1,45 @@
+import time
+import threading
+
+from xarm.core.config.x_config import XCONF
+from xarm.core.wrapper.uxbus_cmd_tcp import UxbusCmdTcp
+from fakes import FakeArmPort
+
+
+def _reply(frame):
+    # the reads are never answered, the writes at once
+    return None if frame[6] == XCONF.UxbusReg.GET_STATE else b''
+
+
+def test_stop_is_written_while_another_thread_holds_the_lock():
+    port = FakeArmPort(_reply)
+    cmd = UxbusCmdTcp(port)
+    cmd.set_timeout(1)
+    holder = threading.Thread(target=cmd.get_state, daemon=True)
+    holder.start()
+    while not cmd.lock.locked():
+        time.sleep(0.001)
+    start = time.monotonic()
+    ret = cmd.priority_call('set_state', 4)
+    elapsed = time.monotonic() - start
+    assert ret[0] == 0
+    assert cmd.lock.locked()
+    sent_time, frame = port.frames(XCONF.UxbusReg.SET_STATE)[0]
+    assert frame[-1] == 4
+    assert sent_time - start < 0.05
+    assert elapsed < 0.05
+    holder.join()
+
+
+def test_without_priority_the_stop_waits_for_the_lock():
+    port = FakeArmPort(_reply)
+    cmd = UxbusCmdTcp(port)
+    cmd.set_timeout(0.3)
+    holder = threading.Thread(target=cmd.get_state, daemon=True)
+    holder.start()
+    while not cmd.lock.locked():
+        time.sleep(0.001)
+    start = time.monotonic()
+    cmd.set_state(4)
+    assert port.frames(XCONF.UxbusReg.SET_STATE)[0][0] - start > 0.2
+    holder.join()
@@ -0,0 +1,73 @@
+import queue
+import struct
+
+from xarm.core.comm.uxbus_cmd_protocol import Tx2HexProtocol, TX2_RXLEN_MAX, Ux2HexProtocol
+from xarm.core.utils import crc16
+
+
+def _tx2_frame(bus_flag, payload):
+    return struct.pack('>HHH', bus_flag, 2, len(payload)) + payload
+
+
+def test_tx2_reassembles_split_and_coalesced_frames():
+    frames = []
+    parser = Tx2HexProtocol(queue.Queue(), handler=frames.append)
+    stream = _tx2_frame(1, b'\x0c\x00\x02') + _tx2_frame(2, b'\x0d\x00' + bytes(28)) + _tx2_frame(3, b'\x0c\x00')
+    for i in range(len(stream)):
+        parser.put(stream[i:i + 1])
+    assert frames == [_tx2_frame(1, b'\x0c\x00\x02'), _tx2_frame(2, b'\x0d\x00' + bytes(28)), _tx2_frame(3, b'\x0c\x00')]
+    parser.put(stream + stream[:4])
+    assert len(frames) == 6 and parser.rxbuf == stream[:4]
+
+
+def test_tx2_queues_the_frames_without_handler():
+    rx_que = queue.Queue(2)
+    parser = Tx2HexProtocol(rx_que)
+    for bus_flag in range(1, 4):
+        parser.put(_tx2_frame(bus_flag, b'\x0c\x00'))
+    # the oldest is dropped when full
+    assert [rx_que.get_nowait()[:2] for _ in range(2)] == [b'\x00\x02', b'\x00\x03']
+
+
+def test_tx2_discards_a_broken_length_and_resyncs_on_the_next_write():
+    frames = []
+    parser = Tx2HexProtocol(queue.Queue(), handler=frames.append)
+    parser.put(struct.pack('>HHH', 1, 2, TX2_RXLEN_MAX) + bytes(10))
+    assert frames == [] and len(parser.rxbuf) == 0
+    parser.put(_tx2_frame(2, b'\x0c\x00'))
+    assert frames == [_tx2_frame(2, b'\x0c\x00')]
+
+
+def _ux2_frame(toid, fromid, payload):
+    frame = bytes([toid, fromid, len(payload)]) + payload
+    return frame + crc16.crc_modbus(frame)
+
+
+def test_ux2_reassembles_split_frames():
+    parser = Ux2HexProtocol(queue.Queue(), 0x55, 0xAA)
+    stream = _ux2_frame(0xAA, 0x55, b'\x0c\x00\x02') + _ux2_frame(0xAA, 0x55, b'\x0d' + bytes(20))
+    for i in range(len(stream)):
+        parser.put(stream[i:i + 1])
+    assert [parser.rx_que.get_nowait() for _ in range(2)] == [stream[:8], stream[8:]]
+    assert len(parser.rxbuf) == 0
+
+
+def test_ux2_resyncs_after_noise_and_broken_frames():
+    parser = Ux2HexProtocol(queue.Queue(), 0x55, 0xAA)
+    good = _ux2_frame(0xAA, 0x55, b'\x0c\x00\x02')
+    bad_crc = good[:-1] + bytes([good[-1] ^ 0xFF])
+    other_id = _ux2_frame(0xAA, 0x56, b'\x0c\x00\x02')
+    parser.put(b'\x00\xaa\x13' + bad_crc + other_id + b'\xaa\x55\x00' + good)
+    assert parser.rx_que.get_nowait() == good
+    assert parser.rx_que.empty()
+    # a frame which only starts at the end of the read waits for the rest
+    parser.put(b'\x01\x02' + good[:4])
+    assert parser.rx_que.empty() and parser.rxbuf == good[:4]
+    parser.put(good[4:])
+    assert parser.rx_que.get_nowait() == good
+
+
+def test_ux2_broadcast_ids_accept_every_frame():
+    parser = Ux2HexProtocol(queue.Queue(), 0xFF, 0xFF)
+    parser.put(_ux2_frame(0x01, 0x02, b'\x0c') + _ux2_frame(0x03, 0x04, b'\x0c'))
+    assert parser.rx_que.qsize() == 2
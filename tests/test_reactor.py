@@ -0,0 +1,177 @@
+import time
+import socket
+import threading
+
+from xarm.core.comm.base import Port
+from xarm.core.comm.reactor import Reactor, ReactorWorker
+from xarm.core.comm.socket_port import SocketPort
+from xarm.core.comm.uxbus_cmd_protocol import Tx2HexProtocol
+
+
+def _wait(predicate, timeout=2):
+    expired = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > expired:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+class PairPort(Port):
+    """
+    One end of a socketpair served by the reactor, the frames are collected in self.frames
+    """
+    def __init__(self, sock, reactor):
+        super(PairPort, self).__init__(16)
+        self.port_type = 'main-socket'
+        self.frames = []
+        self.rx_parse = Tx2HexProtocol(self.rx_que, handler=self.frames.append)
+        self.com = sock
+        self.com.settimeout(1)
+        self.com_read = sock.recv
+        self.com_write = sock.sendall
+        self.buffer_size = 4096
+        self._connected = True
+        self.reactor = reactor
+        reactor.register(self)
+
+
+def _frame(bus_flag):
+    return bus_flag.to_bytes(2, 'big') + b'\x00\x02\x00\x02\x0c\x00'
+
+
+def _pair(reactor):
+    ours, peer = socket.socketpair()
+    return PairPort(ours, reactor), peer
+
+
+def test_frames_are_handed_over():
+    reactor = Reactor()
+    port, peer = _pair(reactor)
+    peer.sendall(_frame(1) + _frame(2)[:4])
+    peer.sendall(_frame(2)[4:])
+    assert _wait(lambda: len(port.frames) == 2)
+    assert port.frames == [_frame(1), _frame(2)]
+    port.close()
+    peer.close()
+
+
+def test_thread_ends_when_the_last_port_is_unregistered():
+    reactor = Reactor()
+    port1, peer1 = _pair(reactor)
+    port2, peer2 = _pair(reactor)
+    assert _wait(lambda: len(reactor._ports) == 2)
+    thread = reactor._thread
+    port1.close()
+    assert _wait(lambda: len(reactor._ports) == 1)
+    assert reactor.running
+    port2.close()
+    assert _wait(lambda: not reactor.running)
+    thread.join(1)
+    assert not thread.is_alive()
+    # the sockets are closed on the io thread
+    assert peer1.recv(16) == b'' and peer2.recv(16) == b''
+    # started again on demand
+    port3, peer3 = _pair(reactor)
+    peer3.sendall(_frame(3))
+    assert _wait(lambda: port3.frames == [_frame(3)])
+    assert reactor.running and reactor._thread is not thread
+    port3.close()
+    assert _wait(lambda: not reactor.running)
+
+
+def test_broken_socket_is_unregistered():
+    reactor = Reactor()
+    port, peer = _pair(reactor)
+    assert _wait(lambda: port in reactor._ports)
+    peer.close()
+    assert _wait(lambda: not port.connected and not reactor._ports)
+    assert _wait(lambda: not reactor.running)
+
+
+def test_port_closed_before_it_is_registered():
+    reactor = Reactor()
+    gate = threading.Event()
+    # the io thread is held until the close is queued behind the register
+    reactor.call_soon(gate.wait, 1)
+    port, peer = _pair(reactor)
+    port.close()
+    gate.set()
+    assert _wait(lambda: not reactor.running)
+    assert not reactor._ports
+    assert peer.recv(16) == b''
+
+
+def test_nothing_is_handed_over_after_close():
+    reactor = Reactor()
+    port, peer = _pair(reactor)
+    stop = threading.Event()
+
+    def _send():
+        bus_flag = 0
+        while not stop.is_set():
+            bus_flag = bus_flag % 5000 + 1
+            try:
+                peer.sendall(_frame(bus_flag))
+            except OSError:
+                break
+    thread = threading.Thread(target=_send, daemon=True)
+    thread.start()
+    assert _wait(lambda: len(port.frames) > 10)
+    port.close()
+    count = len(port.frames)
+    time.sleep(0.1)
+    stop.set()
+    assert len(port.frames) == count
+    thread.join(1)
+    peer.close()
+
+
+def test_timer_keeps_the_thread():
+    reactor = Reactor()
+    ticks = []
+    timer = reactor.call_every(0.01, lambda: ticks.append(1))
+    assert _wait(lambda: len(ticks) > 3)
+    assert reactor.running
+    timer.cancel()
+    assert _wait(lambda: not reactor.running)
+
+
+def test_report_read_timeout():
+    server = socket.socket()
+    server.bind(('127.0.0.1', 0))
+    server.listen(1)
+    reactor = Reactor()
+    port = SocketPort('127.0.0.1', server.getsockname()[1], forbid_uds=True, reactor=reactor)
+    conn, _ = server.accept()
+    assert port.port_type == 'report-socket' and port.connected
+    assert _wait(lambda: port in reactor._ports)
+    port.last_recv_time -= 5
+    assert _wait(lambda: not port.connected)
+    assert _wait(lambda: not reactor.running)
+    assert conn.recv(16) == b''
+    conn.close()
+    server.close()
+
+
+def test_worker_runs_in_order_and_ends_when_idle():
+    worker = ReactorWorker('test-reactor-worker')
+    worker.IDLE_TIMEOUT = 0.1
+    done = []
+    for i in range(5):
+        worker.submit(done.append, i)
+    assert _wait(lambda: len(done) == 5)
+    assert done == list(range(5))
+    assert [t for t in threading.enumerate() if t.name == 'test-reactor-worker']
+    assert _wait(lambda: not worker._running)
+    assert _wait(lambda: not [t for t in threading.enumerate() if t.name == 'test-reactor-worker'])
+    worker.submit(done.append, 5)
+    assert _wait(lambda: done[-1] == 5)
+
+
+def test_worker_survives_a_failing_job():
+    worker = ReactorWorker('test-reactor-worker-2')
+    done = []
+    worker.submit(lambda: 1 / 0)
+    worker.submit(done.append, 1)
+    assert _wait(lambda: done == [1])
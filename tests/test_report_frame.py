@@ -0,0 +1,72 @@
+import struct
+
+from xarm.core.comm.base import Port, ReportMailbox
+from xarm.core.utils import report_codec
+from xarm.core.utils.report_codec import ReportFrame, ReportAttribute
+
+
+def _normal_frame(state=1, voltages=None):
+    data = bytearray(report_codec.RICH.frame_size)
+    struct.pack_into('>I', data, 0, len(data))
+    data[4] = state
+    struct.pack_into('<7f', data, 7, *range(7))
+    struct.pack_into('>7H', data, 341, *(voltages or range(7)))
+    return data
+
+
+def test_hot_fields_are_decoded_from_the_slot_without_copy():
+    slot = _normal_frame(state=0x12)
+    frame = ReportFrame(report_codec.RICH, memoryview(slot))
+    assert frame.data.obj is slot
+    assert frame.state_mode == 0x12
+    assert frame.angles == [0, 1, 2, 3, 4, 5, 6]
+    assert frame.voltages == [0, 1, 2, 3, 4, 5, 6]
+    assert 'voltages' in frame.__dict__
+
+
+def test_released_frame_does_not_keep_a_value_of_a_reused_slot():
+    slot = _normal_frame()
+    frame = ReportFrame(report_codec.RICH, memoryview(slot))
+    frame.release()
+    assert frame.voltages is None
+    assert 'voltages' not in frame.__dict__
+
+
+def test_retained_frame_survives_its_slot():
+    slot = _normal_frame(voltages=[1] * 7)
+    frame = ReportFrame(report_codec.RICH, memoryview(slot)).retain()
+    slot[:] = _normal_frame(voltages=[2] * 7)
+    frame.release()
+    assert isinstance(frame.data, bytes)
+    assert frame.voltages == [1] * 7
+
+
+def test_attribute_follows_a_frame_replaced_while_decoding():
+    class Owner(object):
+        voltages = ReportAttribute('_voltages', 'voltages')
+
+    owner = Owner()
+    first = ReportFrame(report_codec.RICH, memoryview(_normal_frame(voltages=[1] * 7)))
+    second = ReportFrame(report_codec.RICH, memoryview(_normal_frame(voltages=[2] * 7)))
+    owner._report_frame = first
+
+    def replace(owner, frame):
+        if frame is first:
+            owner._report_frame = second
+            first.release()
+            return None
+        return frame.voltages
+
+    Owner.voltages.decode = replace
+    assert owner.voltages == [2] * 7
+
+
+def test_slot_is_recycled_after_the_next_frame_is_read():
+    port = Port(16)
+    port.report_mailbox = ReportMailbox(release=port._report_item_release)
+    slots = [bytearray(_normal_frame()) for _ in range(3)]
+    for i, slot in enumerate(slots):
+        port.report_mailbox.put((slot, memoryview(slot)))
+        port._read_report(0)
+        # the frame read and the one before it are still in use
+        assert list(port._report_slots) == slots[:max(0, i - 1)]
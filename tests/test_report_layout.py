@@ -0,0 +1,111 @@
+import random
+
+import pytest
+
+from xarm.core.utils import convert, report_codec
+from xarm.core.utils.report_codec import ReportFrame
+
+
+def _u8s(start, end):
+    return lambda data: list(data[start:end])
+
+
+def _fp32s(start, num):
+    return lambda data: convert.bytes_to_fp32s(data[start:start + num * 4], num)
+
+
+def _u16s(start, num):
+    return lambda data: convert.bytes_to_u16s(data[start:start + num * 2], num)
+
+
+# the fields as the handlers of Base decoded them before the layouts, field => decode(data)
+_NORMAL_OLD = {
+    'state': lambda data: data[4],
+    'mtbrake': lambda data: data[5],
+    'mtable': lambda data: data[6],
+    'error_code': lambda data: data[7],
+    'warn_code': lambda data: data[8],
+    'angles': _fp32s(9, 7),
+    'pose': _fp32s(37, 6),
+    'cmd_num': lambda data: convert.bytes_to_u16(data[61:63]),
+    'pose_offset': _fp32s(63, 6),
+}
+_RICH_OLD = dict(_NORMAL_OLD, **{
+    'arm_ids': _u8s(87, 93),
+    'trs': _fp32s(123, 5),
+    'p2p': _fp32s(143, 5),
+    'rot': _fp32s(163, 2),
+})
+_REAL = {
+    'length': lambda data: convert.bytes_to_u32(data[0:4]),
+    'state_mode': lambda data: data[4],
+    'cmd_num': lambda data: convert.bytes_to_u16(data[5:7]),
+    'angles': _fp32s(7, 7),
+    'pose': _fp32s(35, 6),
+    'torque': _fp32s(59, 7),
+    'ft_ext_force': _fp32s(87, 6),
+    'ft_raw_force': _fp32s(111, 6),
+}
+_NORMAL = dict({k: v for k, v in _REAL.items() if not k.startswith('ft_')}, **{
+    'mtbrake': lambda data: data[87],
+    'mtable': lambda data: data[88],
+    'error_code': lambda data: data[89],
+    'warn_code': lambda data: data[90],
+    'pose_offset': _fp32s(91, 6),
+    'tcp_load': _fp32s(115, 4),
+    'collis_sens': lambda data: data[131],
+    'teach_sens': lambda data: data[132],
+    'gravity_direction': _fp32s(133, 3),
+})
+_RICH = dict(_NORMAL, **{
+    'arm_ids': _u8s(145, 151),
+    'trs': _fp32s(181, 5),
+    'p2p': _fp32s(201, 5),
+    'rot': _fp32s(221, 2),
+    'servo_codes': _u8s(229, 245),
+    'temperatures': _u8s(245, 252),
+    'speeds': _fp32s(252, 8),
+    'count': lambda data: convert.bytes_to_u32(data[284:288]),
+    'world_offset': _fp32s(288, 6),
+    'reset_enable': _u8s(312, 314),
+    'is_simulation': lambda data: data[314],
+    'collision': _u8s(315, 317),
+    'collision_tool_params': _fp32s(317, 6),
+    'voltages': _u16s(341, 7),
+    'currents': _fp32s(355, 7),
+    'cgpio_digitals': _u8s(383, 385),
+    'cgpio_analogs': _u16s(385, 8),
+    'cgpio_input_conf': _u8s(401, 409),
+    'cgpio_output_conf': _u8s(409, 417),
+    'cgpio_input_conf2': _u8s(417, 425),
+    'cgpio_output_conf2': _u8s(425, 433),
+    'ft_ext_force': _fp32s(433, 6),
+    'ft_raw_force': _fp32s(457, 6),
+    'iden_progress': lambda data: data[481],
+    'pose_aa': _fp32s(482, 3),
+})
+
+
+def _frame(size):
+    # bytes below 0x7F, every float of the frame is finite
+    rnd = random.Random(size)
+    return bytes(rnd.randrange(0x7F) for _ in range(size))
+
+
+@pytest.mark.parametrize('layout, fields', [
+    (report_codec.NORMAL_OLD, _NORMAL_OLD), (report_codec.RICH_OLD, _RICH_OLD), (report_codec.REAL, _REAL),
+    (report_codec.NORMAL, _NORMAL), (report_codec.RICH, _RICH),
+])
+def test_layout_matches_the_baseline_handlers(layout, fields):
+    data = _frame(layout.frame_size)
+    frame = ReportFrame(layout, memoryview(data))
+    for field, decode in fields.items():
+        assert getattr(frame, field) == decode(data), field
+
+
+def test_short_frame_has_no_tail_fields():
+    # a rich frame of an older firmware ends before the force sensor fields
+    data = _frame(433)
+    frame = ReportFrame(report_codec.RICH, data)
+    assert frame.voltages == _RICH['voltages'](data)
+    assert frame.ft_ext_force is None and frame.pose_aa is None
@@ -0,0 +1,52 @@
+import threading
+import time
+
+from xarm.core.comm.base import Port, ReportMailbox
+
+
+def test_latest_frame_replaces_the_unread_ones():
+    released = []
+    mailbox = ReportMailbox(release=released.append)
+    for frame in (b'1', b'2', b'3'):
+        mailbox.put(frame)
+    seq, recv_time, frame = mailbox.take(0)
+    assert (seq, frame) == (3, b'3')
+    assert released == [b'1', b'2'] and mailbox.dropped == 2
+    assert mailbox.take(0) is None
+
+
+def test_take_is_woken_by_put_and_close():
+    mailbox = ReportMailbox()
+    threading.Timer(0.05, mailbox.put, args=(b'1',)).start()
+    start = time.monotonic()
+    assert mailbox.take(1)[2] == b'1'
+    assert time.monotonic() - start < 0.5
+    threading.Timer(0.05, mailbox.close).start()
+    assert mailbox.take(1) is None
+    assert time.monotonic() - start < 0.5
+
+
+def test_port_counts_the_missed_frames():
+    port = Port(16)
+    port.report_mailbox = ReportMailbox(release=port._report_item_release)
+    port.report_mailbox.put(b'1')
+    assert port._read_report(0) == b'1'
+    assert (port.report_seq, port.report_gap, port.report_missed) == (1, 0, 0)
+    for frame in (b'2', b'3', b'4'):
+        port.report_mailbox.put(frame)
+    assert port._read_report(0) == b'4'
+    assert (port.report_seq, port.report_gap, port.report_missed) == (4, 2, 2)
+    port.report_mailbox.put(b'5')
+    assert port._read_report(0) == b'5'
+    assert (port.report_gap, port.report_missed) == (0, 2)
+    assert port._read_report(0) == -1
+
+
+def test_replaced_slots_are_recycled_at_once():
+    port = Port(16)
+    port.report_mailbox = ReportMailbox(release=port._report_item_release)
+    slots = [bytearray(8) for _ in range(3)]
+    for slot in slots:
+        port.report_mailbox.put((slot, memoryview(slot)))
+    assert list(port._report_slots) == slots[:2]
+    assert port._read_report(0).obj is slots[2]
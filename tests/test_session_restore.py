@@ -0,0 +1,46 @@
+from xarm.x3 import XArm
+from xarm.x3.code import APIState
+
+
+class _Stream(object):
+    connected = True
+
+
+def _arm(ready):
+    arm = XArm('127.0.0.1', do_not_open=True, check_is_ready=True)
+    arm._stream = _Stream()
+    arm._stream_report = None
+    # the readiness is checked by the sdk before the firmware 1.5.20
+    arm._major_version_number, arm._minor_version_number, arm._revision_version_number = 1, 5, 0
+    arm._is_ready = ready
+    arm.events = []
+    arm._report_session_restored_callback = lambda *args: arm.events.append(args)
+    return arm
+
+
+def _record(arm, calls, key, name, code, *args):
+    def setter(*args, **kwargs):
+        calls.append(name)
+        return code
+    setattr(arm, name, setter)
+    arm._record_session_param(0, key, name, *args)
+
+
+def test_ready_params_are_reported_as_failed_when_not_ready():
+    arm = _arm(ready=False)
+    calls = []
+    _record(arm, calls, 'tcp_offset', 'set_tcp_offset', 0, [0, 0, 10, 0, 0, 0])
+    _record(arm, calls, 'tcp_jerk', 'set_tcp_jerk', 0, 1000)
+    arm._restore_session()
+    assert calls == ['set_tcp_offset']
+    assert arm.events == [({'tcp_offset': 0}, {'tcp_jerk': APIState.NOT_READY}, False)]
+
+
+def test_failed_setters_are_reported():
+    arm = _arm(ready=True)
+    calls = []
+    _record(arm, calls, 'tcp_jerk', 'set_tcp_jerk', 0, 1000)
+    _record(arm, calls, 'modbus_baud', 'set_tgpio_modbus_baudrate', APIState.CMD_NOT_EXIST, 115200)
+    arm._restore_session()
+    assert calls == ['set_tcp_jerk', 'set_tgpio_modbus_baudrate']
+    assert arm.events == [({'tcp_jerk': 0}, {'modbus_baud': APIState.CMD_NOT_EXIST}, True)]
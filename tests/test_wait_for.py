@@ -0,0 +1,70 @@
+import time
+import threading
+
+from xarm.x3 import XArm
+from xarm.x3.code import APIState
+
+
+class _Stream(object):
+    connected = True
+
+
+def _arm():
+    arm = XArm('127.0.0.1', do_not_open=True)
+    arm._stream = _Stream()
+    return arm
+
+
+def _set_state_later(arm, state, delay):
+    def _run():
+        time.sleep(delay)
+        arm._state = state
+        arm._publish_robot_state()
+        arm._notify_robot_state()
+    thread = threading.Thread(target=_run, daemon=True)
+    thread.start()
+    return thread
+
+
+def test_timeout():
+    arm = _arm()
+    start = time.monotonic()
+    assert arm.wait_for(lambda robot_state: None, timeout=0.2, interval=0.05) == APIState.WAIT_FINISH_TIMEOUT
+    assert 0.2 <= time.monotonic() - start < 0.3
+
+
+def test_not_connected():
+    arm = _arm()
+    arm._stream = None
+    assert arm.wait_for(lambda robot_state: None, timeout=1) == APIState.NOT_CONNECTED
+
+
+def test_woken_up_by_the_state_transition():
+    arm = _arm()
+    _set_state_later(arm, 4, 0.05)
+    start = time.monotonic()
+    code = arm.wait_for(lambda robot_state: 0 if robot_state.state == 4 else None, timeout=2, interval=1)
+    assert code == 0
+    assert time.monotonic() - start < 0.5
+
+
+def test_poll_period_is_not_cut_short_by_the_report():
+    arm = _arm()
+    checks = []
+    _set_state_later(arm, 4, 0.02)
+    arm.wait_for(lambda robot_state: checks.append(time.monotonic()) or (0 if len(checks) == 3 else None),
+                 interval=0.1, source='poll')
+    assert len(checks) == 3
+    assert checks[2] - checks[0] >= 0.19
+
+
+def test_poll_period_counts_from_the_start_of_the_check():
+    arm = _arm()
+    checks = []
+
+    def _slow_poll(robot_state):
+        checks.append(time.monotonic())
+        time.sleep(0.05)
+        return 0 if len(checks) == 3 else None
+    arm.wait_for(_slow_poll, interval=0.1, source='poll')
+    assert checks[2] - checks[0] < 0.25
@@ -1,2 +1,10 @@
 from .wrapper import XArmAPI
 from .version import __version__
+
+
+def __getattr__(name):
+    # the asyncio api is imported on first use
+    if name == 'AsyncXArmAPI':
+        from .wrapper import AsyncXArmAPI
+        return AsyncXArmAPI
+    raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
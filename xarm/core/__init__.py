@@ -1,2 +1,9 @@
-from .config.x_code import ControllerWarn, ControllerError, ServoError
 from .config.x_config import XCONF
+
+
+def __getattr__(name):
+    # the code tables are imported on first use
+    if name in ('ControllerWarn', 'ControllerError', 'ServoError'):
+        from .config import x_code
+        return getattr(x_code, name)
+    raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
@@ -3,3 +3,11 @@ try:
 except:
     SerialPort = None
 from .socket_port import SocketPort
+
+
+def __getattr__(name):
+    # the asyncio transport is imported on first use
+    if name == 'AsyncSocketPort':
+        from .async_socket_port import AsyncSocketPort
+        return AsyncSocketPort
+    raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# Software License Agreement (MIT License)
+#
+# Copyright (c) 2018, UFACTORY, Inc.
+# All rights reserved.
+#
+# Author: Vinman <vinman.wen@ufactory.cc>
+
+import os
+import sys
+import time
+import socket
+import asyncio
+import threading
+from ..utils.log import logger
+from .uxbus_cmd_protocol import Tx2HexProtocol, Tx2ReportProtocol
+from .socket_port import set_tcp_keepalive
+from ..config.x_config import XCONF
+
+
+class AsyncSocketPort(asyncio.Protocol):
+    """
+    asyncio replacement of SocketPort, the received bytes are framed on the event loop
+    (no receive thread), write() can be called from the loop or from any other thread
+    """
+    def __init__(self, server_port, loop=None, heartbeat=False):
+        super(AsyncSocketPort, self).__init__()
+        if server_port == XCONF.SocketConf.TCP_CONTROL_PORT or server_port == XCONF.SocketConf.TCP_CONTROL_PORT + 1:
+            self.port_type = 'main-socket'
+            self.rx_parse = Tx2HexProtocol(None)
+        else:
+            self.port_type = 'report-socket'
+            self.rx_parse = Tx2ReportProtocol(None)
+        self.loop = loop
+        self.transport = None
+        self.heartbeat = heartbeat
+        self._connected = False
+        self._loop_thread_id = None
+        self._heartbeat_task = None
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.flushed = 0
+        self.last_send_time = 0
+
+    @classmethod
+    async def open(cls, server_ip, server_port, forbid_uds=False, heartbeat=False, timeout=1):
+        """
+        Connect to the controller
+        :return: AsyncSocketPort instance, check the connected attribute for the result
+        """
+        loop = asyncio.get_running_loop()
+        port = cls(server_port, loop=loop, heartbeat=heartbeat)
+        try:
+            use_uds = False
+            if not forbid_uds and sys.platform.startswith('linux'):
+                uds_path = os.path.join('/tmp/xarmcontroller_uds_{}'.format(server_port))
+                if os.path.exists(uds_path):
+                    try:
+                        await asyncio.wait_for(loop.create_unix_connection(lambda: port, uds_path), timeout)
+                        logger.info('{} connect {} success, uds_{}'.format(port.port_type, server_ip, server_port))
+                        use_uds = True
+                    except Exception:
+                        pass
+            if not use_uds:
+                await asyncio.wait_for(loop.create_connection(lambda: port, server_ip, server_port), timeout)
+                logger.info('{} connect {} success'.format(port.port_type, server_ip))
+        except Exception as e:
+            logger.info('{} connect {} failed, {}'.format(port.port_type, server_ip, e))
+            port._connected = False
+        return port
+
+    @property
+    def connected(self):
+        return self._connected
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self._loop_thread_id = threading.get_ident()
+        self._connected = True
+        sock = transport.get_extra_info('socket')
+        if sock is not None and sock.family == socket.AF_INET:
+            set_tcp_keepalive(sock)
+        if self.heartbeat:
+            self._heartbeat_task = asyncio.ensure_future(self._heartbeat_loop())
+
+    def reset_stats(self):
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.flushed = 0
+
+    def data_received(self, data):
+        self.bytes_in += len(data)
+        if self.rx_parse.put(data) == -1:
+            self.close()
+
+    def connection_lost(self, exc):
+        self._connected = False
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+            self._heartbeat_task = None
+        logger.debug('[{}] connection lost, {}'.format(self.port_type, exc))
+
+    async def _heartbeat_loop(self):
+        heat_data = bytes([0, 0, 0, 1, 0, 2, 0, 0])
+        while self.connected:
+            # any other frame written within 1s serves as the heartbeat
+            if time.monotonic() - self.last_send_time >= 1 and self.write(heat_data) == -1:
+                break
+            await asyncio.sleep(1)
+
+    def write(self, data):
+        if not self.connected:
+            return -1
+        try:
+            if threading.get_ident() == self._loop_thread_id:
+                self.transport.write(data)
+            else:
+                self.loop.call_soon_threadsafe(self.transport.write, data)
+            self.bytes_out += len(data)
+            self.last_send_time = time.monotonic()
+            return 0
+        except Exception as e:
+            self._connected = False
+            logger.error('[{}] socket write error, {}'.format(self.port_type, e))
+            return -1
+
+    def flush(self, fromid=-1, toid=-1):
+        self.rx_parse.flush(fromid, toid)
+        return 0
+
+    def close(self):
+        self._connected = False
+        if self.transport is None:
+            return
+        if threading.get_ident() == self._loop_thread_id:
+            self.transport.close()
+        else:
+            self.loop.call_soon_threadsafe(self.transport.close)
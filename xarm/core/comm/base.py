@@ -8,11 +8,13 @@
 
 import time
 import queue
+import collections
 import socket
 import select
 import threading
 from ..utils.log import logger
 from ..utils import convert
+from ..utils.clock_sync import report_controller_time
 
 
 class RxParse(object):
@@ -26,6 +28,57 @@ class RxParse(object):
         self.rx_que.put(data)
 
 
+class ReportMailbox(object):
+    """
+    Latest value mailbox of the report frames, a new frame replaces the unread one and wakes the reader at once
+    Every frame is numbered, the reader finds the frames it missed by the gap of the sequence numbers
+    """
+    def __init__(self, release=None):
+        self._cond = threading.Condition(threading.Lock())
+        self._item = None
+        self._closed = False
+        # called with a replaced frame which was never read
+        self._release = release
+        # called without arguments after every put, outside the lock
+        self.listener = None
+        self.seq = 0
+        self.recv_time = 0
+        self.dropped = 0
+
+    def put(self, item):
+        with self._cond:
+            dropped = self._item
+            self._item = item
+            self.seq += 1
+            self.recv_time = time.monotonic()
+            if dropped is not None:
+                self.dropped += 1
+            self._cond.notify_all()
+        if dropped is not None and self._release is not None:
+            self._release(dropped)
+        if self.listener is not None:
+            self.listener()
+
+    def take(self, timeout=None):
+        """
+        Wait for an unread frame and take it
+        :return: (seq, recv_time, frame) or None if timeout or closed
+        """
+        with self._cond:
+            if self._item is None and not self._closed and timeout != 0:
+                self._cond.wait_for(lambda: self._item is not None or self._closed, timeout)
+            item = self._item
+            if item is None:
+                return None
+            self._item = None
+            return self.seq, self.recv_time, item
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
 class Port(threading.Thread):
     def __init__(self, rxque_max):
         super(Port, self).__init__()
@@ -36,11 +89,42 @@ class Port(threading.Thread):
         self.com = None
         self.rx_parse = RxParse(self.rx_que)
         self.com_read = None
+        self.com_read_into = None
         self.com_write = None
         self.port_type = ''
         self.buffer_size = 1
         self.heartbeat_thread = None
         self.alive = True
+        # served by a Reactor instead of the own recv thread if set
+        self.reactor = None
+        # close() of the user threads against recv_once/close_socket/register of the reactor thread
+        self.io_lock = threading.RLock()
+        self.last_recv_time = time.monotonic()
+        # wire counters, see reset_stats
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.flushed = 0
+        # time of the last write, a heartbeat is not needed right after other traffic
+        self.last_send_time = 0
+        # report frames are received in place into recycled slots, see recv_report_proc and read
+        self._report_slots = collections.deque()
+        # slots of the last two frames read, the previous one is still the current frame of the arm while the last is handled
+        self._report_slots_in_use = collections.deque()
+        # report sockets only, replaces rx_que, see ReportMailbox
+        self.report_mailbox = None
+        # sequence number and receive time of the last report frame read, frames missed before it / since connected
+        self.report_seq = 0
+        self.report_time = 0
+        self.report_gap = 0
+        self.report_missed = 0
+        # frame intervals of the report socket, see ReportTiming
+        self.report_timing = None
+        # controller clock => host clock, see ClockSync
+        self.report_clock = None
+        # controller time of the last report frame read (None if the frame has none) and that time in host time,
+        # the receive time if the clock is not synced
+        self.report_controller_time = None
+        self.report_timestamp = 0
 
     @property
     def connected(self):
@@ -54,20 +138,39 @@ class Port(threading.Thread):
             # self.recv_loop()
 
     def close(self):
-        self.alive = False
-        if 'socket' in self.port_type:
+        with self.io_lock:
+            self.alive = False
+            # at once, a reader woken by the close must not take the port for a broken one and reconnect it
+            self._connected = False
+            if self.report_mailbox is not None:
+                self.report_mailbox.close()
+        if self.reactor is not None:
+            self.reactor.unregister(self)
+            return
+        self.close_socket()
+
+    def close_socket(self):
+        with self.io_lock:
+            if 'socket' in self.port_type:
+                try:
+                    self.com.shutdown(socket.SHUT_RDWR)
+                except:
+                    pass
             try:
-                self.com.shutdown(socket.SHUT_RDWR)
+                self.com.close()
             except:
                 pass
-        try:
-            self.com.close()
-        except:
-            pass
+
+    def reset_stats(self):
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.flushed = 0
+        self.report_missed = 0
 
     def flush(self, fromid=-1, toid=-1):
         if not self.connected:
             return -1
+        self.flushed += self.rx_que.qsize()
         while not(self.rx_que.empty()):
             self.rx_que.queue.clear()
         self.rx_parse.flush(fromid, toid)
@@ -78,8 +181,10 @@ class Port(threading.Thread):
             return -1
         try:
             with self.write_lock:
-                logger.verbose('[{}] send: {}'.format(self.port_type, data))
+                logger.verbose('[%s] send: %s', self.port_type, data)
                 self.com_write(data)
+            self.bytes_out += len(data)
+            self.last_send_time = time.monotonic()
             return 0
         except Exception as e:
             self._connected = False
@@ -89,9 +194,11 @@ class Port(threading.Thread):
     def read(self, timeout=None):
         if not self.connected:
             return -1
+        if self.report_mailbox is not None:
+            return self._read_report(timeout)
         try:
             buf = self.rx_que.get(timeout=timeout)
-            logger.verbose('[{}] recv: {}'.format(self.port_type, buf))
+            logger.verbose('[%s] recv: %s', self.port_type, buf)
             return buf
         except:
             return -1
@@ -128,32 +235,79 @@ class Port(threading.Thread):
     #     logger.debug('[{}] recv thread had stopped'.format(self.port_type))
     #     self._connected = False
 
+    def _report_slot_get(self, size=1024):
+        try:
+            slot = self._report_slots.pop()
+            if len(slot) >= size:
+                return slot
+        except IndexError:
+            pass
+        return bytearray(size)
+
+    def _report_slot_release(self, slot):
+        if slot is not None:
+            self._report_slots.append(slot)
+
+    def _report_frame_timing(self, frame):
+        # every report frame when it is received, the intervals and the clock sync
+        recv_time = time.monotonic()
+        controller_time = report_controller_time(frame)
+        if self.report_timing is not None:
+            self.report_timing.add(recv_time, controller_time)
+        if controller_time is not None and self.report_clock is not None:
+            self.report_clock.add(controller_time, recv_time)
+
+    def _report_frame_received(self, frame):
+        # called by the reactor with a complete frame, same as recv_report_proc
+        self._report_frame_timing(frame)
+        self.report_mailbox.put(frame)
+
+    def _report_item_release(self, item):
+        # a frame replaced in the mailbox before it was read, its slot is recycled at once
+        if isinstance(item, tuple):
+            self._report_slot_release(item[0])
+
+    def _read_report(self, timeout=None):
+        ret = self.report_mailbox.take(timeout)
+        if ret is None:
+            return -1
+        seq, self.report_time, buf = ret
+        if self.report_timing is not None:
+            self.report_timing.handled.add(time.monotonic())
+        self.report_gap = seq - self.report_seq - 1
+        self.report_missed += self.report_gap
+        self.report_seq = seq
+        if isinstance(buf, tuple):
+            # the frame is a view of its slot, valid until the read after the next one, see ReportFrame.release
+            slot, buf = buf
+            self._report_slots_in_use.append(slot)
+            if len(self._report_slots_in_use) > 2:
+                self._report_slot_release(self._report_slots_in_use.popleft())
+        controller_time = report_controller_time(buf)
+        self.report_controller_time = controller_time
+        if controller_time is not None and self.report_clock is not None and self.report_clock.synced:
+            self.report_timestamp = self.report_clock.to_host(controller_time)
+        else:
+            self.report_timestamp = self.report_time
+        logger.verbose('[%s] recv: %s', self.port_type, buf)
+        return buf
+
     def recv_report_proc(self):
         self.alive = True
         logger.debug('[{}] recv thread start'.format(self.port_type))
         failed_read_count = 0
         timeout_count = 0
         size = 0
+        declared_size = 0
         data_num = 0
-        buffer = b''
+        slot = self._report_slot_get()
+        view = memoryview(slot)
         size_is_not_confirm = False
 
-        data_prev_us = 0
-        data_curr_us = 0
-        data_max_interval_us = 0
-        data_over_us = 205 * 1000  # over 205ms, cnts++
-        data_over_cnts = 0
-
-        recv_prev_us = 0
-        recv_curr_us = 0
-        recv_max_interval_us = 0
-        recv_over_us = 300 * 1000  # over 300ms, cnts++
-        recv_over_cnts = 0
-
         try:
             while self.connected and self.alive:
                 try:
-                    data = self.com_read(4 - data_num if size == 0 else (size - data_num))
+                    nbytes = self.com_read_into(view[data_num:4 if size == 0 else size])
                 except socket.timeout:
                     timeout_count += 1
                     if timeout_count > 3:
@@ -162,7 +316,7 @@ class Port(threading.Thread):
                         break
                     continue
                 else:
-                    if len(data) == 0:
+                    if nbytes == 0:
                         failed_read_count += 1
                         if failed_read_count > 5:
                             self._connected = False
@@ -170,68 +324,42 @@ class Port(threading.Thread):
                             break
                         time.sleep(0.1)
                         continue
-                    data_num += len(data)
-                    buffer += data
+                    data_num += nbytes
+                    self.bytes_in += nbytes
                     if size == 0:
                         if data_num != 4:
                             continue
-                        size = convert.bytes_to_u32(buffer[0:4])
+                        size = declared_size = convert.bytes_to_u32(view[0:4])
                         if size == 233:
                             size_is_not_confirm = True
                             size = 245
                         logger.info('report_data_size: {}, size_is_not_confirm={}'.format(size, size_is_not_confirm))
+                        if size > len(slot):
+                            slot = bytearray(size)
+                            slot[0:4] = view[0:4]
+                            view = memoryview(slot)
                     else:
                         if data_num < size:
                             continue
                         if size_is_not_confirm:
-                            size_is_not_confirm = True
-                            if convert.bytes_to_u32(buffer[233:237]) == 233:
+                            size_is_not_confirm = False
+                            if convert.bytes_to_u32(view[233:237]) == 233:
+                                # the declared size is right, the tail already belongs to the next frame
                                 size = 233
-                                buffer = buffer[233:]
-                                continue
 
-                        if convert.bytes_to_u32(buffer[0:4]) != size:
-                            logger.error('report data error, close, length={}, size={}'.format(convert.bytes_to_u32(buffer[0:4]), size))
+                        if convert.bytes_to_u32(view[0:4]) != declared_size:
+                            logger.error('report data error, close, length={}, size={}'.format(convert.bytes_to_u32(view[0:4]), declared_size))
                             break
 
-                        # # buffer[494:502]
-                        # data_curr_us = convert.bytes_to_u64(buffer[-8:])
-                        # recv_curr_us = time.monotonic() * 1000000
-                        #
-                        # if data_prev_us != 0 and recv_prev_us != 0:
-                        #     data_interval_us = data_curr_us - data_prev_us
-                        #     data_over_cnts += 1 if data_interval_us > data_over_us else 0
-                        #
-                        #     recv_interval_us = recv_curr_us - recv_prev_us
-                        #     recv_over_cnts += 1 if recv_interval_us > recv_over_us else 0
-                        #
-                        #     print_flag = False
-                        #
-                        #     if data_interval_us > data_max_interval_us:
-                        #         data_max_interval_us = data_interval_us
-                        #         print_flag = True
-                        #     elif data_interval_us > data_over_us:
-                        #         print_flag = True
-                        #
-                        #     if recv_interval_us > recv_max_interval_us:
-                        #         recv_max_interval_us = recv_interval_us
-                        #         print_flag = True
-                        #     elif recv_interval_us > recv_over_us:
-                        #         print_flag = True
-                        #
-                        #     if print_flag:
-                        #         print('[RECV] Di={}, Dmax={}, Dcnts={}, Ri={}, Rmax={}, Rcnts={}'.format(
-                        #             data_interval_us / 1000, data_max_interval_us / 1000, data_over_cnts,
-                        #             recv_interval_us / 1000, recv_max_interval_us / 1000, recv_over_cnts
-                        #         ))
-                        # data_prev_us = data_curr_us
-                        # recv_prev_us = recv_curr_us
-
-                        if self.rx_que.qsize() > 1:
-                            self.rx_que.get()
-                        self.rx_parse.put(buffer)
-                        buffer = b''
-                        data_num = 0
+                        self._report_frame_timing(view[:size])
+
+                        next_slot = self._report_slot_get(len(slot))
+                        data_num -= size
+                        if data_num:
+                            next_slot[:data_num] = view[size:size + data_num]
+                        self.report_mailbox.put((slot, memoryview(slot)[:size]))
+                        slot = next_slot
+                        view = memoryview(slot)
 
                     timeout_count = 0
                     failed_read_count = 0
@@ -243,6 +371,35 @@ class Port(threading.Thread):
         logger.debug('[{}] recv thread had stopped'.format(self.port_type))
         self._connected = False
 
+    def recv_once(self):
+        """
+        Called by the reactor when the socket is readable
+        :return: False if the port should be closed
+        """
+        # nothing is handed over once close() has returned
+        with self.io_lock:
+            if not self.connected:
+                return False
+            try:
+                rx_data = self.com_read(self.buffer_size)
+            except (socket.timeout, BlockingIOError, InterruptedError):
+                return True
+            except Exception as e:
+                if self.alive:
+                    logger.error('[{}] recv error: {}'.format(self.port_type, e))
+                self._connected = False
+                return False
+            if len(rx_data) == 0:
+                logger.error('[{}] socket read failed, len=0'.format(self.port_type))
+                self._connected = False
+                return False
+            self.last_recv_time = time.monotonic()
+            self.bytes_in += len(rx_data)
+            if self.rx_parse.put(rx_data) == -1:
+                self._connected = False
+                return False
+            return True
+
     def recv_proc(self):
         self.alive = True
         logger.debug('[{}] recv thread start'.format(self.port_type))
@@ -283,10 +440,15 @@ class Port(threading.Thread):
                         continue
                 elif self.port_type == 'main-serial':
                     rx_data = self.com_read(self.com.in_waiting or self.buffer_size)
+                    # the rest of the burst which arrived while blocking on the first byte
+                    waiting = self.com.in_waiting
+                    if waiting:
+                        rx_data += self.com_read(waiting)
                 else:
                     break
                 timeout_count = 0
                 failed_read_count = 0
+                self.bytes_in += len(rx_data)
                 self.rx_parse.put(rx_data)
         except Exception as e:
             if self.alive:
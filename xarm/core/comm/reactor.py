@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+# Software License Agreement (MIT License)
+#
+# Copyright (c) 2018, UFACTORY, Inc.
+# All rights reserved.
+#
+# Author: Vinman <vinman.wen@ufactory.cc>
+
+import time
+import heapq
+import socket
+import collections
+import selectors
+import threading
+from ..utils.log import logger
+
+
+class ReactorTimer(object):
+    __slots__ = ('when', 'interval', 'callback', 'cancelled')
+
+    def __init__(self, when, interval, callback):
+        self.when = when
+        self.interval = interval
+        self.callback = callback
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    def __lt__(self, other):
+        return self.when < other.when
+
+
+class ReactorWorker(object):
+    """
+    Runs the jobs of one arm in order on its own thread, which is allowed to block,
+    so a job waiting for a reply, a reconnect or a slow callback only delays the jobs of that arm.
+    The thread is started on demand and ends once it has been idle for IDLE_TIMEOUT seconds.
+    """
+    IDLE_TIMEOUT = 5
+
+    def __init__(self, name):
+        self.name = name
+        self._jobs = collections.deque()
+        self._cond = threading.Condition()
+        self._running = False
+
+    def submit(self, func, *args):
+        with self._cond:
+            self._jobs.append((func, args))
+            if self._running:
+                self._cond.notify()
+                return
+            self._running = True
+        threading.Thread(target=self._run, name=self.name, daemon=True).start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._jobs:
+                    self._cond.wait(self.IDLE_TIMEOUT)
+                if not self._jobs:
+                    self._running = False
+                    return
+                func, args = self._jobs.popleft()
+            try:
+                func(*args)
+            except Exception as e:
+                logger.error('reactor job error: {}'.format(e))
+
+
+class Reactor(object):
+    """
+    One selectors based io thread which serves the sockets of every arm in the process,
+    the received bytes are handed over to the rx_parse of the port (framing and routing only).
+    The callbacks of the io thread must never block, the work which may wait for a reply
+    (commands, report handling, user callbacks) is submitted to the ReactorWorker of the arm.
+    The io thread is started on demand and ends once no port and no timer is left.
+    """
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self):
+        self._thread = None
+        self._selector = selectors.DefaultSelector()
+        self._wakeup_r, self._wakeup_w = socket.socketpair()
+        self._wakeup_r.setblocking(False)
+        self._wakeup_w.setblocking(False)
+        self._selector.register(self._wakeup_r, selectors.EVENT_READ, None)
+        self._ready = []
+        self._ready_lock = threading.Lock()
+        self._timers = []
+        self._ports = set()
+
+    @classmethod
+    def get_instance(cls):
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = Reactor()
+            return cls._instance
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    def in_reactor(self):
+        return threading.current_thread() is self._thread
+
+    def call_soon(self, callback, *args):
+        """
+        Run callback on the io thread, thread safe, the thread is started if it is not running
+        """
+        with self._ready_lock:
+            self._ready.append((callback, args))
+            if self._thread is None:
+                # the callback is run first, see _idle
+                self._thread = threading.Thread(target=self._run, name='xarm-reactor', daemon=True)
+                self._thread.start()
+                return
+        if not self.in_reactor():
+            try:
+                self._wakeup_w.send(b'\0')
+            except (BlockingIOError, InterruptedError):
+                pass
+
+    def call_every(self, interval, callback):
+        """
+        Run callback on the io thread every interval seconds
+        :return: ReactorTimer, call its cancel() to stop
+        """
+        timer = ReactorTimer(time.monotonic() + interval, interval, callback)
+        self.call_soon(heapq.heappush, self._timers, timer)
+        return timer
+
+    def register(self, port):
+        self.call_soon(self._register, port)
+
+    def unregister(self, port, close=True):
+        """
+        Stop serving the port, the socket is closed on the io thread after it is unregistered
+        """
+        if self.in_reactor():
+            self._unregister(port, close)
+        else:
+            self.call_soon(self._unregister, port, close)
+
+    def _register(self, port):
+        # a port closed by another thread meanwhile is never registered
+        with port.io_lock:
+            if not port.connected:
+                return
+            try:
+                self._selector.register(port.com, selectors.EVENT_READ, port)
+                self._ports.add(port)
+                return
+            except Exception as e:
+                logger.error('[{}] reactor register error: {}'.format(port.port_type, e))
+        port.close()
+
+    def _unregister(self, port, close):
+        if port in self._ports:
+            self._ports.discard(port)
+            try:
+                self._selector.unregister(port.com)
+            except Exception:
+                pass
+        if close:
+            port.close_socket()
+
+    def _run_ready(self):
+        with self._ready_lock:
+            ready, self._ready = self._ready, []
+        for callback, args in ready:
+            try:
+                callback(*args)
+            except Exception as e:
+                logger.error('reactor callback error: {}'.format(e))
+
+    def _run_timers(self):
+        now = time.monotonic()
+        while self._timers and self._timers[0].when <= now:
+            timer = heapq.heappop(self._timers)
+            if timer.cancelled:
+                continue
+            try:
+                timer.callback()
+            except Exception as e:
+                logger.error('reactor timer error: {}'.format(e))
+            if not timer.cancelled:
+                timer.when = max(timer.when + timer.interval, now)
+                heapq.heappush(self._timers, timer)
+
+    def _idle(self):
+        """
+        :return: True if the thread is done (no port, timer or callback left), it is cleared in the same lock as call_soon checks it
+        """
+        if self._ports or any(not timer.cancelled for timer in self._timers):
+            return False
+        with self._ready_lock:
+            if self._ready:
+                return False
+            self._timers = []
+            self._thread = None
+        return True
+
+    def _run(self):
+        logger.debug('reactor thread start')
+        while True:
+            self._run_ready()
+            if self._idle():
+                logger.debug('reactor thread stop')
+                return
+            timeout = max(0, self._timers[0].when - time.monotonic()) if self._timers else None
+            for key, _ in self._selector.select(timeout):
+                port = key.data
+                if port is None:
+                    try:
+                        while self._wakeup_r.recv(4096):
+                            pass
+                    except (BlockingIOError, InterruptedError):
+                        pass
+                    continue
+                if port in self._ports and not port.recv_once():
+                    self._unregister(port, True)
+            self._run_timers()
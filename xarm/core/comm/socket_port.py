@@ -11,12 +11,15 @@
 import queue
 import os
 import socket
+import sys
 import struct
-import platform
 import threading
 import time
 from ..utils.log import logger
-from .base import Port
+from .base import Port, ReportMailbox
+from ..utils.latency import ReportTiming
+from ..utils.clock_sync import ClockSync
+from .uxbus_cmd_protocol import Tx2HexProtocol, Tx2ReportProtocol
 from ..config.x_config import XCONF
 
 # try:
@@ -71,38 +74,55 @@ def get_all_ips():
     return addrs
 
 
-class HeartBeatThread(threading.Thread):
-    def __init__(self, sock_class):
-        threading.Thread.__init__(self)
-        self.sock_class = sock_class
-        self.daemon = True
-
-    def run(self):
-        logger.debug('{} heartbeat thread start'.format(self.sock_class.port_type))
-        heat_data = bytes([0, 0, 0, 1, 0, 2, 0, 0])
-
-        while self.sock_class.connected:
-            if self.sock_class.write(heat_data) == -1:
-                break
-            time.sleep(1)
-        logger.debug('{} heartbeat thread had stopped'.format(self.sock_class.port_type))
+def set_tcp_keepalive(sock, idle=30, interval=10, count=3):
+    """
+    Let the os probe an idle connection, a dead peer (power off, cable unplugged) is found without any app traffic
+    """
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        if hasattr(socket, 'TCP_KEEPIDLE'):
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, idle)
+        elif hasattr(socket, 'TCP_KEEPALIVE'):
+            # macOS
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPALIVE, idle)
+        if hasattr(socket, 'TCP_KEEPINTVL'):
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, interval)
+        if hasattr(socket, 'TCP_KEEPCNT'):
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPCNT, count)
+        if hasattr(socket, 'SIO_KEEPALIVE_VALS'):
+            # windows
+            sock.ioctl(socket.SIO_KEEPALIVE_VALS, (1, idle * 1000, interval * 1000))
+    except Exception as e:
+        logger.debug('set tcp keepalive failed, {}'.format(e))
 
 
 class SocketPort(Port):
-    def __init__(self, server_ip, server_port, rxque_max=XCONF.SocketConf.TCP_RX_QUE_MAX, heartbeat=False,
-                 buffer_size=XCONF.SocketConf.TCP_CONTROL_BUF_SIZE, forbid_uds=False):
+    """
+    Note: no heartbeat of its own, the heartbeat/keepalive of the control sockets is sent by the arm, see Base._keepalive_tick
+    """
+    def __init__(self, server_ip, server_port, rxque_max=XCONF.SocketConf.TCP_RX_QUE_MAX,
+                 buffer_size=XCONF.SocketConf.TCP_CONTROL_BUF_SIZE, forbid_uds=False, reactor=None):
         super(SocketPort, self).__init__(rxque_max)
+        self._reactor_timers = []
         if server_port == XCONF.SocketConf.TCP_CONTROL_PORT or server_port == XCONF.SocketConf.TCP_CONTROL_PORT + 1:
             self.port_type = 'main-socket'
+            self.rx_parse = Tx2HexProtocol(self.rx_que)
             # self.com.setsockopt(socket.SOL_SOCKET, socket.SO_RCVTIMEO, 5)
         else:
             self.port_type = 'report-socket'
+            self.report_mailbox = ReportMailbox(release=self._report_item_release)
+            self.report_timing = ReportTiming()
+            self.report_clock = ClockSync()
+            if reactor is not None:
+                # no recv_report_proc in reactor mode, the frames are cut by the parser
+                self.rx_parse = Tx2ReportProtocol(self.rx_que, handler=self._report_frame_received)
         try:
             socket.setdefaulttimeout(1)
             use_uds = False
             # if not forbid_uds and platform.system() == 'Linux' and is_xarm_local_ip(server_ip):
             # if not forbid_uds and platform.system() == 'Linux' and server_ip in get_all_ips():
-            if not forbid_uds and platform.system() == 'Linux':
+            # sys.platform instead of platform.system(), the platform module is slow to import
+            if not forbid_uds and sys.platform.startswith('linux'):
                 uds_path = os.path.join('/tmp/xarmcontroller_uds_{}'.format(server_port))
                 if os.path.exists(uds_path):
                     try:
@@ -121,10 +141,7 @@ class SocketPort(Port):
             if not use_uds:
                 self.com = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
                 self.com.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-                # self.com.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
-                # self.com.setsockopt(socket.SOL_TCP, socket.TCP_KEEPIDLE, 30)
-                # self.com.setsockopt(socket.SOL_TCP, socket.TCP_KEEPINTVL, 10)
-                # self.com.setsockopt(socket.SOL_TCP, socket.TCP_KEEPCNT, 3)
+                set_tcp_keepalive(self.com)
                 self.com.setblocking(True)
                 self.com.settimeout(1)
                 self.com.connect((server_ip, server_port))
@@ -136,14 +153,29 @@ class SocketPort(Port):
             # time.sleep(1)
 
             self.com_read = self.com.recv
-            self.com_write = self.com.send
+            self.com_read_into = self.com.recv_into
+            self.com_write = self.com.sendall
             self.write_lock = threading.Lock()
-            self.start()
-            if heartbeat:
-                self.heartbeat_thread = HeartBeatThread(self)
-                self.heartbeat_thread.start()
+            if reactor is not None:
+                self.reactor = reactor
+                self.last_recv_time = time.monotonic()
+                if self.port_type == 'report-socket':
+                    self._reactor_timers.append(reactor.call_every(1, self._check_report_timeout))
+                reactor.register(self)
+            else:
+                self.start()
         except Exception as e:
             logger.info('{} connect {} failed, {}'.format(self.port_type, server_ip, e))
             # logger.error('{} connect {}:{} failed, {}'.format(self.port_type, server_ip, server_port, e))
             self._connected = False
 
+    def _check_report_timeout(self):
+        # same as the read timeout of recv_report_proc
+        if self.connected and time.monotonic() - self.last_recv_time > 4:
+            logger.error('[{}] socket read timeout'.format(self.port_type))
+            self.close()
+
+    def close_socket(self):
+        for timer in self._reactor_timers:
+            timer.cancel()
+        super(SocketPort, self).close_socket()
@@ -9,36 +9,27 @@
 
 
 from ..utils import crc16
+from ..utils import convert
 from ..utils.log import logger
 
 # ux2_hex_protocol define
-UX2HEX_RXSTART_FROMID = 0
-UX2HEX_RXSTART_TOID = 1
-UX2HEX_RXSTATE_LEN = 2
-UX2HEX_RXSTATE_DATA = 3
-UX2HEX_RXSTATE_CRC1 = 4
-UX2HEX_RXSTATE_CRC2 = 5
 UX2HEX_RXLEN_MAX = 50
 
 
 class Ux2HexProtocol(object):
     """
     fromid and toid: broadcast address is 0xFF
+    frame: toid(1) + fromid(1) + len(1) + data(len) + crc(2), the frames are cut from a bytearray buffer
     """
     def __init__(self, rx_que, fromid, toid):
         self.rx_que = rx_que
-        self.rxstate = UX2HEX_RXSTART_FROMID
-        self.data_idx = 0
-        self.len = 0
         self.fromid = fromid
         self.toid = toid
-        self.rxbuf = None
+        self.rxbuf = bytearray()
 
     # wipe cache , set from_id and to_id
     def flush(self, fromid=-1, toid=-1):
-        self.rxstate = UX2HEX_RXSTART_FROMID
-        self.data_idx = 0
-        self.len = 0
+        self.rxbuf.clear()
         if fromid != -1:
             self.fromid = fromid
         if toid != -1:
@@ -49,52 +40,145 @@ class Ux2HexProtocol(object):
             length = len(rxstr)
         if len(rxstr) < length:
             logger.error('len(rxstr) < length')
+        rxbuf = self.rxbuf
+        rxbuf += rxstr[:length] if length != len(rxstr) else rxstr
+        total = len(rxbuf)
+        offset = 0
+        while offset < total:
+            if self.toid != 0xFF:
+                start = rxbuf.find(self.toid, offset)
+                if start < 0:
+                    offset = total
+                    break
+            else:
+                start = offset
+            if total - start < 3:
+                offset = start
+                break
+            data_len = rxbuf[start + 2]
+            if (self.fromid != 0xFF and rxbuf[start + 1] != self.fromid) or data_len == 0 or data_len >= UX2HEX_RXLEN_MAX:
+                offset = start + 1
+                continue
+            end = start + data_len + 5
+            if total < end:
+                offset = start
+                break
+            with memoryview(rxbuf) as view:
+                crc = crc16.crc_modbus(view[start:end - 2])
+            if crc[0] != rxbuf[end - 2] or crc[1] != rxbuf[end - 1]:
+                offset = start + 1
+                continue
+            offset = end
+            if self.rx_que.full():
+                self.rx_que.get()
+            self.rx_que.put(bytes(rxbuf[start:end]))
+        if offset:
+            del rxbuf[:offset]
 
-        for i in range(length):
-            rxch = bytes([rxstr[i]])
-            # print_hex(self.DB_FLG, rxch, 1)
-            # print('state:%d' % (self.rxstate))
-            if UX2HEX_RXSTART_FROMID == self.rxstate:
-                if self.toid == rxch[0] or 255 == self.toid:
-                    self.rxbuf = rxch
-                    self.rxstate = UX2HEX_RXSTART_TOID
-
-            elif UX2HEX_RXSTART_TOID == self.rxstate:
-                if self.fromid == rxch[0] or self.fromid == 0xFF:
-                    self.rxbuf += rxch
-                    self.rxstate = UX2HEX_RXSTATE_LEN
-                else:
-                    self.rxstate = UX2HEX_RXSTART_FROMID
-
-            elif UX2HEX_RXSTATE_LEN == self.rxstate:
-                if rxch[0] < UX2HEX_RXLEN_MAX:
-                    self.rxbuf += rxch
-                    self.len = rxch[0]
-                    self.data_idx = 0
-                    self.rxstate = UX2HEX_RXSTATE_DATA
-                else:
-                    self.rxstate = UX2HEX_RXSTART_FROMID
-
-            elif UX2HEX_RXSTATE_DATA == self.rxstate:
-                if self.data_idx < self.len:
-                    self.rxbuf += rxch
-                    self.data_idx += 1
-                    if self.data_idx == self.len:
-                        self.rxstate = UX2HEX_RXSTATE_CRC1
-                else:
-                    self.rxstate = UX2HEX_RXSTART_FROMID
-
-            elif UX2HEX_RXSTATE_CRC1 == self.rxstate:
-                self.rxbuf += rxch
-                self.rxstate = UX2HEX_RXSTATE_CRC2
-
-            elif UX2HEX_RXSTATE_CRC2 == self.rxstate:
-                self.rxbuf += rxch
-                self.rxstate = UX2HEX_RXSTART_FROMID
-                crc = crc16.crc_modbus(self.rxbuf[:self.len + 3])
-                if crc[0] == self.rxbuf[self.len + 3] and crc[1] == self.rxbuf[self.len + 4]:
-                    if self.rx_que.full():
-                        self.rx_que.get()
-                    self.rx_que.put(self.rxbuf)
-                    # print(self.rxbuf)
 
+# tx2 (tcp) protocol define
+TX2_HEADER_LEN = 6
+TX2_RXLEN_MAX = 4096
+
+
+class Tx2HexProtocol(object):
+    """
+    Reassemble the tcp byte stream into complete responses
+    header: bus_flag(2) + prot_flag(2) + length(2), length counts the bytes after the header
+    """
+    def __init__(self, rx_que, handler=None):
+        self.rx_que = rx_que
+        self.handler = handler
+        self.rxbuf = bytearray()
+
+    # the stream must stay aligned, so the partial frame is kept
+    def flush(self, fromid=-1, toid=-1):
+        pass
+
+    def reset(self):
+        self.rxbuf.clear()
+
+    def put(self, rxstr, length=0):
+        if length == 0:
+            length = len(rxstr)
+        rxbuf = self.rxbuf
+        rxbuf += rxstr[:length] if length != len(rxstr) else rxstr
+        offset = 0
+        total = len(rxbuf)
+        while total - offset >= TX2_HEADER_LEN:
+            frame_len = TX2_HEADER_LEN + convert.bytes_to_u16(rxbuf[offset + 4:offset + 6])
+            if frame_len > TX2_RXLEN_MAX:
+                logger.error('tx2 frame length error, length={}, discard {} bytes'.format(frame_len, total - offset))
+                offset = total
+                break
+            if total - offset < frame_len:
+                break
+            frame = bytes(rxbuf[offset:offset + frame_len])
+            offset += frame_len
+            if self.handler is not None:
+                self.handler(frame)
+            else:
+                if self.rx_que.full():
+                    self.rx_que.get()
+                self.rx_que.put(frame)
+        if offset:
+            del rxbuf[:offset]
+
+
+class Tx2ReportProtocol(object):
+    """
+    Cut the report stream into frames, the first 4 bytes of every frame is its size
+    Note: some firmware declares 233 bytes but sends 245, the size is confirmed by the next frame
+    """
+    def __init__(self, rx_que, handler=None):
+        self.rx_que = rx_que
+        self.handler = handler
+        self.rxbuf = bytearray()
+        self.size = 0
+        self.declared_size = 0
+        self.size_is_not_confirm = False
+
+    def flush(self, fromid=-1, toid=-1):
+        pass
+
+    def reset(self):
+        self.rxbuf.clear()
+        self.size = 0
+        self.size_is_not_confirm = False
+
+    def put(self, rxstr, length=0):
+        """
+        :return: 0 or -1 if the stream is broken
+        """
+        if length == 0:
+            length = len(rxstr)
+        rxbuf = self.rxbuf
+        rxbuf += rxstr[:length] if length != len(rxstr) else rxstr
+        while True:
+            if self.size == 0:
+                if len(rxbuf) < 4:
+                    break
+                self.size = self.declared_size = convert.bytes_to_u32(rxbuf[0:4])
+                if self.size == 233:
+                    self.size_is_not_confirm = True
+                    self.size = 245
+                logger.info('report_data_size: {}, size_is_not_confirm={}'.format(self.size, self.size_is_not_confirm))
+            size = self.size
+            if len(rxbuf) < size:
+                break
+            if self.size_is_not_confirm:
+                self.size_is_not_confirm = False
+                if convert.bytes_to_u32(rxbuf[233:237]) == 233:
+                    self.size = size = 233
+            if convert.bytes_to_u32(rxbuf[0:4]) != self.declared_size:
+                logger.error('report data error, close, length={}, size={}'.format(convert.bytes_to_u32(rxbuf[0:4]), self.declared_size))
+                return -1
+            frame = bytes(rxbuf[:size])
+            del rxbuf[:size]
+            if self.handler is not None:
+                self.handler(frame)
+            elif self.rx_que is not None:
+                if self.rx_que.full():
+                    self.rx_que.get()
+                self.rx_que.put(frame)
+        return 0
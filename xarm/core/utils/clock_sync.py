@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# Software License Agreement (MIT License)
+#
+# Copyright (c) 2018, UFACTORY, Inc.
+# All rights reserved.
+#
+# Author: Vinman <vinman.wen@ufactory.cc>
+
+import collections
+from . import convert
+
+
+def report_controller_time(frame):
+    """
+    :return: controller time (seconds) when the report frame was sent, None if the frame has no timestamp
+    """
+    if len(frame) >= 502:
+        # microseconds, buffer[494:502], rich report of the new firmware
+        return convert.bytes_to_u64(frame[494:502]) / 1000000
+    return None
+
+
+class ClockSync(object):
+    """
+    Maps the controller clock to the host monotonic clock (time.monotonic()) by the timestamps of the report frames
+    Every frame gives host_recv_time - controller_time = offset + delay, the delay is never negative,
+    so the minimum of a window is the offset plus the minimal delay (about constant, well under 1ms on a lan).
+    The minima of the latest windows are fitted to a line (the slope is the drift of the two clocks),
+    the line is then lowered to the lowest minimum, the lower envelope of the samples.
+    Ex:
+        clock.add(report_controller_time(frame), time.monotonic())
+        host_time = clock.to_host(controller_time)
+    """
+    WINDOW = 1.0  # seconds of the controller clock per minimum
+    WINDOWS = 60  # minima kept for the drift
+    MAX_DRIFT = 0.001  # a quartz is far better than 1000ppm, more is a bad fit
+    RESYNC = 0.5  # seconds, a sample that far under the estimate means the controller clock jumped
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self._minima = collections.deque(maxlen=self.WINDOWS)
+        self._window_start = None
+        self._window_min = None
+        self._last_controller_time = None
+        # (reference controller time, offset at the reference, drift), replaced as a whole, see to_host
+        self._params = None
+        self.samples = 0
+        self.resyncs = 0
+
+    @property
+    def synced(self):
+        return self._params is not None
+
+    @property
+    def offset(self):
+        """
+        host time - controller time (seconds) at the latest sample, None if not synced
+        """
+        if self._params is None:
+            return None
+        return self._estimate(self._last_controller_time)
+
+    @property
+    def drift(self):
+        """
+        host seconds gained per controller second
+        """
+        params = self._params
+        return params[2] if params is not None else 0
+
+    def add(self, controller_time, host_time):
+        sample = host_time - controller_time
+        if self._last_controller_time is not None and (controller_time < self._last_controller_time or
+                                                       sample < self._estimate(controller_time) - self.RESYNC):
+            # the controller restarted or its clock was set
+            resyncs = self.resyncs + 1
+            self.reset()
+            self.resyncs = resyncs
+        self._last_controller_time = controller_time
+        self.samples += 1
+        if self._window_start is None:
+            self._window_start = controller_time
+        elif controller_time - self._window_start >= self.WINDOW:
+            self._minima.append(self._window_min)
+            self._window_start = controller_time
+            self._window_min = None
+        if self._window_min is None or sample < self._window_min[1]:
+            self._window_min = (controller_time, sample)
+            self._fit()
+
+    def _estimate(self, controller_time):
+        params = self._params
+        if params is None:
+            return float('-inf')
+        return params[1] + params[2] * (controller_time - params[0])
+
+    def _fit(self):
+        # the drift by the closed windows only, the minimum of the current one may still come down
+        minima = self._minima
+        n = len(minima)
+        drift = 0
+        ref = self._window_min[0]
+        if n >= 3:
+            ref = sum(p[0] for p in minima) / n
+            mean = sum(p[1] for p in minima) / n
+            sxx = sum((p[0] - ref) ** 2 for p in minima)
+            if sxx > 0:
+                drift = sum((p[0] - ref) * (p[1] - mean) for p in minima) / sxx
+                drift = max(-self.MAX_DRIFT, min(self.MAX_DRIFT, drift))
+        offset = min(p[1] - drift * (p[0] - ref) for p in list(minima) + [self._window_min])
+        self._params = (ref, offset, drift)
+
+    def to_host(self, controller_time):
+        """
+        :return: host monotonic time of the controller time, None if not synced
+        """
+        params = self._params
+        if params is None:
+            return None
+        return controller_time + params[1] + params[2] * (controller_time - params[0])
+
+    def to_dict(self):
+        offset = self.offset
+        return {
+            'synced': self.synced,
+            'offset': offset,
+            'drift_ppm': self.drift * 1000000,
+            'samples': self.samples,
+            'resyncs': self.resyncs,
+        }
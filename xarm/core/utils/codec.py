@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# Software License Agreement (MIT License)
+#
+# Copyright (c) 2018, UFACTORY, Inc.
+# All rights reserved.
+#
+# Author: Vinman <vinman.wen@ufactory.cc>
+
+from . import convert
+
+
+class RequestFrame(bytearray):
+    """
+    Buffer of one request frame taken from a FramePool, the payload is packed in place behind the header
+    """
+    __slots__ = ()
+
+
+class FramePool(object):
+    """
+    Recycled request buffers, one free list per frame size
+    Ex:
+        frame = pool.encode(7, '<f', angles, 10)  # header space + 10 floats packed in place
+        ...
+        pool.put(frame)  # once the reply is received, the frame is never used again
+    """
+    def __init__(self, max_free=8):
+        self.max_free = max_free
+        # size => [RequestFrame, ...]
+        self._free = {}
+
+    def get(self, size):
+        try:
+            # list.pop is atomic, no lock needed
+            return self._free[size].pop()
+        except (KeyError, IndexError):
+            return RequestFrame(size)
+
+    def put(self, frame):
+        if type(frame) is not RequestFrame:
+            return
+        free = self._free.setdefault(len(frame), [])
+        if len(free) < self.max_free:
+            free.append(frame)
+
+    def encode(self, offset, fmt, datas, num):
+        """
+        :param offset: size of the header, left for the caller
+        :param fmt: byte order + type of the items, eg: '<f', the struct is precompiled once, see convert.get_struct
+        :return: RequestFrame, header space + the num items of datas
+        """
+        st = convert.get_struct(fmt, num)
+        frame = self.get(offset + st.size)
+        st.pack_into(frame, offset, *datas[:num])
+        return frame
@@ -10,68 +10,73 @@
 
 import struct
 
+_FP32 = struct.Struct('<f')
+_FP32_BE = struct.Struct('>f')
+_INT32 = struct.Struct('<i')
+_INT32_BE = struct.Struct('>i')
+_U16 = struct.Struct('>H')
+# (fmt, n) => precompiled struct.Struct, eg: ('<f', 6) => Struct('<6f')
+_STRUCTS = {}
+
+
+def get_struct(fmt, n):
+    """
+    Precompiled struct for n items of the same type
+    :param fmt: byte order + type, eg: '<f'
+    """
+    st = _STRUCTS.get((fmt, n))
+    if st is None:
+        st = _STRUCTS[(fmt, n)] = struct.Struct('{}{}{}'.format(fmt[0], n, fmt[1:]))
+    return st
+
+
+def as_buffer(data, size):
+    """the replies of the core layer are lists of ints, struct needs a buffer"""
+    return data if isinstance(data, (bytes, bytearray, memoryview)) else bytes(data[:size])
+
 
 def fp32_to_bytes(data, is_big_endian=False):
     """小端字节序"""
-    return bytes(struct.pack('>f' if is_big_endian else '<f', data))
+    return (_FP32_BE if is_big_endian else _FP32).pack(data)
 
 
 def int32_to_bytes(data, is_big_endian=False):
     """小端字节序"""
-    return bytes(struct.pack('>i' if is_big_endian else '<i', data))
+    return (_INT32_BE if is_big_endian else _INT32).pack(data)
 
 
 def int32s_to_bytes(data, n):
     """小端字节序"""
     assert n > 0
-    ret = int32_to_bytes(data[0])
-    for i in range(1, n):
-        ret += int32_to_bytes(data[i])
-    return ret
+    return get_struct('<i', n).pack(*data[:n])
 
 
 def bytes_to_fp32(data):
     """小端字节序"""
-    byte = bytes([data[0]])
-    byte += bytes([data[1]])
-    byte += bytes([data[2]])
-    byte += bytes([data[3]])
-    ret = struct.unpack('<f', byte)
-    return ret[0]
+    return _FP32.unpack_from(as_buffer(data, 4))[0]
 
 
 def fp32s_to_bytes(data, n):
     """小端字节序"""
     assert n > 0
-    ret = fp32_to_bytes(data[0])
-    for i in range(1, n):
-        ret += fp32_to_bytes(data[i])
-    return ret
+    return get_struct('<f', n).pack(*data[:n])
 
 
 def bytes_to_fp32s(data, n):
     """小端字节序"""
-    ret = [0] * n
-    for i in range(n):
-        ret[i] = bytes_to_fp32(data[i * 4:i * 4 + 4])
-    return ret
+    return list(get_struct('<f', n).unpack_from(as_buffer(data, n * 4)))
 
 
 def u16_to_bytes(data):
     """大端字节序"""
-    bts = bytes([data // 256 % 256])
-    bts += bytes([data % 256])
-    return bts
+    return _U16.pack(data & 0xFFFF)
 
 
 def u16s_to_bytes(data, num):
     """大端字节序"""
-    bts = b''
-    if num != 0:
-        bts = u16_to_bytes(data[0])
-        for i in range(1, num):
-            bts += u16_to_bytes(data[i])
-    return bts
+    if num == 0:
+        return b''
+    return get_struct('>H', num).pack(*[d & 0xFFFF for d in data[:num]])
 
 
 def bytes_to_u16(data):
@@ -82,18 +87,12 @@ def bytes_to_u16(data):
 
 def bytes_to_u16s(data, n):
     """大端字节序"""
-    ret = [0] * n
-    for i in range(n):
-        ret[i] = bytes_to_u16(data[i * 2: i * 2 + 2])
-    return ret
+    return list(get_struct('>H', n).unpack_from(as_buffer(data, n * 2)))
 
 
 def bytes_to_16s(data, n):
     """大端字节序"""
-    ret = [0] * n
-    for i in range(n):
-        ret[i] = struct.unpack('>h', bytes(data[i * 2: i * 2 + 2]))[0]
-    return ret
+    return list(get_struct('>h', n).unpack_from(as_buffer(data, n * 2)))
 
 
 def bytes_to_u32(data):
@@ -108,15 +107,9 @@ def bytes_to_u64(data):
 
 
 def bytes_to_num32(data, fmt='>l'):
-    byte = bytes([data[0]])
-    byte += bytes([data[1]])
-    byte += bytes([data[2]])
-    byte += bytes([data[3]])
-    ret = struct.unpack(fmt, byte)
-    return ret[0]
+    return struct.unpack_from(fmt, as_buffer(data, 4))[0]
 
 
 def bytes_to_long_big(data):
     """大端字节序"""
     return bytes_to_num32(data, '>l')
-
@@ -7,6 +7,8 @@
 #                       <jimy92@163.com>
 #
 
+from . import convert
+
 
 CRC_TABLE_H = (
 0x00, 0xC1, 0x81, 0x40, 0x01, 0xC0, 0x80, 0x41, 0x01, 0xC0, 0x80, 0x41, 0x00,
@@ -57,20 +59,41 @@ CRC_TABLE_L = (
 0x80, 0x40)
 
 
-def crc_modbus(data):
-    leng = len(data)
-    init_crch = 0xFF
-    init_crcl = 0xFF
-    i = 0
+# shorter data is done byte by byte, not worth the unpack
+CRC_WORD_MIN_LEN = 16
+# two bytes in one step, index: crc ^ (first byte | second byte << 8), built on first use
+_CRC_TABLE_WORD = None
+
 
-    while leng > 0:
-        index = init_crch ^ data[i]
-        i += 1
-        init_crch = init_crcl ^ CRC_TABLE_H[index]
-        init_crcl = CRC_TABLE_L[index]
-        leng -= 1
-    s = init_crch << 8 | init_crcl
-    crc = bytes([s // 256 % 256])
-    crc += bytes([s % 256])
-    return crc
+def _build_word_table():
+    global _CRC_TABLE_WORD
+    # crc of one byte as one 16 bit value
+    table = [CRC_TABLE_L[i] << 8 | CRC_TABLE_H[i] for i in range(256)]
+    _CRC_TABLE_WORD = tuple((table[i & 0xFF] >> 8) ^ table[(i >> 8) ^ (table[i & 0xFF] & 0xFF)] for i in range(0x10000))
+    return _CRC_TABLE_WORD
 
+
+def crc_modbus(data):
+    """
+    :param data: bytes/bytearray/memoryview (or list of ints)
+    :return: 2 bytes, high byte first
+    """
+    if len(data) < CRC_WORD_MIN_LEN or isinstance(data, list):
+        crch = 0xFF
+        crcl = 0xFF
+        table_h = CRC_TABLE_H
+        table_l = CRC_TABLE_L
+        for byte in data:
+            index = crch ^ byte
+            crch = crcl ^ table_h[index]
+            crcl = table_l[index]
+        return bytes((crch, crcl))
+    table = _CRC_TABLE_WORD or _build_word_table()
+    crc = 0xFFFF
+    for word in convert.get_struct('<H', len(data) >> 1).unpack_from(data):
+        crc = table[crc ^ word]
+    crch, crcl = crc & 0xFF, crc >> 8
+    if len(data) & 1:
+        index = crch ^ data[-1]
+        crch, crcl = crcl ^ CRC_TABLE_H[index], CRC_TABLE_L[index]
+    return bytes((crch, crcl))
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# Software License Agreement (MIT License)
+#
+# Copyright (c) 2018, UFACTORY, Inc.
+# All rights reserved.
+#
+# Author: Vinman <vinman.wen@ufactory.cc>
+
+import os
+import json
+import time
+import threading
+from .log import logger
+
+# created on first save
+cache_path = os.path.join(os.path.expanduser('~'), '.UFACTORY', 'cache', 'xarm', 'sdk')
+
+
+class DeviceCache(object):
+    """
+    Static facts of the arms (version, sn, axis, type), saved on disk by the serial number,
+    the host => sn index finds the arm last seen at a host, see Base._device_cache_matches.
+    The limits are not cached: the joint ranges are the XCONF tables of the axis/type,
+    the speed/acc limits are settable and arrive with every rich report.
+    Format: {"devices": {sn: {"version": ..., "robot_sn": ..., ...}}, "hosts": {host: sn}}
+    """
+    def __init__(self, filename=None):
+        self.filename = filename or os.path.join(cache_path, 'devices.json')
+        self._lock = threading.Lock()
+        self._data = None
+
+    def _load(self):
+        if self._data is None:
+            try:
+                with open(self.filename, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                self._data = {'devices': dict(data.get('devices', {})), 'hosts': dict(data.get('hosts', {}))}
+            except Exception:
+                self._data = {'devices': {}, 'hosts': {}}
+        return self._data
+
+    def _save(self):
+        try:
+            dirname = os.path.dirname(self.filename)
+            if dirname and not os.path.exists(dirname):
+                os.makedirs(dirname)
+            # other processes never see a half written file
+            tmp = '{}.{}.tmp'.format(self.filename, os.getpid())
+            try:
+                with open(tmp, 'w', encoding='utf-8') as f:
+                    json.dump(self._data, f, ensure_ascii=False, indent=1)
+                os.replace(tmp, self.filename)
+            finally:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+        except Exception as e:
+            logger.warning('save device cache failed, {}'.format(e))
+
+    def lookup(self, host):
+        """
+        :return: facts of the arm last seen at the host, None if unknown
+        """
+        with self._lock:
+            data = self._load()
+            device = data['devices'].get(data['hosts'].get(host))
+            return dict(device) if device else None
+
+    def update(self, host, robot_sn, **facts):
+        """
+        Save the facts of the arm, the file is written only if something changed
+        """
+        if not robot_sn:
+            return
+        with self._lock:
+            data = self._load()
+            facts['robot_sn'] = robot_sn
+            device = data['devices'].get(robot_sn, {})
+            if data['hosts'].get(host) == robot_sn and all(device.get(k) == v for k, v in facts.items()):
+                return
+            device.update(facts)
+            device['time'] = time.time()
+            data['devices'][robot_sn] = device
+            data['hosts'][host] = robot_sn
+            self._save()
+
+    def remove(self, host):
+        with self._lock:
+            data = self._load()
+            if data['hosts'].pop(host, None) is not None:
+                self._save()
+
+
+_device_caches = {}
+
+
+def get_device_cache(filename=None):
+    """
+    :return: DeviceCache shared by every instance in the process which uses the same file
+    """
+    cache = _device_caches.get(filename)
+    if cache is None:
+        cache = _device_caches.setdefault(filename, DeviceCache(filename))
+    return cache
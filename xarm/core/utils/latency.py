@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+# Software License Agreement (MIT License)
+#
+# Copyright (c) 2018, UFACTORY, Inc.
+# All rights reserved.
+#
+# Author: Vinman <vinman.wen@ufactory.cc>
+
+import time
+import bisect
+from ..config.x_config import XCONF
+
+
+class LatencyModel(object):
+    """
+    Running round trip model of one funcode, the quantiles are taken from the latest samples
+    Ex:
+        model.add(0.0012)
+        if model.ready:
+            deadline = max(floor, model.p99 * k)
+    """
+    __slots__ = ('_samples', '_index', '_count', '_sorted', '_dirty')
+
+    SIZE = 128  # latest samples kept
+    MIN_SAMPLES = 16  # samples needed before the model is used
+    RESORT_EVERY = 8  # the sorted copy is refreshed every N samples
+
+    def __init__(self):
+        self._samples = [0.0] * self.SIZE
+        self._index = 0
+        self._count = 0
+        self._sorted = []
+        self._dirty = 0
+
+    @property
+    def count(self):
+        return self._count
+
+    @property
+    def ready(self):
+        return self._count >= self.MIN_SAMPLES
+
+    def add(self, rtt):
+        self._samples[self._index] = rtt
+        self._index = (self._index + 1) % self.SIZE
+        self._count += 1
+        self._dirty += 1
+
+    def quantile(self, q):
+        """
+        :param q: 0~1, eg: 0.99
+        :return: seconds, 0 if there is no sample
+        """
+        if self._dirty >= self.RESORT_EVERY or (self._dirty and not self._sorted):
+            self._sorted = sorted(self._samples[:min(self._count, self.SIZE)])
+            self._dirty = 0
+        if not self._sorted:
+            return 0
+        return self._sorted[min(int(q * len(self._sorted)), len(self._sorted) - 1)]
+
+    @property
+    def p50(self):
+        return self.quantile(0.5)
+
+    @property
+    def p99(self):
+        return self.quantile(0.99)
+
+    def reset(self):
+        self._index = 0
+        self._count = 0
+        self._sorted = []
+        self._dirty = 0
+
+
+class LatencyHistogram(object):
+    """
+    Fixed bucket histogram of durations (seconds), cheap enough to be always on
+    """
+    __slots__ = ('counts', 'count', 'total', 'max')
+
+    # upper bound of every bucket, the last bucket has no upper bound
+    BOUNDS = (0.00005, 0.0001, 0.0002, 0.0005, 0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1, 2, 5)
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        self.counts[bisect.bisect_left(self.BOUNDS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, q):
+        """
+        :return: upper bound (seconds) of the bucket holding the quantile, max for the last bucket
+        """
+        target = q * self.count
+        cnt = 0
+        for i, n in enumerate(self.counts):
+            cnt += n
+            if n and cnt >= target:
+                return min(self.BOUNDS[i], self.max) if i < len(self.BOUNDS) else self.max
+        return 0
+
+    def to_dict(self):
+        """
+        durations in ms
+        """
+        buckets = {}
+        for i, n in enumerate(self.counts):
+            if n:
+                buckets['<={}'.format(self.BOUNDS[i] * 1000) if i < len(self.BOUNDS) else '>{}'.format(self.BOUNDS[-1] * 1000)] = n
+        return {
+            'count': self.count,
+            'mean': self.total / self.count * 1000 if self.count else 0,
+            'max': self.max * 1000,
+            'p50': self.quantile(0.5) * 1000,
+            'p99': self.quantile(0.99) * 1000,
+            'buckets': buckets,
+        }
+
+
+class IntervalWindow(LatencyModel):
+    """
+    Latest intervals of a periodic stream, 1024 samples is 10s of the rich report
+    """
+    __slots__ = ()
+
+    SIZE = 1024
+    MIN_SAMPLES = 1
+    RESORT_EVERY = 64
+
+
+class IntervalStats(object):
+    """
+    Intervals between the times of one clock: histogram since the reset, quantiles of the latest intervals
+    """
+    __slots__ = ('hist', 'window', 'threshold', 'over', 'prev')
+
+    def __init__(self, threshold):
+        self.hist = LatencyHistogram()
+        self.window = IntervalWindow()
+        # intervals over the threshold (seconds) are counted
+        self.threshold = threshold
+        self.over = 0
+        self.prev = None
+
+    def add(self, t):
+        prev, self.prev = self.prev, t
+        if prev is None or t < prev:
+            # the first time, or the clock of the controller restarted
+            return
+        interval = t - prev
+        self.hist.add(interval)
+        self.window.add(interval)
+        if interval > self.threshold:
+            self.over += 1
+
+    def to_dict(self, quantiles=(0.5, 0.9, 0.99, 0.999)):
+        """
+        durations in ms, count/mean/max/buckets/over since the reset, the quantiles of the latest intervals
+        """
+        ret = self.hist.to_dict()
+        for q in quantiles:
+            ret['p{}'.format(str(q * 100).rstrip('0').rstrip('.').replace('.', ''))] = self.window.quantile(q) * 1000
+        ret['over'] = self.over
+        ret['threshold'] = self.threshold * 1000
+        return ret
+
+
+class ReportTiming(object):
+    """
+    Frame intervals of a report socket by three clocks:
+        controller: the timestamp of the controller in the frame (rich report of the new firmware only)
+        received: the host time when the frame was received, irregular with a regular controller is the network
+        handled: the host time when the frame was taken by the sdk, irregular with a regular received is the host
+    """
+    CONTROLLER_OVER = 0.205  # seconds
+    HOST_OVER = 0.3  # seconds
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.controller = IntervalStats(self.CONTROLLER_OVER)
+        self.received = IntervalStats(self.HOST_OVER)
+        self.handled = IntervalStats(self.HOST_OVER)
+        self.since = time.monotonic()
+
+    def add(self, recv_time, controller_time=None):
+        self.received.add(recv_time)
+        if controller_time is not None:
+            self.controller.add(controller_time)
+
+    def to_dict(self, quantiles=(0.5, 0.9, 0.99, 0.999)):
+        return {
+            'duration': time.monotonic() - self.since,
+            'controller': self.controller.to_dict(quantiles),
+            'received': self.received.to_dict(quantiles),
+            'handled': self.handled.to_dict(quantiles),
+        }
+
+
+class CommStats(object):
+    """
+    Counters and per funcode latency histograms of a UxbusCmd
+    lock_wait: waiting for the command lock (other threads' round trips)
+    send: numbering and writing the request
+    reply: from the request written to the reply received
+    """
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        # funcode => LatencyHistogram
+        self.lock_wait = {}
+        self.send = {}
+        self.reply = {}
+        self.timeouts = 0
+        # replies with an unexpected transaction number / replies nobody waits for any more
+        self.err_num = 0
+        self.stale = 0
+        self.retries = 0
+        self.since = time.monotonic()
+
+    @staticmethod
+    def add(table, funcode, seconds):
+        hist = table.get(funcode)
+        if hist is None:
+            hist = table[funcode] = LatencyHistogram()
+        hist.add(seconds)
+
+    def to_dict(self):
+        commands = {}
+        for key, table in (('lock_wait', self.lock_wait), ('send', self.send), ('reply', self.reply)):
+            for funcode, hist in list(table.items()):
+                commands.setdefault(FUNCODE_NAMES.get(funcode, funcode), {})[key] = hist.to_dict()
+        return {
+            'duration': time.monotonic() - self.since,
+            'timeouts': self.timeouts,
+            'err_num': self.err_num,
+            'stale': self.stale,
+            'retries': self.retries,
+            'commands': commands,
+        }
+
+
+# funcode => name of XCONF.UxbusReg
+FUNCODE_NAMES = {}
+for _name in dir(XCONF.UxbusReg):
+    if not _name.startswith('_'):
+        FUNCODE_NAMES.setdefault(getattr(XCONF.UxbusReg, _name), _name)
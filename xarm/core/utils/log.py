@@ -11,14 +11,20 @@ import functools
 import sys
 import os
 
+# created on first use, see enable_file_log
 log_path = os.path.join(os.path.expanduser('~'), '.UFACTORY', 'log', 'xarm', 'sdk')
-if not os.path.exists(log_path):
-    os.makedirs(log_path)
 
 logging.VERBOSE = 5
 logging.addLevelName(logging.VERBOSE, 'VERBOSE')
 
 
+class _SdkLogger(logging.Logger):
+    def setLevel(self, level):
+        super(_SdkLogger, self).setLevel(level)
+        # the manager only clears the level cache (see isEnabledFor) of the registered loggers
+        getattr(self, '_cache', {}).clear()
+
+
 class Logger(logging.Logger):
     logger_fmt = '{}[%(levelname)s][%(asctime)s][%(filename)s:%(lineno)d] - - %(message)s'
     logger_date_fmt = '%Y-%m-%d %H:%M:%S'
@@ -28,7 +34,8 @@ class Logger(logging.Logger):
     stream_handler.setLevel(logging.VERBOSE)
     stream_handler.setFormatter(logging.Formatter(stream_handler_fmt, stream_handler_date_fmt))
 
-    logger = logging.Logger(__name__)
+    # not registered in the manager, so logging.config (eg: disable_existing_loggers) never disables it
+    logger = _SdkLogger(__name__)
     logger.setLevel(logging.VERBOSE)
     logger.addHandler(stream_handler)
 
@@ -69,6 +76,80 @@ logger.verbose = functools.partial(logger.log, logger.VERBOSE)
 # logger.error = functools.partial(log, level=logger.ERROR)
 # logger.critical = functools.partial(log, level=logger.CRITICAL)
 
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One json object per line, eg: {"time": 1690000000.123, "level": "INFO", "file": "xarm.py", "line": 147, "msg": "..."}
+    """
+    def format(self, record):
+        item = {
+            'time': record.created,
+            'level': record.levelname,
+            'file': record.filename,
+            'line': record.lineno,
+            'thread': record.threadName,
+            'msg': record.getMessage(),
+        }
+        if record.exc_info:
+            item['exc'] = self.formatException(record.exc_info)
+        import json
+        return json.dumps(item, ensure_ascii=False)
+
+
+_file_log_listener = None
+_file_log_handler = None
+_file_log_levels = None
+
+
+def enable_file_log(filename=None, level=logging.INFO, structured=True, max_bytes=10 * 1024 * 1024, backup_count=5):
+    """
+    Write the log of the sdk to a rotating file as well, the calling thread only puts the record into a queue,
+    the file is written by a background thread
+    :param filename: default is ~/.UFACTORY/log/xarm/sdk/xarm_sdk.log
+    :param level: level of the file log, the level of the logger is lowered to it if needed
+    :param structured: one json object per line if True, else the same format as the stream log
+    :return: filename
+    """
+    import queue
+    import logging.handlers
+    global _file_log_listener, _file_log_handler, _file_log_levels
+    disable_file_log()
+    if filename is None:
+        if not os.path.exists(log_path):
+            os.makedirs(log_path)
+        filename = os.path.join(log_path, 'xarm_sdk.log')
+    file_handler = logging.handlers.RotatingFileHandler(filename, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8')
+    file_handler.setLevel(level)
+    file_handler.setFormatter(JsonFormatter() if structured else logging.Formatter(Logger.logger_fmt.format(''), Logger.logger_date_fmt))
+    que = queue.Queue(-1)
+    _file_log_handler = logging.handlers.QueueHandler(que)
+    _file_log_handler.setLevel(level)
+    _file_log_listener = logging.handlers.QueueListener(que, file_handler, respect_handler_level=True)
+    _file_log_listener.start()
+    logger.addHandler(_file_log_handler)
+    _file_log_levels = (logger.level, Logger.stream_handler.level)
+    if logger.level > level:
+        logger.setLevel(level)
+        # the stream log keeps showing the warnings only
+        Logger.stream_handler.setLevel(max(Logger.stream_handler.level, logging.WARNING))
+    return filename
+
+
+def disable_file_log():
+    global _file_log_listener, _file_log_handler, _file_log_levels
+    if _file_log_handler is not None:
+        logger.removeHandler(_file_log_handler)
+        _file_log_handler = None
+    if _file_log_listener is not None:
+        _file_log_listener.stop()
+        _file_log_listener = None
+    if _file_log_levels is not None:
+        logger.setLevel(_file_log_levels[0])
+        Logger.stream_handler.setLevel(_file_log_levels[1])
+        _file_log_levels = None
+
+
 colors = {
     'none': '{}',
     'white': '\033[30m{}\033[0m',
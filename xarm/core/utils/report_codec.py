@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+# Software License Agreement (MIT License)
+#
+# Copyright (c) 2018, UFACTORY, Inc.
+# All rights reserved.
+#
+# Author: Vinman <vinman.wen@ufactory.cc>
+
+import struct
+
+
+class ReportLayout(object):
+    """
+    Precompiled layout of one report variant
+    The hot fields (read for every frame) are decoded in one unpack_from, see ReportFrame,
+    every other field has its own precompiled struct.Struct and is decoded on access only.
+    The sections are in the order of the frame, a frame of n bytes holds the sections which end within n bytes.
+    """
+    def __init__(self, name, sections, hot):
+        """
+        :param sections: ((field, format, end offset in the frame), ...)
+            field: None for the skipped bytes
+            format: struct format of the section, little endian, '>' for the big endian integers
+        :param hot: names of the hot fields, they must be within the shortest frame of the variant
+        """
+        self.name = name
+        # field => (offset, struct.Struct, one item or not)
+        self._fields = {}
+        # (field, index, count) of the hot fields in the values of the hot struct
+        self._hot_fields = []
+        # [(index, size)] of the big endian integers of the hot struct
+        self._hot_swaps = []
+        hot_end = max(end for field, _, end in sections if field in hot)
+        hot_formats = []
+        offset = index = 0
+        for field, fmt, end in sections:
+            big_endian = fmt.startswith('>')
+            fmt = fmt.lstrip('>')
+            st = struct.Struct(('>' if big_endian else '<') + fmt)
+            assert offset + st.size == end, 'report layout {}, {} ends at {}'.format(name, field, offset + st.size)
+            count = len(st.unpack_from(bytes(st.size)))
+            if field:
+                assert field not in ReportFrame.RESERVED, 'report layout {}, {} is reserved'.format(name, field)
+                self._fields[field] = (offset, st, count == 1)
+            if end <= hot_end:
+                if field in hot:
+                    hot_formats.append(fmt)
+                    self._hot_fields.append((field, index, count))
+                    if big_endian:
+                        self._hot_swaps.extend((i, st.size // count) for i in range(index, index + count))
+                    index += count
+                else:
+                    hot_formats.append('{}x'.format(st.size))
+            offset = end
+        self._hot = struct.Struct('<' + ''.join(hot_formats))
+        # bytes of the full frame
+        self.frame_size = offset
+
+    def decode_hot(self, data):
+        """
+        :return: {field: value} of the hot fields
+        """
+        values = self._hot.unpack_from(data)
+        if self._hot_swaps:
+            values = list(values)
+            for i, size in self._hot_swaps:
+                v = values[i]
+                values[i] = (v >> 8 | (v & 0xFF) << 8) if size == 2 else int.from_bytes(v.to_bytes(size, 'little'), 'big')
+        return {field: values[i] if count == 1 else list(values[i:i + count]) for field, i, count in self._hot_fields}
+
+    def decode_field(self, data, field):
+        """
+        :return: value of the field, a list if it has more items, None if the frame is too short for it
+        """
+        try:
+            offset, st, one = self._fields[field]
+        except KeyError:
+            raise AttributeError('report layout {} has no field {}'.format(self.name, field))
+        if offset + st.size > len(data):
+            return None
+        values = st.unpack_from(data, offset)
+        return values[0] if one else list(values)
+
+
+class ReportFrame(object):
+    """
+    Report frame decoded on access, the hot fields of the layout are decoded at once,
+    the others on first access and then cached in the frame
+    Ex:
+        frame = ReportFrame(RICH, data)
+        frame.state_mode, frame.angles  # decoded in the constructor
+        frame.torque  # decoded now, None if the frame is too short for it
+    The data is not copied, a view of a slot of the port stays valid until release(),
+    retain() copies it for a frame kept beyond that.
+    """
+    RESERVED = ('layout', 'data', 'size', 'released')
+
+    def __init__(self, layout, data):
+        self.layout = layout
+        self.data = data
+        self.size = len(data)
+        self.released = False
+        self.__dict__.update(layout.decode_hot(data))
+
+    def __getattr__(self, field):
+        # only called for the fields not decoded yet
+        data = self.data
+        value = self.layout.decode_field(data, field)
+        if self.released and not isinstance(data, bytes):
+            # the slot may have been reused while decoding, the value is not kept
+            return None
+        self.__dict__[field] = value
+        return value
+
+    def release(self):
+        """
+        The frame is replaced, its slot may be reused by the next frames
+        """
+        self.released = True
+
+    def retain(self):
+        """
+        Copy the data out of the slot, before release()
+        """
+        if not isinstance(self.data, bytes):
+            self.data = bytes(self.data)
+        return self
+
+
+class ReportAttribute(object):
+    """
+    Attribute of the owner which is decoded from its latest report frame (owner._report_frame) on first access.
+    A value set explicitly is kept until the next frame,
+    the last value is kept while the frames have no such field.
+    Ex:
+        class Base(object):
+            _joints_torque = ReportAttribute('_joints_torque', 'torque')
+    """
+    __slots__ = ('name', 'field', 'index', 'decode')
+
+    def __init__(self, name, field=None, index=None, decode=None):
+        """
+        :param name: name of the attribute, the value is kept in the instance dict by it
+        :param field: field of the frame
+        :param index: index or slice of the value of the field
+        :param decode: decode(owner, frame) => value or None, instead of the field
+        """
+        self.name = name
+        self.field = field
+        self.index = index
+        self.decode = decode
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+        while True:
+            frame = obj.__dict__.get('_report_frame')
+            entry = obj.__dict__.get(self.name)
+            if entry is not None and entry[0] is frame:
+                return entry[1]
+            value = None
+            if frame is not None:
+                if self.decode is not None:
+                    value = self.decode(obj, frame)
+                else:
+                    value = getattr(frame, self.field, None)
+                    if value is not None and self.index is not None:
+                        value = value[self.index]
+            # a frame replaced meanwhile, decode the next one
+            if frame is None or not frame.released:
+                break
+        if value is None:
+            if entry is None:
+                raise AttributeError(self.name)
+            value = entry[1]
+        obj.__dict__[self.name] = (frame, value)
+        return value
+
+    def __set__(self, obj, value):
+        obj.__dict__[self.name] = (obj.__dict__.get('_report_frame'), value)
+
+
+# field, format, end offset, see ReportLayout
+_NORMAL_OLD = (
+    ('length', '>I', 4),
+    ('state', 'B', 5),
+    ('mtbrake', 'B', 6),
+    ('mtable', 'B', 7),
+    ('error_code', 'B', 8),
+    ('warn_code', 'B', 9),
+    ('angles', '7f', 37),
+    ('pose', '6f', 61),
+    ('cmd_num', '>H', 63),
+    ('pose_offset', '6f', 87),
+)
+
+_RICH_OLD = _NORMAL_OLD + (
+    ('arm_ids', '6B', 93),  # type, axis, master id, slave id, motor tid, motor fid
+    (None, '30x', 123),  # version
+    ('trs', '5f', 143),  # tcp jerk, min acc, max acc, min speed, max speed
+    ('p2p', '5f', 163),  # joint jerk, min acc, max acc, min speed, max speed
+    ('rot', '2f', 171),  # rot jerk, max rot acc
+    (None, '16x', 187),
+)
+
+_REAL = (
+    ('length', '>I', 4),
+    ('state_mode', 'B', 5),
+    ('cmd_num', '>H', 7),
+    ('angles', '7f', 35),
+    ('pose', '6f', 59),
+    ('torque', '7f', 87),
+    ('ft_ext_force', '6f', 111),
+    ('ft_raw_force', '6f', 135),
+)
+
+_NORMAL = _REAL[:-2] + (
+    ('mtbrake', 'B', 88),
+    ('mtable', 'B', 89),
+    ('error_code', 'B', 90),
+    ('warn_code', 'B', 91),
+    ('pose_offset', '6f', 115),
+    ('tcp_load', '4f', 131),
+    ('collis_sens', 'B', 132),
+    ('teach_sens', 'B', 133),
+    ('gravity_direction', '3f', 145),
+)
+
+_RICH = _NORMAL + (
+    ('arm_ids', '6B', 151),
+    (None, '30x', 181),
+    ('trs', '5f', 201),
+    ('p2p', '5f', 221),
+    ('rot', '2f', 229),
+    ('servo_codes', '16B', 245),
+    ('temperatures', '7B', 252),
+    ('speeds', '8f', 284),
+    ('count', '>I', 288),
+    ('world_offset', '6f', 312),
+    ('reset_enable', '2B', 314),  # cgpio, tgpio
+    ('is_simulation', 'B', 315),
+    ('collision', '2B', 317),  # detection, tool type
+    ('collision_tool_params', '6f', 341),
+    ('voltages', '>7H', 355),
+    ('currents', '7f', 383),
+    ('cgpio_digitals', '2B', 385),
+    ('cgpio_analogs', '>8H', 401),  # the last 4 are scaled to volts, see x3.base._report_cgpio_states
+    ('cgpio_input_conf', '8B', 409),
+    ('cgpio_output_conf', '8B', 417),
+    ('cgpio_input_conf2', '8B', 425),  # control box 1300 only
+    ('cgpio_output_conf2', '8B', 433),
+    ('ft_ext_force', '6f', 457),
+    ('ft_raw_force', '6f', 481),
+    ('iden_progress', 'B', 482),
+    ('pose_aa', '3f', 494),
+)
+
+# hot fields, read for every frame
+_HOT_OLD = ('state', 'mtbrake', 'mtable', 'error_code', 'warn_code', 'angles', 'pose', 'cmd_num')
+_HOT_REAL = ('length', 'state_mode', 'cmd_num', 'angles', 'pose')
+_HOT = _HOT_REAL + ('mtbrake', 'mtable', 'error_code', 'warn_code', 'collis_sens', 'teach_sens')
+
+NORMAL_OLD = ReportLayout('normal_old', _NORMAL_OLD, _HOT_OLD)
+RICH_OLD = ReportLayout('rich_old', _RICH_OLD, _HOT_OLD)
+REAL = ReportLayout('real', _REAL, _HOT_REAL)
+NORMAL = ReportLayout('normal', _NORMAL, _HOT)
+RICH = ReportLayout('rich', _RICH, _HOT)
+
+# motor brake/enable byte => states of the 8 motors
+BITS = tuple(tuple(byte >> i & 0x01 for i in range(8)) for byte in range(256))
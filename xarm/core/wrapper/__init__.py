@@ -9,3 +9,11 @@
 
 from .uxbus_cmd_ser import UxbusCmdSer
 from .uxbus_cmd_tcp import UxbusCmdTcp
+
+
+def __getattr__(name):
+    # the asyncio view is imported on first use
+    if name == 'AsyncUxbusCmd':
+        from .uxbus_cmd_async import AsyncUxbusCmd
+        return AsyncUxbusCmd
+    raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
@@ -11,13 +11,21 @@ import time
 import threading
 import functools
 from ..utils import convert
+from ..utils.latency import CommStats
 from ..config.x_config import XCONF
 
 
 def lock_require(func):
     @functools.wraps(func)
     def decorator(*args, **kwargs):
-        with args[0].lock:
+        cmd = args[0]
+        if cmd.pipelined or getattr(cmd._local, 'priority', False):
+            # replies are matched by transaction number, no need to serialize the round trip
+            return func(*args, **kwargs)
+        start = time.monotonic()
+        with cmd.lock:
+            # recorded against the funcode of the next reply, see _record_reply
+            cmd._local.lock_wait = time.monotonic() - start
             return func(*args, **kwargs)
     return decorator
 
@@ -34,7 +42,10 @@ class UxbusCmd(object):
         self._warn_code = 0
         self._cmd_num = 0
         self._debug = False
+        self._pipelined = False
         self.lock = threading.Lock()
+        self._local = threading.local()
+        self.stats = CommStats()
         self._GET_TIMEOUT = XCONF.UxbusConf.GET_TIMEOUT / 1000
         self._SET_TIMEOUT = XCONF.UxbusConf.SET_TIMEOUT / 1000
         self._last_comm_time = time.monotonic()
@@ -44,10 +55,42 @@ class UxbusCmd(object):
     def last_comm_time(self):
         return self._last_comm_time
 
+    @property
+    def busy(self):
+        """
+        A command is waiting for its reply
+        """
+        return self.lock.locked()
+
     @property
     def state_is_ready(self):
         return self._state_is_ready
 
+    @property
+    def pipelined(self):
+        return self._pipelined
+
+    def set_pipelined(self, on_off):
+        return -1
+
+    def priority_call(self, name, *args, **kwargs):
+        """
+        Run the command without waiting for the round trip of other threads (emergency stop, pause),
+        only the transports which match the replies by transaction number can do it, others take the lock as usual
+        :param name: name of the command, or a function which calls the commands of this instance
+        Ex: arm_cmd.priority_call('set_state', 4)
+        """
+        return (getattr(self, name) if isinstance(name, str) else name)(*args, **kwargs)
+
+    def submit_many(self, commands, timeout=None):
+        """
+        Run the commands one by one, the transports which support it send them in one write
+        :param commands: [(method_name, arg1, arg2, ...), ...], eg: [('move_line', pose, 100, 2000, 0), ...]
+        :param timeout: not used here
+        :return: [code, ...]
+        """
+        return [getattr(self, command[0])(*command[1:])[0] for command in commands]
+
     def set_timeout(self, timeout):
         try:
             if isinstance(timeout, (tuple, list)):
@@ -67,6 +110,17 @@ class UxbusCmd(object):
     def set_debug(self, debug):
         self._debug = debug
 
+    def _record_reply(self, funcode, elapsed, code):
+        stats = self.stats
+        lock_wait = getattr(self._local, 'lock_wait', None)
+        if lock_wait is not None:
+            self._local.lock_wait = None
+            stats.add(stats.lock_wait, funcode, lock_wait)
+        if code == XCONF.UxbusState.ERR_TOUT:
+            stats.timeouts += 1
+        else:
+            stats.add(stats.reply, funcode, elapsed)
+
     def check_xbus_prot(self, data, funcode):
         raise NotImplementedError
 
@@ -76,6 +130,12 @@ class UxbusCmd(object):
     def send_xbus(self, funcode, txdata, num):
         raise NotImplementedError
 
+    def _encode(self, fmt, datas, num):
+        """
+        Payload of a request, packed by the precompiled struct of the layout, see convert.get_struct
+        """
+        return convert.get_struct(fmt, num).pack(*datas[:num])
+
     @lock_require
     def set_nu8(self, funcode, datas, num, timeout=None):
         ret = self.send_xbus(funcode, datas, num)
@@ -119,7 +179,7 @@ class UxbusCmd(object):
 
     @lock_require
     def set_nfp32(self, funcode, datas, num):
-        hexdata = convert.fp32s_to_bytes(datas, num)
+        hexdata = self._encode('<f', datas, num)
         ret = self.send_xbus(funcode, hexdata, num * 4)
         if ret != 0:
             return [XCONF.UxbusState.ERR_NOTTCP]
@@ -127,7 +187,7 @@ class UxbusCmd(object):
 
     @lock_require
     def set_nfp32_with_bytes(self, funcode, datas, num, additional_bytes, rx_len=0, timeout=None):
-        hexdata = convert.fp32s_to_bytes(datas, num)
+        hexdata = self._encode('<f', datas, num)
         hexdata += additional_bytes
         ret = self.send_xbus(funcode, hexdata, num * 4 + len(additional_bytes))
         if ret != 0:
@@ -136,7 +196,7 @@ class UxbusCmd(object):
 
     @lock_require
     def set_nint32(self, funcode, datas, num):
-        hexdata = convert.int32s_to_bytes(datas, num)
+        hexdata = self._encode('<i', datas, num)
         ret = self.send_xbus(funcode, hexdata, num * 4)
         if ret != 0:
             return [XCONF.UxbusState.ERR_NOTTCP]
@@ -166,7 +226,7 @@ class UxbusCmd(object):
 
     @lock_require
     def swop_nfp32(self, funcode, datas, txn, rxn):
-        hexdata = convert.fp32s_to_bytes(datas, txn)
+        hexdata = self._encode('<f', datas, txn)
         ret = self.send_xbus(funcode, hexdata, txn * 4)
         if ret != 0:
             return [XCONF.UxbusState.ERR_NOTTCP] * (rxn + 1)
@@ -178,7 +238,7 @@ class UxbusCmd(object):
 
     @lock_require
     def is_nfp32(self, funcode, datas, txn):
-        hexdata = convert.fp32s_to_bytes(datas, txn)
+        hexdata = self._encode('<f', datas, txn)
         ret = self.send_xbus(funcode, hexdata, txn * 4)
         if ret != 0:
             return [XCONF.UxbusState.ERR_NOTTCP] * 2
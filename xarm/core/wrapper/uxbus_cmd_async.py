@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+# Software License Agreement (MIT License)
+#
+# Copyright (c) 2018, UFACTORY, Inc.
+# All rights reserved.
+#
+# Author: Vinman <vinman.wen@ufactory.cc>
+
+import time
+import asyncio
+from .uxbus_cmd import UxbusCmd
+from ..config.x_config import XCONF
+from ..utils import convert
+
+# commands of UxbusCmd which are one transaction: the body builds the request and returns the call of a primitive,
+# they run as is on AsyncUxbusCmd where the primitives are coroutines (checked by tests/test_async_cmd.py)
+COMMANDS = frozenset((
+    'get_version', 'get_robot_sn', 'check_verification', 'shutdown_system', 'set_record_traj',
+    'playback_traj', 'playback_traj_old', 'get_traj_rw_status', 'set_reduced_mode', 'set_reduced_linespeed',
+    'set_reduced_jointspeed', 'get_reduced_mode', 'set_xyz_limits', 'set_timer', 'cancel_timer',
+    'set_world_offset', 'cnter_reset', 'cnter_plus', 'set_reduced_jrange', 'set_fense_on', 'set_collis_reb',
+    'motion_en', 'set_state', 'get_state', 'get_cmdnum', 'get_err_code', 'get_hd_types', 'reload_dynamics',
+    'clean_err', 'clean_war', 'set_brake', 'set_mode', 'set_report_tau_or_i', 'get_report_tau_or_i',
+    'set_cartesian_velo_continuous', 'set_allow_approx_motion', 'move_line', 'move_line_common',
+    'move_line_aa', 'move_servo_cart_aa', 'move_relative', 'get_position_aa', 'move_line_tool', 'move_lineb',
+    'move_joint', 'move_jointb', 'move_gohome', 'move_servoj', 'move_servo_cartesian', 'set_servot',
+    'get_joint_tau', 'set_safe_level', 'get_safe_level', 'sleep_instruction', 'move_circle',
+    'move_circle_common', 'set_tcp_jerk', 'set_tcp_maxacc', 'set_joint_jerk', 'set_joint_maxacc',
+    'set_tcp_offset', 'set_tcp_load', 'set_collis_sens', 'set_teach_sens', 'set_gravity_dir', 'clean_conf',
+    'save_conf', 'get_joint_pos', 'get_joint_states', 'get_tcp_pose', 'get_ik', 'get_fk', 'is_joint_limit',
+    'is_tcp_limit', 'set_modbus_timeout', 'config_io_stop_reset', 'cgpio_set_auxdigit', 'cgpio_set_analog1',
+    'cgpio_set_analog2', 'cgpio_set_infun', 'cgpio_set_outfun', 'set_self_collision_detection',
+    'set_collision_tool_model', 'set_simulation_robot', 'get_power_board_version', 'vc_set_jointv',
+    'vc_set_linev', 'iden_load', 'iden_joint_friction', 'ft_sensor_set_zero', 'ft_sensor_iden_load',
+    'ft_sensor_cali_load', 'ft_sensor_enable', 'ft_sensor_app_set', 'ft_sensor_app_get', 'ft_sensor_get_data',
+    'cali_tcp_pose', 'cali_tcp_orient', 'cali_user_pos', 'get_max_joint_velocity', 'iden_tcp_load',
+))
+
+
+class AsyncUxbusCmd(object):
+    """
+    Awaitable view of a UxbusCmdTcp, every request is one transaction awaited on the event loop, eg:
+        code, state = await AsyncUxbusCmd(arm_cmd).get_state()
+    Awaitable: the primitives below, the commands in COMMANDS, the tgpio_addr_xxx, tgpio_set_modbus,
+    set_modbus_baudrate, save_traj and load_traj, the other commands (several transactions) are not available here,
+    the blocking methods stay on the UxbusCmdTcp (.cmd), eg: cmd.set_prot_flag(3)
+    The transactions are pipelined with the ones of the synchronous callers (if any),
+    the transport can be a SocketPort or an AsyncSocketPort.
+    """
+    # the replies are matched by the bus_flag, the command lock is never taken on the loop
+    pipelined = True
+
+    def __init__(self, cmd):
+        self.cmd = cmd
+
+    def __getattr__(self, name):
+        if name in COMMANDS:
+            # the command of UxbusCmd bound to this instance, it returns the coroutine of a primitive
+            func = self.__dict__[name] = getattr(UxbusCmd, name).__get__(self, AsyncUxbusCmd)
+            return func
+        attr = getattr(self.cmd, name)
+        if not name.startswith('_') and callable(attr):
+            raise AttributeError('{} is not awaitable, call it on the blocking instance (.cmd)'.format(name))
+        return attr
+
+    async def _transact(self, funcode, datas, num, rx_len, timeout):
+        """
+        Send one request and wait for its reply without blocking the loop
+        :return: the reply parsed as send_pend does, None if the request was not written
+        """
+        cmd = self.cmd
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        trans = cmd._submit(funcode, cmd._pack(funcode, datas, num), callback=self._resolver(loop, future))
+        if trans is None:
+            return None
+        try:
+            data = await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            data = -1
+        finally:
+            if trans.data is None:
+                cmd._cancel(trans)
+        ret = cmd._parse_reply(data, funcode, rx_len, trans.bus_flag)
+        cmd._record_reply(funcode, time.monotonic() - trans.time, ret[0])
+        if data != -1:
+            cmd._frames.put(trans.request)
+        return ret
+
+    @staticmethod
+    def _resolver(loop, future):
+        def _set_result(data):
+            if not future.done():
+                future.set_result(data)
+
+        def callback(data):
+            # called from the receive thread or from the loop itself
+            loop.call_soon_threadsafe(_set_result, data)
+        return callback
+
+    # the primitives of UxbusCmd, same requests and results
+    async def set_nu8(self, funcode, datas, num, timeout=None):
+        ret = await self._transact(funcode, datas, num, 0, self.cmd._SET_TIMEOUT if timeout is None else timeout)
+        return [XCONF.UxbusState.ERR_NOTTCP] if ret is None else ret
+
+    async def getset_nu8(self, funcode, datas, num_send, num_get):
+        ret = await self._transact(funcode, datas, num_send, num_get, self.cmd._SET_TIMEOUT)
+        return [XCONF.UxbusState.ERR_NOTTCP] if ret is None else ret
+
+    async def get_nu8(self, funcode, num):
+        ret = await self._transact(funcode, 0, 0, num, self.cmd._GET_TIMEOUT)
+        return [XCONF.UxbusState.ERR_NOTTCP] * (num + 1) if ret is None else ret
+
+    async def set_nu16(self, funcode, datas, num):
+        ret = await self._transact(funcode, convert.u16s_to_bytes(datas, num), num * 2, 0, self.cmd._SET_TIMEOUT)
+        return [XCONF.UxbusState.ERR_NOTTCP] if ret is None else ret
+
+    async def get_nu16(self, funcode, num):
+        ret = await self._transact(funcode, 0, 0, num * 2, self.cmd._GET_TIMEOUT)
+        if ret is None:
+            return [XCONF.UxbusState.ERR_NOTTCP] * (num * 2 + 1)
+        data = [0] * (1 + num)
+        data[0] = ret[0]
+        data[1:num] = convert.bytes_to_u16s(ret[1:num * 2 + 1], num)
+        return data
+
+    async def set_nfp32(self, funcode, datas, num):
+        ret = await self._transact(funcode, self.cmd._encode('<f', datas, num), num * 4, 0, self.cmd._SET_TIMEOUT)
+        return [XCONF.UxbusState.ERR_NOTTCP] if ret is None else ret
+
+    async def set_nfp32_with_bytes(self, funcode, datas, num, additional_bytes, rx_len=0, timeout=None):
+        hexdata = self.cmd._encode('<f', datas, num)
+        hexdata += additional_bytes
+        ret = await self._transact(funcode, hexdata, num * 4 + len(additional_bytes), rx_len,
+                                   self.cmd._SET_TIMEOUT if timeout is None else timeout)
+        return [XCONF.UxbusState.ERR_NOTTCP] if ret is None else ret
+
+    async def set_nint32(self, funcode, datas, num):
+        ret = await self._transact(funcode, self.cmd._encode('<i', datas, num), num * 4, 0, self.cmd._SET_TIMEOUT)
+        return [XCONF.UxbusState.ERR_NOTTCP] if ret is None else ret
+
+    async def get_nfp32(self, funcode, num, timeout=None):
+        ret = await self._transact(funcode, 0, 0, num * 4, timeout if timeout is not None else self.cmd._GET_TIMEOUT)
+        if ret is None:
+            return [XCONF.UxbusState.ERR_NOTTCP] * (num * 4 + 1)
+        return self._fp32s(ret, num)
+
+    async def get_nfp32_with_datas(self, funcode, datas, num_send, num_get, timeout=None):
+        ret = await self._transact(funcode, datas, num_send, num_get * 4,
+                                   timeout if timeout is not None else self.cmd._GET_TIMEOUT)
+        if ret is None:
+            return [XCONF.UxbusState.ERR_NOTTCP]
+        return self._fp32s(ret, num_get)
+
+    async def swop_nfp32(self, funcode, datas, txn, rxn):
+        ret = await self._transact(funcode, self.cmd._encode('<f', datas, txn), txn * 4, rxn * 4, self.cmd._GET_TIMEOUT)
+        if ret is None:
+            return [XCONF.UxbusState.ERR_NOTTCP] * (rxn + 1)
+        return self._fp32s(ret, rxn)
+
+    async def is_nfp32(self, funcode, datas, txn):
+        ret = await self._transact(funcode, self.cmd._encode('<f', datas, txn), txn * 4, 1, self.cmd._GET_TIMEOUT)
+        return [XCONF.UxbusState.ERR_NOTTCP] * 2 if ret is None else ret
+
+    @staticmethod
+    def _fp32s(ret, num):
+        data = [0] * (1 + num)
+        data[0] = ret[0]
+        data[1:num + 1] = convert.bytes_to_fp32s(ret[1:num * 4 + 1], num)
+        return data
+
+    # the commands below are not one call of a primitive in UxbusCmd, or they sleep, written here again
+    async def tgpio_addr_w16(self, addr, value, bid=XCONF.TGPIO_HOST_ID):
+        return await self._tgpio_write(XCONF.UxbusReg.TGPIO_W16B, addr, value, bid)
+
+    async def tgpio_addr_r16(self, addr, bid=XCONF.TGPIO_HOST_ID, fmt='>l'):
+        return await self._tgpio_read(XCONF.UxbusReg.TGPIO_R16B, addr, bid, fmt)
+
+    async def tgpio_addr_w32(self, addr, value, bid=XCONF.TGPIO_HOST_ID):
+        return await self._tgpio_write(XCONF.UxbusReg.TGPIO_W32B, addr, value, bid)
+
+    async def tgpio_addr_r32(self, addr, bid=XCONF.TGPIO_HOST_ID, fmt='>l'):
+        return await self._tgpio_read(XCONF.UxbusReg.TGPIO_R32B, addr, bid, fmt)
+
+    async def _tgpio_write(self, funcode, addr, value, bid):
+        txdata = bytes([bid]) + convert.u16_to_bytes(addr) + convert.fp32_to_bytes(value)
+        ret = await self._transact(funcode, txdata, 7, 0, self.cmd._GET_TIMEOUT)
+        return [XCONF.UxbusState.ERR_NOTTCP] * (7 + 1) if ret is None else ret
+
+    async def _tgpio_read(self, funcode, addr, bid, fmt):
+        txdata = bytes([bid]) + convert.u16_to_bytes(addr)
+        ret = await self._transact(funcode, txdata, 3, 4, self.cmd._GET_TIMEOUT)
+        if ret is None:
+            return [XCONF.UxbusState.ERR_NOTTCP] * (7 + 1)
+        return [ret[0], convert.bytes_to_num32(ret[1:5], fmt=fmt)]
+
+    async def tgpio_set_modbus(self, modbus_t, len_t, host_id=XCONF.TGPIO_HOST_ID, limit_sec=0.0, is_transparent_transmission=False):
+        if limit_sec > 0:
+            diff_time = time.monotonic() - self.cmd._last_modbus_comm_time
+            if diff_time < limit_sec:
+                await asyncio.sleep(limit_sec - diff_time)
+        funcode = XCONF.UxbusReg.TGPIO_COM_DATA if is_transparent_transmission else XCONF.UxbusReg.TGPIO_MODBUS
+        ret = await self._transact(funcode, bytes([host_id]) + bytes(modbus_t), len_t + 1, -1, self.cmd._GET_TIMEOUT)
+        self.cmd._last_modbus_comm_time = time.monotonic()
+        return [XCONF.UxbusState.ERR_NOTTCP] * (7 + 1) if ret is None else ret
+
+    async def set_modbus_baudrate(self, baudrate):
+        if baudrate not in self.cmd.BAUDRATES:
+            return [-1, -1]
+        ret = await self.tgpio_addr_r16(XCONF.ServoConf.MODBUS_BAUDRATE & 0x0FFF)
+        if ret[0] == 0:
+            baud_val = self.cmd.BAUDRATES.index(baudrate)
+            if ret[1] != baud_val:
+                await self.tgpio_addr_w16(0x1A0B, baud_val)
+                await asyncio.sleep(0.3)
+                return await self.tgpio_addr_w16(XCONF.ServoConf.SOFT_REBOOT, 1)
+        return ret[:2]
+
+    async def save_traj(self, filename, wait_time=2):
+        return await self._traj(XCONF.UxbusReg.SAVE_TRAJ, filename, wait_time)
+
+    async def load_traj(self, filename, wait_time=2):
+        return await self._traj(XCONF.UxbusReg.LOAD_TRAJ, filename, wait_time)
+
+    async def _traj(self, funcode, filename, wait_time):
+        txdata = [ord(i) for i in filename]
+        if len(txdata) > 80:
+            print("name length should not exceed 80 characters!")
+            return [XCONF.UxbusState.ERR_PARAM]
+        ret = await self.set_nu8(funcode, txdata + [0] * (81 - len(txdata)), 81)
+        await asyncio.sleep(wait_time)  # Must! or buffer would be flushed if set mode to pos_mode
+        return ret
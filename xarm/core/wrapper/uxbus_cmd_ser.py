@@ -61,7 +61,8 @@ class UxbusCmdSer(UxbusCmd):
 
     def send_pend(self, funcode, num, timeout):
         ret = [0] * 254 if num == -1 else [0] * (num + 1)
-        expired = time.monotonic() + timeout
+        start = time.monotonic()
+        expired = start + timeout
         ret[0] = XCONF.UxbusState.ERR_TOUT
         while time.monotonic() < expired:
             remaining = expired - time.monotonic()
@@ -71,21 +72,25 @@ class UxbusCmdSer(UxbusCmd):
                     debug_log_datas(rx_data, label='recv')
                 ret[0] = self.check_xbus_prot(rx_data)
                 num = rx_data[2] if num == -1 else num
-                length = len(rx_data) - 4
-                for i in range(num):
-                    if i >= length:
-                        break
-                    ret[i + 1] = rx_data[i + 4]
+                payload = rx_data[4:4 + num]
+                ret[1:len(payload) + 1] = payload
+                self._record_reply(funcode, time.monotonic() - start, ret[0])
                 return ret
             time.sleep(0.001)
+        self._record_reply(funcode, time.monotonic() - start, ret[0])
         return ret
 
     def send_xbus(self, reg, txdata, num):
-        send_data = bytes([self.fromid, self.toid, num + 1, reg])
-        for i in range(num):
-            send_data += bytes([txdata[i]])
+        send_data = bytearray([self.fromid, self.toid, num + 1, reg])
+        if num:
+            # the callers pass lists as well as bytes
+            send_data += bytes(txdata[:num])
         send_data += crc16.crc_modbus(send_data)
         self.arm_port.flush()
         if self._debug:
             debug_log_datas(send_data, label='send')
-        return self.arm_port.write(send_data)
+        start = time.monotonic()
+        ret = self.arm_port.write(send_data)
+        if ret == 0:
+            self.stats.add(self.stats.send, reg, time.monotonic() - start)
+        return ret
@@ -9,7 +9,12 @@
 
 
 import time
+import struct
+import threading
 from ..utils import convert
+from ..utils.log import logger
+from ..utils.latency import LatencyModel
+from ..utils.codec import FramePool, RequestFrame
 from .uxbus_cmd import UxbusCmd, lock_require
 from ..config.x_config import XCONF
 
@@ -18,6 +23,15 @@ TX2_PROT_CON = 2  # tcp cmd prot
 TX2_PROT_HEAT = 1  # tcp heat prot
 TX2_BUS_FLAG_MIN = 1  # cmd序号 起始值
 TX2_BUS_FLAG_MAX = 5000  # cmd序号 最大值
+TX2_HEADER = struct.Struct('>HHHB')  # bus_flag, prot_flag, length, funcode
+TX2_BUS_FLAG = struct.Struct('>H')
+TX2_HEARTBEAT = TX2_HEADER.pack(0, TX2_PROT_HEAT, 2, 0) + b'\x00'  # no reply
+# max transactions of a batch in flight at once, far below the wrap of the bus_flag
+TX2_BATCH_CHUNK = 1000
+
+# read only requests, asked again at once when the reply is clearly lost
+IDEMPOTENT_FUNCODES = frozenset(getattr(XCONF.UxbusReg, name) for name in dir(XCONF.UxbusReg)
+                                if not name.startswith('_') and ('GET' in name.split('_') or name.startswith('IS_')))
 
 
 def debug_log_datas(datas, label=''):
@@ -29,8 +43,77 @@ def debug_log_datas(datas, label=''):
     print()
 
 
+class UxbusTransaction(object):
+    """
+    One outstanding request, resolved by the receive thread as soon as its reply is framed
+    """
+    __slots__ = ('bus_flag', 'funcode', 'data', 'callback', 'request', 'time', '_event')
+
+    def __init__(self, bus_flag, funcode, callback=None, request=None, event=None):
+        self.bus_flag = bus_flag
+        self.funcode = funcode
+        self.data = None
+        # optional callable(data), used by the asyncio layer to resolve its future
+        self.callback = callback
+        self.request = request
+        self.time = time.monotonic()
+        # a retry shares the event of the first request, whichever reply comes first wakes the caller
+        self._event = threading.Event() if event is None else event
+
+    def set_result(self, data):
+        self.data = data
+        self._event.set()
+        if self.callback is not None:
+            self.callback(data)
+
+    def wait(self, timeout=None):
+        return self.data if self._event.wait(timeout) else -1
+
+
+class UxbusBatch(object):
+    """
+    Commands issued by the same thread inside the with block are queued instead of sent,
+    they are written with one sendall per TX2_BATCH_CHUNK commands when the block exits and their replies are collected together.
+    Ex:
+        with arm_cmd.batch() as batch:
+            for pose in poses:
+                arm_cmd.move_line(pose, 100, 2000, 0)
+        print(batch.codes)
+    Note:
+        The commands return at once with a placeholder result [0, ...], the raw results are filled in place
+        when the block exits, use batch.results/batch.codes instead of the return values.
+        A command whose request depends on the reply of another one must not be issued in the block.
+    """
+    def __init__(self, cmd, timeout=None):
+        self.cmd = cmd
+        self.timeout = timeout
+        # (UxbusTransaction, ret, funcode, num, timeout), the transactions are numbered when flushed
+        self.pending = []
+        self.results = []
+
+    @property
+    def codes(self):
+        return [ret[0] for ret in self.results]
+
+    def __enter__(self):
+        if getattr(self.cmd._local, 'batch', None) is not None:
+            raise RuntimeError('batch can not be nested')
+        self.cmd._local.batch = self
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.cmd._local.batch = None
+        if exc_type is not None:
+            # nothing has been sent yet, drop the whole batch
+            for _, ret, _, _, _ in self.pending:
+                ret[0] = XCONF.UxbusState.ERR_NOTTCP
+        else:
+            self.cmd._flush_batch(self)
+        return False
+
+
 class UxbusCmdTcp(UxbusCmd):
-    def __init__(self, arm_port):
+    def __init__(self, arm_port, pipelined=False):
         super(UxbusCmdTcp, self).__init__()
         self.arm_port = arm_port
         self.bus_flag = TX2_BUS_FLAG_MIN
@@ -38,6 +121,21 @@ class UxbusCmdTcp(UxbusCmd):
         self.TX2_PROT_CON = TX2_PROT_CON
         self._has_err_warn = False
         self._last_comm_time = time.monotonic()
+        self._send_lock = threading.Lock()
+        # bus_flag => UxbusTransaction
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+        # recycled request buffers, given back once the reply is received
+        self._frames = FramePool()
+        # replies are framed by arm_port.rx_parse and handed over to self._route
+        self.arm_port.rx_parse.handler = self._route
+        self._pipelined = bool(pipelined)
+        # funcode => LatencyModel
+        self._latency_models = {}
+        self._adaptive_timeout = False
+        self._adaptive_k = 3
+        self._adaptive_floor = 0.05
+        self._adaptive_retries = 2
 
     @property
     def has_err_warn(self):
@@ -58,18 +156,70 @@ class UxbusCmdTcp(UxbusCmd):
     def get_prot_flag(self):
         return self.prot_flag
 
-    def check_xbus_prot(self, data, funcode):
+    @property
+    def busy(self):
+        return bool(self._pending) or self.lock.locked()
+
+    def send_heartbeat(self, min_interval=1):
+        """
+        Write the heartbeat frame, skipped if anything was written within min_interval seconds
+        """
+        if time.monotonic() - self.arm_port.last_send_time < min_interval:
+            return 0
+        return self.arm_port.write(TX2_HEARTBEAT)
+
+    def set_pipelined(self, on_off):
+        """
+        Pipelined mode: several transactions can be in flight at once,
+        every reply is routed to its caller by the transaction number (bus_flag)
+        """
+        self._pipelined = bool(on_off)
+        return 0
+
+    def set_adaptive_timeout(self, on_off, k=3, floor=0.05, retries=2):
+        """
+        Adaptive timeout of the read only requests (get_xxx): when there is no reply after
+        max(floor, p99 * k) of the round trips measured for the funcode, the request is sent again,
+        at most retries times and never beyond the timeout of the command
+        """
+        self._adaptive_timeout = bool(on_off)
+        self._adaptive_k = k
+        self._adaptive_floor = floor
+        self._adaptive_retries = retries
+        return 0
+
+    def get_latency_model(self, funcode):
+        """
+        :return: LatencyModel of the funcode or None if it has never been sent
+        """
+        return self._latency_models.get(funcode)
+
+    def _route(self, data):
+        # called by the receive thread of arm_port with one complete reply
+        if len(data) < 8:
+            return
+        num = convert.bytes_to_u16(data[0:2])
+        with self._pending_lock:
+            trans = self._pending.pop(num, None)
+        if trans is not None:
+            trans.set_result(data)
+        else:
+            self.stats.stale += 1
+            logger.debug('[%s] discard reply, bus_flag=%s, funcode=%s', self.arm_port.port_type, num, data[6])
+
+    def check_xbus_prot(self, data, funcode, bus_flag=None):
         num = convert.bytes_to_u16(data[0:2])
         prot = convert.bytes_to_u16(data[2:4])
         length = convert.bytes_to_u16(data[4:6])
         fun = data[6]
         state = data[7]
 
-        bus_flag = self.bus_flag
-        if bus_flag == TX2_BUS_FLAG_MIN:
-            bus_flag = TX2_BUS_FLAG_MAX
-        else:
-            bus_flag -= 1
+        if bus_flag is None:
+            bus_flag = self.bus_flag
+            if bus_flag == TX2_BUS_FLAG_MIN:
+                bus_flag = TX2_BUS_FLAG_MAX
+            else:
+                bus_flag -= 1
         if num != bus_flag:
             return XCONF.UxbusState.ERR_NUM
         if prot != self.TX2_PROT_CON:
@@ -92,53 +242,206 @@ class UxbusCmdTcp(UxbusCmd):
         #     return XCONF.UxbusState.STATE_NOT_READY
         return 0
 
-    def send_pend(self, funcode, num, timeout):
+    def _unpack_reply(self, ret, rx_data, funcode, num, bus_flag):
+        """
+        :return: True if the reply is the one being waited for (ret is filled), otherwise False
+        """
+        self._last_comm_time = time.monotonic()
+        if self._debug:
+            debug_log_datas(rx_data, label='recv({})'.format(funcode))
+        code = self.check_xbus_prot(rx_data, funcode, bus_flag=bus_flag)
+        if code in [0, XCONF.UxbusState.ERR_CODE, XCONF.UxbusState.WAR_CODE, XCONF.UxbusState.STATE_NOT_READY]:
+            ret[0] = code
+            num = (convert.bytes_to_u16(rx_data[4:6]) - 2) if num == -1 else num
+            ret[:] = ret[:num + 1] if len(ret) <= num + 1 else [ret[0]] * (num + 1)
+            payload = rx_data[8:8 + num]
+            ret[1:len(payload) + 1] = payload
+            return True
+        elif code != XCONF.UxbusState.ERR_NUM:
+            ret[0] = code
+            return True
+        self.stats.err_num += 1
+        return False
+
+    def _parse_reply(self, rx_data, funcode, num, bus_flag):
         ret = [0] * 320 if num == -1 else [0] * (num + 1)
         ret[0] = XCONF.UxbusState.ERR_TOUT
-        expired = time.monotonic() + timeout
-        while time.monotonic() < expired:
-            remaining = expired - time.monotonic()
-            rx_data = self.arm_port.read(remaining)
-            if rx_data != -1 and len(rx_data) > 7:
-                self._last_comm_time = time.monotonic()
-                if self._debug:
-                    debug_log_datas(rx_data, label='recv({})'.format(funcode))
-                code = self.check_xbus_prot(rx_data, funcode)
-                if code in [0, XCONF.UxbusState.ERR_CODE, XCONF.UxbusState.WAR_CODE, XCONF.UxbusState.STATE_NOT_READY]:
-                    ret[0] = code
-                    num = (convert.bytes_to_u16(rx_data[4:6]) - 2) if num == -1 else num
-                    ret = ret[:num + 1] if len(ret) <= num + 1 else [ret[0]] * (num + 1)
-                    length = len(rx_data) - 8
-                    for i in range(num):
-                        if i >= length:
-                            break
-                        ret[i + 1] = rx_data[i + 8]
-                    return ret
-                elif code != XCONF.UxbusState.ERR_NUM:
-                    ret[0] = code
-                    return ret
-            else:
-                time.sleep(0.001)
-            # time.sleep(0.0005)
+        if rx_data != -1:
+            self._unpack_reply(ret, rx_data, funcode, num, bus_flag)
         return ret
 
-    def send_xbus(self, funcode, datas, num):
-        send_data = convert.u16_to_bytes(self.bus_flag)
-        send_data += convert.u16_to_bytes(self.prot_flag)
-        send_data += convert.u16_to_bytes(num + 1)
-        send_data += bytes([funcode])
-        if type(datas) == str:
-            send_data += datas.encode()
+    def _cancel(self, trans):
+        with self._pending_lock:
+            self._pending.pop(trans.bus_flag, None)
+
+    def send_pend(self, funcode, num, timeout):
+        trans = getattr(self._local, 'trans', None)
+        if trans is None:
+            return self._parse_reply(-1, funcode, num, None)
+        self._local.trans = None
+        request = trans.request
+        batch = getattr(self._local, 'batch', None)
+        if batch is not None:
+            ret = [0] * 320 if num == -1 else [0] * (num + 1)
+            batch.pending.append((trans, ret, funcode, num, timeout if batch.timeout is None else batch.timeout))
+            batch.results.append(ret)
+            return ret
+        trans = self._wait_reply(trans, timeout)
+        ret = self._parse_reply(trans.data if trans.data is not None else -1, funcode, num, trans.bus_flag)
+        self._record_reply(funcode, time.monotonic() - trans.time, ret[0])
+        if trans.data is not None:
+            # written for sure, the retries (if any) are copies
+            self._frames.put(request)
+        return ret
+
+    def _wait_reply(self, trans, timeout):
+        """
+        :return: the transaction which is answered (trans or one of its retries), or trans if it timed out
+        """
+        model = self._latency_models.get(trans.funcode)
+        if model is None:
+            model = self._latency_models[trans.funcode] = LatencyModel()
+        deadline = trans.time + timeout
+        retries, wait = 0, timeout
+        if self._adaptive_timeout and model.ready and trans.funcode in IDEMPOTENT_FUNCODES:
+            retries = self._adaptive_retries
+            wait = max(self._adaptive_floor, model.p99 * self._adaptive_k)
+        sent = [trans]
+        while True:
+            remaining = deadline - time.monotonic()
+            if trans._event.wait(max(0, min(wait, remaining) if retries > 0 else remaining)):
+                break
+            if retries <= 0 or remaining <= wait:
+                for item in sent:
+                    self._cancel(item)
+                return trans
+            retries -= 1
+            wait *= 2
+            # the reply is clearly lost, ask again, the bus_flag of the copy is filled in by _submit
+            self.stats.retries += 1
+            retry = self._submit(trans.funcode, bytearray(trans.request), event=trans._event)
+            if retry is None:
+                retries = 0
+            else:
+                sent.append(retry)
+        answered = trans
+        for item in sent:
+            if item.data is not None:
+                answered = item
+            else:
+                self._cancel(item)
+        if len(sent) == 1:
+            model.add(time.monotonic() - trans.time)
+        return answered
+
+    def _encode(self, fmt, datas, num):
+        # packed straight behind the header of a recycled frame, _pack fills in the header only
+        return self._frames.encode(TX2_HEADER.size, fmt, datas, num)
+
+    def _pack(self, funcode, datas, num):
+        """
+        The whole frame in one buffer, the bus_flag is filled in by _submit
+        """
+        if type(datas) is RequestFrame:
+            send_data = datas
         else:
-            for i in range(num):
-                send_data += bytes([datas[i]])
-        self.arm_port.flush()
+            if type(datas) == str:
+                datas = datas.encode()
+            else:
+                datas = datas[:num] if num else b''
+            send_data = self._frames.get(TX2_HEADER.size + len(datas))
+            send_data[TX2_HEADER.size:] = datas
+        TX2_HEADER.pack_into(send_data, 0, 0, self.prot_flag, num + 1, funcode)
+        return send_data
+
+    def _register(self, trans):
+        # number the request and register it, called with the send lock held
+        trans.bus_flag = self.bus_flag
+        TX2_BUS_FLAG.pack_into(trans.request, 0, trans.bus_flag)
+        with self._pending_lock:
+            self._pending[trans.bus_flag] = trans
         if self._debug:
-            debug_log_datas(send_data, label='send({})'.format(funcode))
-        ret = self.arm_port.write(send_data)
-        if ret != 0:
-            return -1
+            debug_log_datas(trans.request, label='send({})'.format(trans.funcode))
         self.bus_flag += 1
         if self.bus_flag > TX2_BUS_FLAG_MAX:
             self.bus_flag = TX2_BUS_FLAG_MIN
+
+    def _submit(self, funcode, send_data, callback=None, batch=None, event=None):
+        """
+        Number the packed request, register it and write it out
+        :param batch: UxbusBatch, the request is left to _flush_batch (not numbered yet)
+        :param event: threading.Event shared with an earlier transaction (retry)
+        :return: UxbusTransaction or None if the write failed
+        """
+        trans = UxbusTransaction(None, funcode, callback=callback, request=send_data, event=event)
+        if batch is not None:
+            return trans
+        start = time.monotonic()
+        with self._send_lock:
+            self._register(trans)
+            if self.arm_port.write(send_data) != 0:
+                self._cancel(trans)
+                return None
+            self.stats.add(self.stats.send, funcode, time.monotonic() - start)
+        return trans
+
+    def send_xbus(self, funcode, datas, num):
+        trans = self._submit(funcode, self._pack(funcode, datas, num), batch=getattr(self._local, 'batch', None))
+        if trans is None:
+            return -1
+        self._local.trans = trans
         return 0
+
+    def priority_call(self, name, *args, **kwargs):
+        # skip the command lock (the one held by a long round trip), the frame is written as soon as the socket is free
+        local = self._local
+        batch, local.batch = getattr(local, 'batch', None), None
+        local.priority = True
+        try:
+            return (getattr(self, name) if isinstance(name, str) else name)(*args, **kwargs)
+        finally:
+            local.priority = False
+            local.batch = batch
+
+    def batch(self, timeout=None):
+        """
+        Coalesce the commands issued in the with block into one write, see UxbusBatch
+        :param timeout: timeout of every reply counted from the write, default is the timeout of each command
+        """
+        return UxbusBatch(self, timeout=timeout)
+
+    def submit_many(self, commands, timeout=None):
+        """
+        Send the commands in one write and wait for all the replies
+        :param commands: [(method_name, arg1, arg2, ...), ...], eg: [('move_line', pose, 100, 2000, 0), ...]
+        :return: [code, ...], one code for every transaction
+        """
+        with self.batch(timeout=timeout) as batch:
+            for command in commands:
+                getattr(self, command[0])(*command[1:])
+        return batch.codes
+
+    def _flush_batch(self, batch):
+        # one chunk in flight at a time, the bus_flag of a pending transaction is never used twice
+        for index in range(0, len(batch.pending), TX2_BATCH_CHUNK):
+            chunk = batch.pending[index:index + TX2_BATCH_CHUNK]
+            with self._send_lock:
+                for trans, _, _, _, _ in chunk:
+                    self._register(trans)
+                    trans.time = time.monotonic()
+                code = self.arm_port.write(b''.join(item[0].request for item in chunk))
+            if code != 0:
+                for trans, ret, _, _, _ in batch.pending[index:]:
+                    self._cancel(trans)
+                    ret[0] = XCONF.UxbusState.ERR_NOTTCP
+                return
+            start = time.monotonic()
+            for trans, ret, funcode, num, timeout in chunk:
+                # the replies come back while waiting for the earlier ones, every timeout counts from the write
+                rx_data = trans.wait(max(0, start + timeout - time.monotonic()))
+                if rx_data == -1:
+                    self._cancel(trans)
+                else:
+                    self._frames.put(trans.request)
+                ret[:] = self._parse_reply(rx_data, funcode, num, trans.bus_flag)
+                self._record_reply(funcode, time.monotonic() - trans.time, ret[0])
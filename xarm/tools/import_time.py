@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# Software License Agreement (BSD License)
+#
+# Copyright (c) 2018, UFactory, Inc.
+# All rights reserved.
+#
+# Author: Vinman <vinman.wen@ufactory.cc> <vinman.cub@gmail.com>
+
+"""
+Import time budget of the sdk, measured with `python -X importtime` in a fresh interpreter
+Usage:
+    python -m xarm.tools.import_time [budget_ms] [module]
+Exit code is 1 if the import takes longer than the budget or a lazily imported module is loaded
+"""
+
+import sys
+import subprocess
+
+# cumulative import time (ms) of `import xarm`, with the bytecode cached
+IMPORT_BUDGET_MS = 60
+
+# loaded on first use only, never by `import xarm`
+LAZY_MODULES = (
+    'asyncio',
+    'multiprocessing.pool',
+    'urllib.request',
+    'logging.handlers',
+    'xarm.tools.blockly',
+    'xarm.core.config.x_code',
+    'xarm.wrapper.async_xarm_api',
+    'xarm.core.comm.async_socket_port',
+    'xarm.core.wrapper.uxbus_cmd_async',
+)
+
+
+def measure(module='xarm'):
+    """
+    :return: {module name: (self us, cumulative us)}
+    """
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import {}'.format(module)],
+                          stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, universal_newlines=True)
+    times = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        times[name.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+
+def main(budget_ms=IMPORT_BUDGET_MS, module='xarm', top=10):
+    # compile once, the budget is about the import, not about the bytecode compiling
+    measure(module)
+    times = measure(module)
+    if module not in times:
+        print('failed to import {}'.format(module))
+        return 1
+    total_ms = times[module][1] / 1000
+    print('import {}: {:.1f}ms (budget {}ms)'.format(module, total_ms, budget_ms))
+    for name, (self_us, cumulative_us) in sorted(times.items(), key=lambda x: x[1][0], reverse=True)[:top]:
+        print('  {:>8.2f}ms self {:>8.2f}ms cumulative  {}'.format(self_us / 1000, cumulative_us / 1000, name))
+    loaded = [name for name in LAZY_MODULES if name in times]
+    if loaded:
+        print('imported eagerly: {}'.format(', '.join(loaded)))
+    return 1 if total_ms > budget_ms or loaded else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(float(sys.argv[1]) if len(sys.argv) > 1 else IMPORT_BUDGET_MS, *sys.argv[2:3]))
@@ -1 +1,9 @@
 from .xarm_api import XArmAPI
+
+
+def __getattr__(name):
+    # the asyncio api is imported on first use
+    if name == 'AsyncXArmAPI':
+        from .async_xarm_api import AsyncXArmAPI
+        return AsyncXArmAPI
+    raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
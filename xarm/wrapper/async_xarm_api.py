@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+# Software License Agreement (MIT License)
+#
+# Copyright (c) 2018, UFACTORY, Inc.
+# All rights reserved.
+#
+# Author: Vinman <vinman.wen@ufactory.cc>
+
+import time
+import asyncio
+from .xarm_api import XArmAPI
+from ..core.comm.async_socket_port import AsyncSocketPort
+from ..core.wrapper.uxbus_cmd_async import AsyncUxbusCmd
+from ..core.config.x_config import XCONF
+from ..core.utils import convert
+from ..core.utils.log import logger
+from ..x3.report import ReportHandler
+
+
+class AsyncXArmAPI(object):
+    def __init__(self, port=None, is_radian=False, **kwargs):
+        """
+        asyncio version of XArmAPI, the sockets are served by the running event loop (no receive threads)
+        Ex:
+            arm = AsyncXArmAPI('192.168.1.113')
+            await arm.connect()
+            code, state = await arm.core.get_state()
+            code = await arm.core.move_line([300, 0, 200, 180, 0, 0], 100, 2000, 0)
+            async for report in arm.reports():
+                print(report['state'], report['pose'])
+
+        :param port: ip-address(such as '192.168.1.185'), serial port is not supported
+        :param is_radian: set the default unit is radian or not, default is False
+        :param kwargs: same as XArmAPI
+            Note: enable_pipeline is always True, the commands are matched to the replies by the transaction number
+
+        core: the commands of the core layer which are one transaction are awaitable, served by the event loop,
+            see AsyncUxbusCmd
+        reports(): async iterator of the decoded report data
+        attributes of XArmAPI (state, position, ...): returned directly, they are updated by the report
+        api: the blocking XArmAPI which shares the connection, for the methods of XArmAPI,
+            Note: they block, run them in an executor, eg: await loop.run_in_executor(None, arm.api.set_position, 300)
+        """
+        self._port = port
+        self._api = XArmAPI(port=port, is_radian=is_radian, do_not_open=True, **kwargs)
+        self._forbid_uds = kwargs.get('forbid_uds', False)
+        self._enable_heartbeat = kwargs.get('enable_heartbeat', False)
+        self._enable_report = kwargs.get('enable_report', True)
+        self._report_type = kwargs.get('report_type', 'rich')
+        self._keep_heart = kwargs.get('keep_heart', True)
+        self._report_handler = ReportHandler('devlop' if self._report_type == 'real' else self._report_type)
+        self._report_queues = []
+        self._core = None
+        self._attached = False
+        self._keepalive_task = None
+
+    @property
+    def api(self):
+        """
+        The blocking XArmAPI instance which shares the connection
+        """
+        return self._api
+
+    @property
+    def core(self):
+        """
+        Core layer API (awaitable), set only for advanced developers
+        Ex:
+            code, state = await self.core.get_state()
+        """
+        return self._core
+
+    @property
+    def connected(self):
+        return self._api.connected
+
+    def __getattr__(self, item):
+        attr = getattr(self._api, item)
+        if callable(attr):
+            raise AttributeError('{} blocks, call it on arm.api in an executor or use arm.core'.format(item))
+        return attr
+
+    def _report_port(self):
+        if self._report_type == 'real':
+            return XCONF.SocketConf.TCP_REPORT_REAL_PORT
+        elif self._report_type == 'normal':
+            return XCONF.SocketConf.TCP_REPORT_NORM_PORT
+        return XCONF.SocketConf.TCP_REPORT_RICH_PORT
+
+    async def _open_report(self):
+        stream_report = await AsyncSocketPort.open(self._port, self._report_port(), forbid_uds=self._forbid_uds)
+        stream_report.rx_parse.handler = self._on_report
+        return stream_report
+
+    async def connect(self, port=None):
+        """
+        Connect to xArm
+        :param port: port name or the ip address, default is the value when initializing an instance
+        """
+        if self.connected:
+            return
+        self._port = port if port is not None else self._port
+        loop = asyncio.get_running_loop()
+        # the control and report sockets are opened in parallel
+        stream, stream_report = await asyncio.gather(
+            AsyncSocketPort.open(self._port, XCONF.SocketConf.TCP_CONTROL_PORT,
+                                 forbid_uds=self._forbid_uds, heartbeat=self._enable_heartbeat),
+            self._open_report() if self._enable_report else asyncio.sleep(0))
+        if not stream.connected:
+            if stream_report is not None:
+                stream_report.close()
+            raise Exception('connect socket failed')
+        arm = self._api.arm
+        arm._port = self._port
+        self._attached = False
+        try:
+            await loop.run_in_executor(None, arm._connect_streams, stream, stream_report)
+        except Exception:
+            stream.close()
+            if stream_report is not None:
+                stream_report.close()
+            raise
+        self._attached = True
+        self._core = AsyncUxbusCmd(arm.arm_cmd)
+        if self._keep_heart and arm.version_is_ge(1, 8, 6):
+            # switch before any command is in flight, the replies are checked against the flag
+            self._core.cmd.set_prot_flag(3)
+        self._keepalive_task = loop.create_task(self._keepalive())
+
+    async def disconnect(self):
+        """
+        Disconnect
+        """
+        if self._keepalive_task is not None:
+            self._keepalive_task.cancel()
+            self._keepalive_task = None
+        await asyncio.get_running_loop().run_in_executor(None, self._api.disconnect)
+        self._attached = False
+        for que in self._report_queues:
+            self._put_report(que, None)
+
+    def _on_report(self, data):
+        # called on the event loop with one complete report frame
+        if not self._attached:
+            return
+        arm = self._api.arm
+        if arm._is_old_protocol and convert.bytes_to_u32(data) > 256:
+            arm._is_old_protocol = False
+        arm._handle_report_data(data)
+        if self._report_queues and self._report_handler.parse_handler:
+            self._report_handler.parse_handler(data)
+            item = dict(self._report_handler.parse_dict)
+            for que in self._report_queues:
+                self._put_report(que, item)
+
+    @staticmethod
+    def _put_report(que, item):
+        # keep the latest reports only, a slow consumer never stalls the socket
+        if que.full():
+            que.get_nowait()
+        que.put_nowait(item)
+
+    async def reports(self, maxsize=1):
+        """
+        Async iterator of the report data (dict), ends when disconnected
+        :param maxsize: max number of the buffered reports, the oldest one is dropped when full
+        """
+        que = asyncio.Queue(maxsize)
+        self._report_queues.append(que)
+        try:
+            while self.connected:
+                item = await que.get()
+                if item is None:
+                    break
+                yield item
+        finally:
+            self._report_queues.remove(que)
+
+    async def _keepalive(self):
+        arm = self._api.arm
+        last_send_time = 0
+        while self.connected:
+            try:
+                curr_time = time.monotonic()
+                if self._keep_heart and self._core.cmd.get_prot_flag() == 3:
+                    if curr_time - last_send_time > 10 and curr_time - self._core.last_comm_time > 30:
+                        ret = await self._core.get_state()
+                        if ret[0] >= 0:
+                            last_send_time = curr_time
+                        if curr_time - self._core.last_comm_time > 90:
+                            logger.error('client timeout over 90s, disconnect')
+                            break
+                if self._enable_report and not arm.reported:
+                    arm._report_connect_changed_callback(True, False)
+                    await asyncio.sleep(2)
+                    arm._stream_report = await self._open_report()
+                    if arm.reported:
+                        arm._report_reconnect_cnts += 1
+                        arm._report_connect_changed_callback(True, True)
+                    continue
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(e)
+            await asyncio.sleep(1)
+        self._keepalive_task = None
+        if self.connected or self._attached:
+            await self.disconnect()
@@ -79,6 +79,30 @@ class XArmAPI(object):
                 Note: only available in the param `check_cmdnum_limit` is True
             check_is_ready: check if the arm is ready to move or not, default is True
                 Note: only available if firmware_version < 1.5.20
+            enable_pipeline: allow several commands to be in flight at once on the control socket, default is False
+                Note: the replies are matched to the requests by the transaction number,
+                    so commands from different threads no longer wait for each other's round trip
+            enable_reactor: serve the sockets of this instance by the reactor thread shared by every instance
+                in the process instead of starting its own receive/report/heartbeat threads, default is False
+                Note: the report handling, the keepalive and the report callbacks of an instance run in order
+                    on its own worker thread (started on demand), a blocking callback delays the reports
+                    of this instance only (see max_callback_thread_count)
+            priority_via_503: send the pause/stop commands (set_state(3), set_state(4), emergency_stop) by the 503 port, default is False
+                Note: those commands never wait for the command lock, the 503 port also keeps them
+                    out of the way of a long request of the control socket (eg: modbus transparent transmission)
+            enable_adaptive_timeout: ask again at once when the reply of a read only command (get_xxx) is clearly lost, default is False
+                Note: lost means no reply after max(50ms, 3 * p99) of the round trips measured for that command,
+                    at most 2 retries within the normal timeout, the set commands always wait for the normal timeout
+            enable_device_cache: keep the version/sn of the arms in ~/.UFACTORY/cache/xarm/sdk/devices.json, default is False
+                Note: the version and sn of a known ip are queried in one round trip on connect and compared with the cache,
+                    a different arm at that ip is logged and its entry rewritten
+            auto_reconnect: reconnect in the background when the connection is broken (not by disconnect), default is False
+                Note: only available if the connection is socket
+                Note: the attempts are spaced by an exponential backoff from 0.1s up to reconnect_max_interval
+                Note: after reconnected, the tcp offset, tcp load, world offset, jerks, max accelerations, modbus baudrate and
+                    gripper enable set by this instance are applied again if the controller lost them,
+                    then the session restored callback is called, see register_session_restored_callback
+            reconnect_max_interval: max interval (seconds) between two reconnect attempts, default is 30
         """
         self._arm = XArm(port=port,
                          is_radian=is_radian,
@@ -179,6 +203,48 @@ class XArmAPI(object):
         """
         return self._arm.connected
 
+    @property
+    def report_frame_info(self):
+        """
+        Sequence info of the last report frame handled, only available if enable_report is True
+        Note: the reader always gets the latest frame, the frames replaced before they were read are missed
+
+        :return: dict
+            seq: sequence number of the frame, counted from 1 for every connection of the report socket
+            time: receive time of the frame, time.monotonic()
+            gap: frames missed right before the frame
+            missed: frames missed since connected (or since get_comm_stats(reset=True))
+            controller_time: timestamp (seconds) of the controller in the frame, None if the frame has none
+            timestamp: controller_time in host time (time.monotonic()), to align the report with the other sensors
+                Note: the controller clock is synced from the frames (min delay filter plus drift, see get_report_timing),
+                    the receive time is used if the frame has no timestamp or the clock is not synced yet
+        """
+        return self._arm.report_frame_info
+
+    @property
+    def robot_state(self):
+        """
+        Immutable snapshot of the reported state, replaced as a whole by every report frame
+        Note: all the fields of a snapshot are from the same frame and reading them copies nothing,
+            unlike position/angles/state/... which are read one by one and copy the lists
+        Note: wait=True of the motion interfaces is woken up by the transitions of the robot state (see wait_for),
+            the state is polled over the command socket only if the report is disabled or not fresh
+        Ex:
+            robot_state = arm.robot_state
+            print(robot_state.seq, robot_state.state, robot_state.position)
+
+        :return: RobotState, the sequences are tuples
+            seq: snapshots published since connected, counted from 0
+            timestamp: host time (time.monotonic()) of the frame, see report_frame_info
+            recv_time: host time (time.monotonic()) when the frame was received, 'time' of report_frame_info
+                Note: use it to order the frames against the host events (eg: a command sent),
+                    timestamp is synced to the controller clock and may be earlier than the frame was received
+            state, mode, cmd_num, error_code, warn_code, is_ready: same as the properties
+            position, position_aa, angles: same as the properties (unit by default_is_radian)
+            motor_brake_states, motor_enable_states: same as the properties
+        """
+        return self._arm.robot_state
+
     @property
     def default_is_radian(self):
         """
@@ -1523,6 +1589,28 @@ class XArmAPI(object):
         """
         return self._arm.set_pause_time(sltime, wait=wait)
 
+    def wait_for(self, predicate, timeout=None, interval=0.1, source='report'):
+        """
+        Wait until the predicate is met, woken up by its event source instead of sleeping a fixed time
+        Note: wait=True of the interfaces is built on it
+        Ex:
+            # wait until z is over 200mm, woken up by the report
+            code = arm.wait_for(lambda robot_state: 0 if arm.position[2] > 200 else None, timeout=10, interval=0.01)
+            # wait until the tool gpio 0 is high, polled every 0.05s
+            code = arm.wait_for(lambda robot_state: 0 if arm.get_tgpio_digital(0)[1] == 1 else None, interval=0.05, source='poll')
+
+        :param predicate: predicate(robot_state) => None to wait on, anything else is returned, see robot_state
+        :param timeout: seconds, None is no limit
+        :param interval: max seconds between two checks, the period of the poll if the source is 'poll', default is 0.1
+        :param source: what wakes up the wait, default is 'report'
+            'report': the changes of state, mode, cmd_num or error_code of the robot state at once, and every interval
+            'poll': every interval only, the predicate polls the value itself (such as over modbus)
+        :return: result of the predicate or code
+            code: See the [API Code Documentation](./xarm_api_code.md#api-code) for details.
+                APIState.NOT_CONNECTED if disconnected, APIState.WAIT_FINISH_TIMEOUT if not met in time
+        """
+        return self._arm.wait_for(predicate, timeout=timeout, interval=interval, source=source)
+
     def set_tcp_offset(self, offset, is_radian=None, **kwargs):
         """
         Set the tool coordinate system offset at the end
@@ -2029,6 +2117,7 @@ class XArmAPI(object):
                 'mtbrake': mtbrake, # if report_mtbrake is True, and available if enable_report is True and the connect way is socket
                 'mtable': mtable, # if report_mtable is True, and available if enable_report is True and the connect way is socket
                 'cmdnum': cmdnum, # if report_cmd_num is True
+                'timestamp': host time (time.monotonic()) when the controller sent the report, see report_frame_info
             }
         :param report_cartesian: report cartesian or not, default is True
         :param report_joints: report joints or not, default is True
@@ -2059,6 +2148,7 @@ class XArmAPI(object):
             {
                 "cartesian": [x, y, z, roll, pitch, yaw], ## if report_cartesian is True
                 "joints": [angle-1, angle-2, angle-3, angle-4, angle-5, angle-6, angle-7], ## if report_joints is True
+                "timestamp": host time (time.monotonic()) when the controller sent the report, see report_frame_info
             }
         :param report_cartesian: report or not, True/False, default is True
         :param report_joints: report or not, True/False, default is True
@@ -2188,6 +2278,24 @@ class XArmAPI(object):
         """
         return self._arm.register_iden_progress_changed_callback(callback=callback)
 
+    def register_session_restored_callback(self, callback=None):
+        """
+        Register the session restored callback, called once after every auto reconnect, see auto_reconnect
+
+        :param callback:
+            callback data:
+            {
+                "restored": {key: code}, the settings applied again and the codes of their setters,
+                    key: tcp_offset/tcp_load/world_offset/tcp_jerk/tcp_maxacc/joint_jerk/joint_maxacc/modbus_baud/gripper_enable
+                "failed": {key: code}, the settings which could not be applied, they are applied again after the next reconnect,
+                    code: the code of the setter, APIState.NOT_READY (-2) if the setter needs the arm ready and it is not
+                "ready": the arm was ready when the settings were applied, see check_is_ready
+                "reconnects": count of the successful reconnections of the whole connection, see get_comm_stats
+            }
+        :return: True/False
+        """
+        return self._arm.register_session_restored_callback(callback=callback)
+
     def release_report_callback(self, callback=None):
         """
         Release the report callback
@@ -2287,6 +2395,15 @@ class XArmAPI(object):
         """
         return self._arm.release_iden_progress_changed_callback(callback=callback)
 
+    def release_session_restored_callback(self, callback=None):
+        """
+        Release the session restored callback
+
+        :param callback:
+        :return: True/False
+        """
+        return self._arm.release_session_restored_callback(callback=callback)
+
     def get_servo_debug_msg(self, show=False, lang='en'):
         """
         Get the servo debug msg, used only for debugging
@@ -2570,6 +2687,52 @@ class XArmAPI(object):
         """
         return self._arm.set_timeout(timeout)
     
+    def get_comm_stats(self, reset=False):
+        """
+        Get the communication statistics since the last reset, to find out where the time of a slow cycle goes
+
+        :param reset: reset the statistics after getting them, default is False
+        :return: tuple((code, stats)), stats: dict
+            duration: seconds since the last reset
+            timeouts: count of the commands which got no reply in time
+            err_num: count of the replies with an unexpected transaction number
+            stale: count of the replies which came after their command had timed out
+            retries: count of the requests sent again, see enable_adaptive_timeout
+            reconnects: count of the successful reconnections of the whole connection, see auto_reconnect
+            report_reconnects: count of the successful reconnections of the report socket alone
+            commands: {command name: {'lock_wait': hist, 'send': hist, 'reply': hist}}
+                lock_wait: waiting for the command lock, that is the round trips of the other threads
+                send: numbering and writing the request
+                reply: from the request sent to its reply received, the network plus the controller
+                hist: {'count', 'mean', 'max', 'p50', 'p99', 'buckets'}, durations in ms
+                    Note: p50/p99 are the upper bound of the bucket holding them
+            main/report/503: {'bytes_in', 'bytes_out', 'flushed'} of the current connection
+                report also has 'frames' (received) and 'missed' (replaced before handled), see report_frame_info
+        """
+        return self._arm.get_comm_stats(reset=reset)
+
+    def get_report_timing(self, reset=False):
+        """
+        Get the interval statistics of the report frames since connected or the last reset,
+        to tell the network jitter from the host stalls when the motion stutters, only available if enable_report is True
+
+        :param reset: reset the statistics after getting them, default is False
+        :return: tuple((code, stats)), stats: dict
+            duration: seconds since the last reset
+            controller: intervals by the timestamps of the controller (rich report of the firmware which sends them)
+            received: intervals by the host time when the frames were received from the socket
+            handled: intervals by the host time when the frames were taken by the sdk
+                Note: irregular received intervals with regular controller intervals is the network,
+                    irregular handled intervals with regular received intervals is the host (GIL, callbacks, scheduling)
+            each of them: {'count', 'mean', 'max', 'buckets', 'over', 'threshold', 'p50', 'p90', 'p99', 'p999'}, durations in ms
+                over: count of the intervals over the threshold (controller 205ms, host 300ms)
+                p50/p90/p99/p999: quantiles of the latest 1024 intervals, the others are since the reset
+            max_handle_interval: max interval (ms) between two reports decoded by the sdk
+            clock: the controller clock sync, {'synced', 'offset', 'drift_ppm', 'samples', 'resyncs'}
+                offset: host time - controller time (seconds), includes the minimal network delay
+        """
+        return self._arm.get_report_timing(reset=reset)
+
     def set_baud_checkset_enable(self, enable):
         """
         Enable auto checkset the baudrate of the end IO board or not
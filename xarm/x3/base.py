@@ -11,41 +11,138 @@ import sys
 import time
 import math
 import threading
-try:
-    from multiprocessing.pool import ThreadPool
-except:
-    ThreadPool = None
-try:
-    import asyncio
-
-    if sys.version_info.major >= 3 and sys.version_info.minor >= 5:
-        from .grammar_async import AsyncObject as BaseObject
-    else:
-        from .grammar_coroutine import CoroutineObject as BaseObject
-except:
-    asyncio = None
+# asyncio and multiprocessing.pool (the callback thread of max_callback_thread_count) are imported when they are used,
+# they took the most of the import time of the sdk
+if sys.version_info.major >= 3 and sys.version_info.minor >= 5:
+    from .grammar_async import AsyncObject as BaseObject
+else:
+    from .grammar_coroutine import CoroutineObject as BaseObject
 if not hasattr(math, 'inf'):
     setattr(math, 'inf', float('inf'))
 from .events import Events
 from ..core.config.x_config import XCONF
 from ..core.comm import SerialPort, SocketPort
+from ..core.comm.reactor import Reactor, ReactorWorker
 from ..core.wrapper import UxbusCmdSer, UxbusCmdTcp
 from ..core.utils.log import logger, pretty_print
 from ..core.utils import convert
-from ..core.config.x_code import ControllerWarn, ControllerError, ControllerErrorCodeMap, ControllerWarnCodeMap
-from .utils import compare_time, compare_version, filter_invaild_number
+from ..core.utils.latency import CommStats
+from ..core.utils.device_cache import get_device_cache
+from ..core.utils import report_codec
+from ..core.utils.report_codec import ReportFrame, ReportAttribute
+from .utils import compare_time, compare_version, filter_invaild_number, filter_invaild_numbers, POSE_NDIGITS, ANGLE_NDIGITS
 from .decorator import xarm_is_connected, xarm_is_ready, xarm_is_not_simulation_mode, xarm_wait_until_cmdnum_lt_max, xarm_wait_until_not_pause
 from .code import APIState
+from .robot_state import RobotState
 from ..tools.threads import ThreadManage
 from ..version import __version__
 
-controller_error_keys = ControllerErrorCodeMap.keys()
-controller_warn_keys = ControllerWarnCodeMap.keys()
+
+def __getattr__(name):
+    # the code tables are loaded on first use
+    if name in ('controller_error_keys', 'controller_warn_keys'):
+        from ..core.config.x_code import ControllerErrorCodeMap, ControllerWarnCodeMap
+        return (ControllerErrorCodeMap if name == 'controller_error_keys' else ControllerWarnCodeMap).keys()
+    raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
+
+
+def _new_event_loop():
+    try:
+        import asyncio
+        return asyncio.new_event_loop()
+    except:
+        return None
+
+
+def _new_thread_pool(processes):
+    try:
+        from multiprocessing.pool import ThreadPool
+        return ThreadPool(processes)
+    except:
+        return None
+
 
 print('SDK_VERSION: {}'.format(__version__))
 
 
+def _report_motor_states(name):
+    def decode(arm, frame):
+        value = getattr(frame, name, None)
+        return None if value is None else list(report_codec.BITS[value])
+    return decode
+
+
+def _report_tcp_load(arm, frame):
+    tcp_load = getattr(frame, 'tcp_load', None)
+    if tcp_load is None:
+        return None
+    # the center of gravity of the old firmware is in meters
+    scale = 1 if compare_version(arm.version_number, (0, 2, 0)) else 1000
+    return [round(tcp_load[0], 3), [round(i * scale, 3) for i in tcp_load[1:]]]
+
+
+def _report_cgpio_states(arm, frame):
+    if getattr(frame, 'cgpio_output_conf', None) is None:
+        return None
+    cgpio_states = frame.cgpio_digitals + frame.cgpio_analogs
+    cgpio_states[6:10] = [x / 4095.0 * 10.0 for x in cgpio_states[6:10]]
+    cgpio_states.append(frame.cgpio_input_conf)
+    cgpio_states.append(frame.cgpio_output_conf)
+    if arm._control_box_type_is_1300 and frame.cgpio_output_conf2 is not None:
+        cgpio_states[-2] = cgpio_states[-2] + frame.cgpio_input_conf2
+        cgpio_states[-1] = cgpio_states[-1] + frame.cgpio_output_conf2
+    return cgpio_states
+
+
+def _report_voltages(arm, frame):
+    voltages = getattr(frame, 'voltages', None)
+    return None if voltages is None else [x / 100 for x in voltages]
+
+
+def _report_is_simulation(arm, frame):
+    is_simulation = getattr(frame, 'is_simulation', None)
+    return None if is_simulation is None else bool(is_simulation)
+
+
 class Base(BaseObject, Events):
+    # decoded from the latest report frame on access, only the fields read for every frame are decoded at once,
+    # see _handle_report_data
+    _joints_torque = ReportAttribute('_joints_torque', 'torque')
+    _gravity_direction = ReportAttribute('_gravity_direction', 'gravity_direction')
+    _tcp_load = ReportAttribute('_tcp_load', decode=_report_tcp_load)
+    _arm_motor_brake_states = ReportAttribute('_arm_motor_brake_states', decode=_report_motor_states('mtbrake'))
+    _arm_motor_enable_states = ReportAttribute('_arm_motor_enable_states', decode=_report_motor_states('mtable'))
+    _arm_type = ReportAttribute('_arm_type', 'arm_ids', 0)
+    _arm_master_id = ReportAttribute('_arm_master_id', 'arm_ids', 2)
+    _arm_slave_id = ReportAttribute('_arm_slave_id', 'arm_ids', 3)
+    _arm_motor_tid = ReportAttribute('_arm_motor_tid', 'arm_ids', 4)
+    _arm_motor_fid = ReportAttribute('_arm_motor_fid', 'arm_ids', 5)
+    _tcp_jerk = ReportAttribute('_tcp_jerk', 'trs', 0)
+    _min_tcp_acc = ReportAttribute('_min_tcp_acc', 'trs', 1)
+    _max_tcp_acc = ReportAttribute('_max_tcp_acc', 'trs', 2)
+    _min_tcp_speed = ReportAttribute('_min_tcp_speed', 'trs', 3)
+    _max_tcp_speed = ReportAttribute('_max_tcp_speed', 'trs', 4)
+    _joint_jerk = ReportAttribute('_joint_jerk', 'p2p', 0)
+    _min_joint_acc = ReportAttribute('_min_joint_acc', 'p2p', 1)
+    _max_joint_acc = ReportAttribute('_max_joint_acc', 'p2p', 2)
+    _min_joint_speed = ReportAttribute('_min_joint_speed', 'p2p', 3)
+    _max_joint_speed = ReportAttribute('_max_joint_speed', 'p2p', 4)
+    _rot_jerk = ReportAttribute('_rot_jerk', 'rot', 0)
+    _max_rot_acc = ReportAttribute('_max_rot_acc', 'rot', 1)
+    _realtime_tcp_speed = ReportAttribute('_realtime_tcp_speed', 'speeds', 0)
+    _realtime_joint_speeds = ReportAttribute('_realtime_joint_speeds', 'speeds', slice(1, None))
+    _cgpio_reset_enable = ReportAttribute('_cgpio_reset_enable', 'reset_enable', 0)
+    _tgpio_reset_enable = ReportAttribute('_tgpio_reset_enable', 'reset_enable', 1)
+    _is_simulation_robot = ReportAttribute('_is_simulation_robot', decode=_report_is_simulation)
+    _is_collision_detection = ReportAttribute('_is_collision_detection', 'collision', 0)
+    _collision_tool_type = ReportAttribute('_collision_tool_type', 'collision', 1)
+    _collision_tool_params = ReportAttribute('_collision_tool_params', 'collision_tool_params')
+    _voltages = ReportAttribute('_voltages', decode=_report_voltages)
+    _currents = ReportAttribute('_currents', 'currents')
+    _cgpio_states = ReportAttribute('_cgpio_states', decode=_report_cgpio_states)
+    _ft_ext_force = ReportAttribute('_ft_ext_force', 'ft_ext_force')
+    _ft_raw_force = ReportAttribute('_ft_raw_force', 'ft_raw_force')
+
     def __init__(self, port=None, is_radian=False, do_not_open=False, **kwargs):
         if kwargs.get('init', False):
             super(Base, self).__init__()
@@ -58,6 +155,27 @@ class Base(BaseObject, Events):
             self._enable_report = kwargs.get('enable_report', True)
             self._report_type = kwargs.get('report_type', 'rich')
             self._forbid_uds = kwargs.get('forbid_uds', False)
+            self._enable_pipeline = kwargs.get('enable_pipeline', False)
+            self._enable_reactor = kwargs.get('enable_reactor', False)
+            self._priority_via_503 = kwargs.get('priority_via_503', False)
+            self._enable_adaptive_timeout = kwargs.get('enable_adaptive_timeout', False)
+            self._enable_device_cache = kwargs.get('enable_device_cache', False)
+            self._auto_reconnect = kwargs.get('auto_reconnect', False)
+            self._reconnect_max_interval = kwargs.get('reconnect_max_interval', 30)
+            self._reconnect_t = None
+            self._reconnect_lock = threading.Lock()
+            # set by disconnect, an explicit disconnect is never undone by the auto reconnect
+            self._reconnect_stop = threading.Event()
+            # session params of the controller, key => (setter name, args, kwargs), see _restore_session
+            self._session_params = {}
+            self._session_lock = threading.Lock()
+            self._reactor = None
+            # the report handling and the keepalive of this arm in reactor mode, one thread started on demand
+            self._reactor_worker = ReactorWorker('xarm-reactor-worker')
+            self._reactor_timer = None
+            self._reactor_lock = threading.Lock()
+            self._reactor_report_pending = False
+            self._reactor_tick_pending = False
 
             self._check_tcp_limit = kwargs.get('check_tcp_limit', False)
             self._check_joint_limit = kwargs.get('check_joint_limit', True)
@@ -72,8 +190,8 @@ class Base(BaseObject, Events):
             self._check_is_pause = kwargs.get('check_is_pause', True)
             self._timed_comm = kwargs.get('timed_comm', True)
             self._timed_comm_interval = kwargs.get('timed_comm_interval', 30)
-            self._timed_comm_t = None
-            self._timed_comm_t_alive = False
+            self._keepalive_t = None
+            self._keepalive_stop = threading.Event()
 
             self._baud_checkset = kwargs.get('baud_checkset', True)
             self._default_bio_baud = kwargs.get('default_bio_baud', 2000000)
@@ -107,6 +225,11 @@ class Base(BaseObject, Events):
             self.arm_cmd = None
             self._stream_503 = None # 透传使用
             self.arm_cmd_503 = None # 透传使用
+            # shared by the command instances of every connection, see get_comm_stats
+            self._comm_stats = CommStats()
+            # successful reconnects of the whole connection (auto_reconnect) and of the report socket alone
+            self._reconnect_cnts = 0
+            self._report_reconnect_cnts = 0
             self._stream_report = None
             self._report_thread = None
             self._only_report_err_warn_changed = True
@@ -175,12 +298,18 @@ class Base(BaseObject, Events):
             self._pause_cond = threading.Condition()
             self._pause_lock = threading.Lock()
             self._pause_cnts = 0
+            # notified when the state/mode/cmdnum/error of the robot state changes or disconnected, see wait_for
+            self._robot_state_cond = threading.Condition()
+            self._robot_state_changed = False
 
             self._realtime_tcp_speed = 0
             self._realtime_joint_speeds = [0, 0, 0, 0, 0, 0, 0]
 
             self._count = -1
             self._last_report_time = time.monotonic()
+            self._report_timestamp = 0
+            self._report_recv_time = 0
+            self._report_frame = None
             self._max_report_interval = 0
 
             self._cgpio_reset_enable = 0
@@ -226,6 +355,8 @@ class Base(BaseObject, Events):
 
             self._has_motion_cmd = False
             self._need_sync = False
+            self._robot_state = None
+            self._publish_robot_state()
 
             if not do_not_open:
                 self.connect()
@@ -292,6 +423,12 @@ class Base(BaseObject, Events):
 
         self._count = -1
         self._last_report_time = time.monotonic()
+        # host time of the frame of the current report data and when it was received, see _handle_report_data
+        self._report_timestamp = 0
+        self._report_recv_time = 0
+        # the latest report frame, see ReportAttribute
+        self._report_frame = None
+        self._robot_state = None
         self._max_report_interval = 0
 
         self._cgpio_reset_enable = 0
@@ -339,22 +476,29 @@ class Base(BaseObject, Events):
         self._need_sync = False
         self._only_check_result = 0
         self._keep_heart = True
+        self._publish_robot_state()
 
     @staticmethod
     def log_api_info(msg, *args, code=0, **kwargs):
-        if code == 0:
-            logger.info(msg, *args, **kwargs)
-        else:
-            logger.error(msg, *args, **kwargs)
+        """
+        :param msg: str.format style, formatted with args only if the level is enabled
+        """
+        level = logger.INFO if code == 0 else logger.ERROR
+        if logger.isEnabledFor(level):
+            logger.log(level, msg.format(*args) if args else msg, **kwargs)
 
     def _check_version(self, is_first=False):
+        device, sn_ret = None, None
         if is_first:
             self._version = None
             self._robot_sn = None
             self._control_box_sn = None
+            device = self._lookup_device_cache()
         try:
             if not self._version:
-                self.get_version()
+                # the device cache is keyed by the sn, a cached arm is checked by both, see _device_cache_matches
+                sn_ret = self._query_version_and_sn(
+                    with_sn=self._check_robot_sn or (is_first and self._enable_device_cache and self._stream_type == 'socket'))
             if is_first:
                 fail_cnt = 0
                 while not self._version and fail_cnt < 100:
@@ -407,9 +551,14 @@ class Base(BaseObject, Events):
                             self._minor_version_number = 1
                             self._revision_version_number = 0
             if is_first:
+                if device is not None and not self._device_cache_matches(device, sn_ret):
+                    device = None
+                if sn_ret is not None:
+                    self._update_robot_sn(sn_ret)
                 if self._check_robot_sn:
                     count = 2
-                    self.get_robot_sn()
+                    if not self._robot_sn:
+                        self.get_robot_sn()
                     while not self._robot_sn and count and self.warn_code == 0:
                         self.get_robot_sn()
                         self.get_err_warn_code()
@@ -423,11 +572,58 @@ class Base(BaseObject, Events):
                     '{}.{}.{}'.format(self._major_version_number, self._minor_version_number, self._revision_version_number),
                     'V0' if self._is_old_protocol else 'V1', self._version, self._control_box_type_is_1300, self._arm_type_is_1300
                 ))
+                if device is None:
+                    self._save_device_cache()
             return 0
         except Exception as e:
             print('compare_time: {}, {}'.format(self._version, e))
             return -1
 
+    def _query_version_and_sn(self, with_sn=False):
+        """
+        Query the version (and the sn if with_sn) in one round trip
+        :return: raw result of get_robot_sn or None
+        """
+        if not with_sn or not hasattr(self.arm_cmd, 'batch'):
+            self.get_version()
+            return None
+        with self.arm_cmd.batch() as batch:
+            self.arm_cmd.get_version()
+            self.arm_cmd.get_robot_sn()
+        version_ret, sn_ret = batch.results
+        version_ret[0] = self._check_code(version_ret[0])
+        sn_ret[0] = self._check_code(sn_ret[0])
+        self._update_version(version_ret)
+        return sn_ret
+
+    def _lookup_device_cache(self):
+        if not self._enable_device_cache or self._stream_type != 'socket':
+            return None
+        device = get_device_cache().lookup(self._port)
+        if device and device.get('version') and device.get('robot_sn'):
+            return device
+        return None
+
+    def _save_device_cache(self):
+        if not self._enable_device_cache or self._stream_type != 'socket' or not self._version:
+            return
+        get_device_cache().update(self._port, self._robot_sn, version=self._version,
+                                  control_box_sn=self._control_box_sn, axis=self._arm_axis, device_type=self._arm_type)
+
+    def _device_cache_matches(self, device, sn_ret):
+        """
+        The cached facts are trusted only if the version and the sn just queried are the cached ones
+        :param sn_ret: raw result of get_robot_sn, queried with the version
+        """
+        if sn_ret is None or sn_ret[0] != 0:
+            return False
+        robot_sn = self._parse_robot_sn(sn_ret)[0]
+        if self._version != device['version'] or robot_sn != device['robot_sn']:
+            logger.warning('the arm at {} changed, cached: {} {}, now: {} {}'.format(
+                self._port, device['robot_sn'], device['version'], robot_sn, self._version))
+            return False
+        return True
+
     @property
     def only_check_result(self):
         return self._only_check_result
@@ -456,6 +652,47 @@ class Base(BaseObject, Events):
     def reported(self):
         return self._stream_report is not None and self._stream_report.connected
 
+    @property
+    def report_frame_info(self):
+        stream = self._stream_report
+        if stream is None or getattr(stream, 'report_mailbox', None) is None:
+            return {'seq': 0, 'time': 0, 'gap': 0, 'missed': 0, 'timestamp': self._report_timestamp, 'controller_time': None}
+        return {'seq': stream.report_seq, 'time': stream.report_time, 'gap': stream.report_gap, 'missed': stream.report_missed,
+                'timestamp': stream.report_timestamp, 'controller_time': stream.report_controller_time}
+
+    @property
+    def robot_state(self):
+        return self._robot_state
+
+    def _publish_robot_state(self, frame=None):
+        # built once per frame and swapped in one assignment, see RobotState
+        last = self._robot_state
+        mtbrake = getattr(frame, 'mtbrake', None)
+        if mtbrake is not None:
+            brake_states, enable_states = report_codec.BITS[mtbrake], report_codec.BITS[frame.mtable]
+        else:
+            brake_states, enable_states = tuple(self._arm_motor_brake_states), tuple(self._arm_motor_enable_states)
+        if self._default_is_radian:
+            position, position_aa, angles = tuple(self._position), tuple(self._pose_aa), tuple(self._angles)
+        else:
+            position = tuple(self._position[:3]) + tuple(map(math.degrees, self._position[3:]))
+            position_aa = tuple(self._pose_aa[:3]) + tuple(map(math.degrees, self._pose_aa[3:]))
+            angles = tuple(map(math.degrees, self._angles))
+        self._robot_state = robot_state = RobotState(
+            last.seq + 1 if last is not None else 0, self._report_timestamp, self._report_recv_time,
+            self._state, self._mode, self._cmd_num, self._error_code, self._warn_code, self._is_ready,
+            position, position_aa, angles, brake_states, enable_states)
+        if last is None or last.state != robot_state.state or last.cmd_num != robot_state.cmd_num \
+                or last.mode != robot_state.mode or last.error_code != robot_state.error_code:
+            self._robot_state_changed = True
+
+    def _notify_robot_state(self, force=False):
+        # called once the frame is handled as a whole (the sync too), so the waiters see all of it, see wait_for
+        if force or self._robot_state_changed:
+            self._robot_state_changed = False
+            with self._robot_state_cond:
+                self._robot_state_cond.notify_all()
+
     @property
     def ready(self):
         return self._is_ready
@@ -732,10 +969,12 @@ class Base(BaseObject, Events):
     def wait_until_cmdnum_lt_max(self):
         if not self._check_cmdnum_limit:
             return
-        while self.connected and self.cmd_num >= self._max_cmd_num:
-            if time.monotonic() - self._last_report_time > 0.4:
+
+        def _check(robot_state):
+            if not self._robot_state_is_fresh(0.4):
                 self.get_cmdnum()
-            time.sleep(0.05)
+            return True if self.cmd_num < self._max_cmd_num else None
+        self.wait_for(_check, interval=0.05)
 
     @property
     def check_xarm_is_ready(self):
@@ -745,29 +984,70 @@ class Base(BaseObject, Events):
             # no check if version >= 1.5.20
             return True
 
-    def _timed_comm_thread(self):
-        self._timed_comm_t_alive = True
-        cnt = 0
-        last_send_time = 0
-        while self.connected and self._timed_comm_t_alive:
-            curr_time = time.monotonic()
-            if not self._keep_heart:
-                time.sleep(1)
-                continue
-            if self.arm_cmd and curr_time - last_send_time > 10 and curr_time - self.arm_cmd.last_comm_time > self._timed_comm_interval:
-                try:
-                    if cnt == 0:
-                        code, _ = self.get_cmdnum()
-                    elif cnt == 1:
-                        code, _ = self.get_state()
-                    else:
-                        code, _ = self.get_err_warn_code()
-                    cnt = (cnt + 1) % 3
-                    if code >= 0:
-                        last_send_time = curr_time
-                except:
-                    pass
-            time.sleep(0.5)
+    def _keepalive_thread(self):
+        ticks = {'prot_flag': 2, 'keepalive': 0, 'cnt': 0}
+        while not self._keepalive_stop.wait(0.5):
+            try:
+                if not self.connected or not self._keepalive_tick(ticks):
+                    self._connection_lost()
+                    break
+            except Exception as e:
+                logger.error(e)
+
+    def _stop_keepalive_thread(self):
+        self._keepalive_stop.set()
+        if self._keepalive_t is not None and self._keepalive_t is not threading.current_thread():
+            self._keepalive_t.join()
+        self._keepalive_t = None
+
+    def _keepalive_tick(self, ticks):
+        """
+        The only heartbeat/keepalive of the arm, run every 0.5s by the keepalive thread or by the reactor worker
+        Nothing is sent while the connection shows life by itself:
+            heartbeat (enable_heartbeat): skipped if any frame was written within 1s
+            keepalive request: only after timed_comm_interval (30s if prot_flag is 3) without any reply,
+                never while a command is waiting for its reply, and it skips the command lock,
+                so it never makes a motion command wait
+        A dead peer of an idle connection is found by the tcp keepalive of the socket
+        :return: False if the controller has been silent for too long, the caller disconnects
+        """
+        if self._enable_heartbeat:
+            self.arm_cmd.send_heartbeat()
+            if self.connected_503:
+                self.arm_cmd_503.send_heartbeat()
+        if not self._keep_heart:
+            return True
+        cmd = self.arm_cmd
+        if ticks['prot_flag'] != 3 and self.version_is_ge(1, 8, 6) and cmd.set_prot_flag(3) == 0:
+            ticks['prot_flag'] = 3
+        if cmd.busy:
+            return True
+        curr_time = time.monotonic()
+        idle = curr_time - cmd.last_comm_time
+        if ticks['prot_flag'] == 3 and idle > 90:
+            logger.error('client timeout over 90s, disconnect')
+            return False
+        if curr_time - ticks['keepalive'] > 10 and ((ticks['prot_flag'] == 3 and idle > 30)
+                                                    or (self._timed_comm and idle > self._timed_comm_interval)):
+            code = cmd.priority_call(self._send_keepalive, ticks)
+            if code >= 0:
+                ticks['keepalive'] = curr_time
+        return True
+
+    def _send_keepalive(self, ticks):
+        if self.reported:
+            # the report keeps the state up to date, the cheapest request is enough
+            code, _ = self.get_state()
+            return code
+        # no report, refresh the values in turn
+        if ticks['cnt'] == 0:
+            code, _ = self.get_cmdnum()
+        elif ticks['cnt'] == 1:
+            code, _ = self.get_state()
+        else:
+            code, _ = self.get_err_warn_code()
+        ticks['cnt'] = (ticks['cnt'] + 1) % 3
+        return code
 
     def _clean_thread(self):
         self._thread_manage.join(1)
@@ -780,16 +1060,21 @@ class Base(BaseObject, Events):
     
     def connect_503(self):
         self._stream_503 = SocketPort(self._port, XCONF.SocketConf.TCP_CONTROL_PORT + 1,
-            heartbeat=self._enable_heartbeat, buffer_size=XCONF.SocketConf.TCP_CONTROL_BUF_SIZE, forbid_uds=self._forbid_uds)
+            buffer_size=XCONF.SocketConf.TCP_CONTROL_BUF_SIZE, forbid_uds=self._forbid_uds,
+            reactor=self._reactor)
         if not self.connected_503:
             return -1
-        self.arm_cmd_503 = UxbusCmdTcp(self._stream_503)
+        self.arm_cmd_503 = UxbusCmdTcp(self._stream_503, pipelined=self._enable_pipeline)
+        self.arm_cmd_503.stats = self._comm_stats
+        self.arm_cmd_503.set_adaptive_timeout(self._enable_adaptive_timeout)
         self.arm_cmd_503.set_debug(self._debug)
         return 0
 
     def connect(self, port=None, baudrate=None, timeout=None, axis=None, arm_type=None):
         if self.connected:
             return
+        if threading.current_thread() is not self._reconnect_t:
+            self._reconnect_stop.clear()
         if axis in [5, 6, 7]:
             self._arm_axis = axis
         if arm_type in [3, 5, 6, 7, 8, 9, 11]:
@@ -800,13 +1085,7 @@ class Base(BaseObject, Events):
         self._timeout = timeout if timeout is not None else self._timeout
         if not self._port:
             raise Exception('can not connect to port/ip {}'.format(self._port))
-        if self._timed_comm_t is not None:
-            try:
-                self._timed_comm_t_alive = False
-                self._timed_comm_t.join()
-                self._timed_comm_t = None
-            except:
-                pass
+        self._stop_keepalive_thread()
         self._is_first_report = True
         self._first_report_over = False
         self._init()
@@ -814,49 +1093,60 @@ class Base(BaseObject, Events):
             if self._port == 'localhost' or re.match(
                     r"^(?:(?:25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)\.){3}(?:25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)$",
                     self._port):
+                self._reactor = Reactor.get_instance() if self._enable_reactor else None
+                # the report/503 sockets are opened while the control socket connects and the version is queried
+                self._stream_report = None
+                side_threads = [threading.Thread(target=self._try_connect_report, daemon=True)]
+                if self._priority_via_503:
+                    side_threads.append(threading.Thread(target=self._try_connect_503, daemon=True))
+                for t in side_threads:
+                    t.start()
                 self._stream = SocketPort(self._port, XCONF.SocketConf.TCP_CONTROL_PORT,
-                                          heartbeat=self._enable_heartbeat,
-                                          buffer_size=XCONF.SocketConf.TCP_CONTROL_BUF_SIZE, forbid_uds=self._forbid_uds)
+                                          buffer_size=XCONF.SocketConf.TCP_CONTROL_BUF_SIZE, forbid_uds=self._forbid_uds,
+                                          reactor=self._reactor)
                 if not self.connected:
+                    for t in side_threads:
+                        t.join()
+                    for stream in [self._stream_report, self._stream_503 if self._priority_via_503 else None]:
+                        if stream is not None:
+                            stream.close()
                     raise Exception('connect socket failed')
 
                 self._report_error_warn_changed_callback()
 
-                self.arm_cmd = UxbusCmdTcp(self._stream)
+                self.arm_cmd = UxbusCmdTcp(self._stream, pipelined=self._enable_pipeline)
+                self.arm_cmd.stats = self._comm_stats
+                self.arm_cmd.set_adaptive_timeout(self._enable_adaptive_timeout)
                 self.arm_cmd.set_prot_flag(2)
                 self._stream_type = 'socket'
 
-                try:
-                    if self._timed_comm:
-                        self._timed_comm_t = threading.Thread(target=self._timed_comm_thread, daemon=True)
-                        self._timed_comm_t.start()
-                except:
-                    pass
-
-                self._stream_report = None
-
-                try:
-                    self._connect_report()
-                except:
-                    self._stream_report = None
-
-                if self._check_version(is_first=True) < 0:
-                    self.disconnect()
+                ret = self._check_version(is_first=True)
+                for t in side_threads:
+                    t.join()
+                if ret < 0:
+                    self._disconnect()
                     raise Exception('failed to check version, close')
+                if self._is_old_protocol and self._stream_report is not None:
+                    # the report socket was opened before the protocol was known, open it again with the old buffer size
+                    self._stream_report.close()
+                    self._stream_report = None
+                    self._try_connect_report()
                 self.arm_cmd.set_debug(self._debug)
 
-                if self._max_callback_thread_count < 0 and asyncio is not None:
-                    self._asyncio_loop = asyncio.new_event_loop()
-                    self._asyncio_loop_thread = threading.Thread(target=self._run_asyncio_loop, daemon=True)
-                    self._thread_manage.append(self._asyncio_loop_thread)
-                    self._asyncio_loop_thread.start()
-                elif self._max_callback_thread_count > 0 and ThreadPool is not None:
-                    self._pool = ThreadPool(self._max_callback_thread_count)
+                self._start_callback_thread()
 
-                if self._stream.connected and self._enable_report:
-                    self._report_thread = threading.Thread(target=self._report_thread_handle, daemon=True)
-                    self._report_thread.start()
-                    self._thread_manage.append(self._report_thread)
+                if self._reactor is not None:
+                    self._reactor_ticks = {'prot_flag': 2, 'keepalive': 0, 'cnt': 0,
+                                           'reported': self.reported, 'report_connect': 0}
+                    self._reactor_timer = self._reactor.call_every(0.5, self._reactor_tick_submit)
+                else:
+                    self._keepalive_stop.clear()
+                    self._keepalive_t = threading.Thread(target=self._keepalive_thread, daemon=True)
+                    self._keepalive_t.start()
+                    if self._stream.connected and self._enable_report:
+                        self._report_thread = threading.Thread(target=self._report_thread_handle, daemon=True)
+                        self._report_thread.start()
+                        self._thread_manage.append(self._report_thread)
 
                 self._report_connect_changed_callback()
             else:
@@ -868,15 +1158,10 @@ class Base(BaseObject, Events):
                 self._report_error_warn_changed_callback()
 
                 self.arm_cmd = UxbusCmdSer(self._stream)
+                self.arm_cmd.stats = self._comm_stats
                 self._stream_type = 'serial'
 
-                if self._max_callback_thread_count < 0 and asyncio is not None:
-                    self._asyncio_loop = asyncio.new_event_loop()
-                    self._asyncio_loop_thread = threading.Thread(target=self._run_asyncio_loop, daemon=True)
-                    self._thread_manage.append(self._asyncio_loop_thread)
-                    self._asyncio_loop_thread.start()
-                elif self._max_callback_thread_count > 0 and ThreadPool is not None:
-                    self._pool = ThreadPool(self._max_callback_thread_count)
+                self._start_callback_thread()
 
                 if self._enable_report:
                     self._report_thread = threading.Thread(target=self._auto_get_report_thread, daemon=True)
@@ -892,33 +1177,86 @@ class Base(BaseObject, Events):
                 setattr(self.arm_cmd, 'set_modbus_baudrate_old', self.arm_cmd.set_modbus_baudrate)
                 setattr(self.arm_cmd, 'set_modbus_baudrate', self._core_set_modbus_baudrate)
 
-    if asyncio:
-        def _run_asyncio_loop(self):
-            # @asyncio.coroutine
-            # def _asyncio_loop():
-            #     logger.debug('asyncio thread start ...')
-            #     while self.connected:
-            #         yield from asyncio.sleep(0.001)
-            #     logger.debug('asyncio thread exit ...')
+    def _connect_streams(self, stream, stream_report=None):
+        """
+        Same as connect (socket only), but the streams are opened and read by the caller, eg: AsyncXArmAPI
+        Note: blocking, do not call it on the event loop which serves the streams
+        """
+        if self.connected:
+            return
+        self._is_ready = True
+        self._is_first_report = True
+        self._first_report_over = False
+        self._init()
+        self._stream = stream
+        if not self.connected:
+            raise Exception('connect socket failed')
+        self._report_error_warn_changed_callback()
+        self.arm_cmd = UxbusCmdTcp(self._stream, pipelined=True)
+        self.arm_cmd.stats = self._comm_stats
+        self.arm_cmd.set_prot_flag(2)
+        self._stream_type = 'socket'
+        self._stream_report = stream_report
+        if self._check_version(is_first=True) < 0:
+            self._disconnect()
+            raise Exception('failed to check version, close')
+        self.arm_cmd.set_debug(self._debug)
+        if self._max_callback_thread_count > 0:
+            self._pool = _new_thread_pool(self._max_callback_thread_count)
+        self._report_connect_changed_callback()
+        self.set_timeout(self._cmd_timeout)
+        if self._rewrite_modbus_baudrate_method:
+            setattr(self.arm_cmd, 'set_modbus_baudrate_old', self.arm_cmd.set_modbus_baudrate)
+            setattr(self.arm_cmd, 'set_modbus_baudrate', self._core_set_modbus_baudrate)
+
+    def _try_connect_report(self):
+        try:
+            self._connect_report()
+        except:
+            self._stream_report = None
 
-            try:
-                asyncio.set_event_loop(self._asyncio_loop)
-                self._asyncio_loop_alive = True
-                # self._asyncio_loop.run_until_complete(_asyncio_loop())
-                self._asyncio_loop.run_until_complete(self._asyncio_loop_func())
-            except Exception as e:
-                pass
+    def _try_connect_503(self):
+        if self.connect_503() != 0:
+            logger.warning('connect 503 port failed, the priority commands use the control socket')
+
+    def _start_callback_thread(self):
+        if self._max_callback_thread_count < 0:
+            self._asyncio_loop = _new_event_loop()
+            if self._asyncio_loop is not None:
+                self._asyncio_loop_thread = threading.Thread(target=self._run_asyncio_loop, daemon=True)
+                self._thread_manage.append(self._asyncio_loop_thread)
+                self._asyncio_loop_thread.start()
+        elif self._max_callback_thread_count > 0:
+            self._pool = _new_thread_pool(self._max_callback_thread_count)
+
+    def _run_asyncio_loop(self):
+        # @asyncio.coroutine
+        # def _asyncio_loop():
+        #     logger.debug('asyncio thread start ...')
+        #     while self.connected:
+        #         yield from asyncio.sleep(0.001)
+        #     logger.debug('asyncio thread exit ...')
 
-            self._asyncio_loop_alive = False
+        try:
+            import asyncio
+            asyncio.set_event_loop(self._asyncio_loop)
+            self._asyncio_loop_alive = True
+            # self._asyncio_loop.run_until_complete(_asyncio_loop())
+            self._asyncio_loop.run_until_complete(self._asyncio_loop_func())
+        except Exception as e:
+            pass
 
-        # @staticmethod
-        # @asyncio.coroutine
-        # def _async_run_callback(callback, msg):
-        #     yield from callback(msg)
+        self._asyncio_loop_alive = False
+
+    # @staticmethod
+    # @asyncio.coroutine
+    # def _async_run_callback(callback, msg):
+    #     yield from callback(msg)
 
     def _run_callback(self, callback, msg, name='', enable_callback_thread=True):
         try:
             if self._asyncio_loop_alive and enable_callback_thread:
+                import asyncio
                 coroutine = self._async_run_callback(callback, msg)
                 asyncio.run_coroutine_threadsafe(coroutine, self._asyncio_loop)
             elif self._pool is not None and enable_callback_thread:
@@ -945,6 +1283,14 @@ class Base(BaseObject, Events):
             return self.arm_cmd.set_modbus_baudrate_old(baudrate)
 
     def disconnect(self):
+        self._reconnect_stop.set()
+        self._disconnect()
+
+    def _disconnect(self):
+        if self._reactor_timer is not None:
+            self._reactor_timer.cancel()
+            self._reactor_timer = None
+        self._stop_keepalive_thread()
         try:
             self._stream.close()
         except:
@@ -972,14 +1318,162 @@ class Base(BaseObject, Events):
         self._report_connect_changed_callback(False, False)
         with self._pause_cond:
             self._pause_cond.notifyAll()
+        self._notify_robot_state(force=True)
         self._clean_thread()
 
+    def _connection_lost(self):
+        """
+        The connection is broken (not by disconnect), it is reconnected in the background if auto_reconnect
+        """
+        self._disconnect()
+        if not self._auto_reconnect or self._stream_type != 'socket' or self._reconnect_stop.is_set():
+            return
+        with self._reconnect_lock:
+            if self._reconnect_t is not None and self._reconnect_t.is_alive():
+                return
+            self._reconnect_t = threading.Thread(target=self._reconnect_thread, daemon=True)
+            self._reconnect_t.start()
+
+    def _reconnect_thread(self):
+        # the motion defaults live in the sdk only and are reset by connect
+        motion_defaults = (self._last_tcp_speed, self._last_tcp_acc, self._last_joint_speed, self._last_joint_acc)
+        delay = 0.1
+        tries = 0
+        logger.warning('connection lost, reconnecting to {}'.format(self._port))
+        while not self._reconnect_stop.wait(delay):
+            tries += 1
+            try:
+                self.connect()
+            except Exception as e:
+                logger.warning('reconnect failed, tries={}, retry in {}s, {}'.format(tries, min(delay * 2, self._reconnect_max_interval), e))
+            if self.connected:
+                break
+            # exponential backoff, a dead controller is not flooded with connection attempts
+            delay = min(delay * 2, self._reconnect_max_interval)
+        if not self.connected:
+            return
+        if self._reconnect_stop.is_set():
+            # disconnect was called while connecting
+            self._disconnect()
+            return
+        self._reconnect_cnts += 1
+        logger.info('reconnected to {}, tries={}'.format(self._port, tries))
+        self._restore_session(motion_defaults)
+
+    # session params whose setters are xarm_is_ready, see _restore_session
+    _SESSION_PARAMS_NEED_READY = ('tcp_load', 'tcp_jerk', 'tcp_maxacc', 'joint_jerk', 'joint_maxacc')
+
+    def _record_session_param(self, code, key, name, *args, **kwargs):
+        """
+        Record a setting of the controller which is lost if the controller restarts, see _restore_session
+        :param code: code of the setter, nothing is recorded if it failed
+        :param key: key of the setting
+        :param name: name of the setter, called with args and kwargs to apply the setting again
+        """
+        if code in [0, XCONF.UxbusState.ERR_CODE, XCONF.UxbusState.WAR_CODE]:
+            with self._session_lock:
+                self._session_params[key] = (name, args, kwargs)
+
+    def _session_param_is_current(self, key, args):
+        """
+        :return: True if the report shows the controller still has the recorded setting
+        """
+        if not self._first_report_over or self._report_type != 'rich':
+            return False
+        if key == 'tcp_offset':
+            current, expected = self._position_offset, args[0]
+        elif key == 'world_offset':
+            current, expected = self._world_offset, args[0]
+        elif key == 'tcp_load':
+            current, expected = [self._tcp_load[0]] + list(self._tcp_load[1]), [args[0]] + list(args[1])
+        elif key in ['tcp_jerk', 'tcp_maxacc', 'joint_jerk', 'joint_maxacc']:
+            current = [{'tcp_jerk': self._tcp_jerk, 'tcp_maxacc': self._max_tcp_acc,
+                        'joint_jerk': self._joint_jerk, 'joint_maxacc': self._max_joint_acc}[key]]
+            expected = [args[0]]
+        else:
+            # not reported (the modbus baud is checked by its setter)
+            return False
+        return len(current) >= len(expected) and all(abs(current[i] - expected[i]) < 0.001 for i in range(len(expected)))
+
+    def _restore_session(self, motion_defaults=None):
+        """
+        Apply the recorded session params again after an auto reconnect, the ones the controller still has are skipped,
+        then the session restored event is emitted once with the params applied and the ones which failed
+        """
+        restored, failed = {}, {}
+        if motion_defaults is not None:
+            self._last_tcp_speed, self._last_tcp_acc, self._last_joint_speed, self._last_joint_acc = motion_defaults
+        if self.reported:
+            # the values of the controller come with the first report, the readiness with the one after it
+            self.wait_for(lambda _: True if self._first_report_over else None, timeout=1, interval=0.05)
+            first_frame = self._report_frame
+            self.wait_for(lambda _: True if self._report_frame is not first_frame else None, timeout=1, interval=0.05)
+        ready = self.check_xarm_is_ready
+        with self._session_lock:
+            params = list(self._session_params.items())
+        for key, (name, args, kwargs) in params:
+            if not self.connected:
+                failed[key] = APIState.NOT_CONNECTED
+                continue
+            if self._session_param_is_current(key, args):
+                continue
+            if not ready and key in self._SESSION_PARAMS_NEED_READY:
+                # the setter would refuse it without sending
+                failed[key] = APIState.NOT_READY
+                continue
+            try:
+                code = getattr(self, name)(*args, **kwargs)
+            except Exception as e:
+                logger.error('restore {} failed, {}'.format(key, e))
+                code = APIState.API_EXCEPTION
+            if code in [0, XCONF.UxbusState.ERR_CODE, XCONF.UxbusState.WAR_CODE]:
+                restored[key] = code
+            else:
+                failed[key] = code
+        if restored:
+            logger.info('session restored, {}'.format(restored))
+        if failed:
+            logger.warning('session restore failed, {}, ready={}'.format(failed, ready))
+        self._report_session_restored_callback(restored, failed, ready)
+
     def set_timeout(self, timeout):
         self._cmd_timeout = timeout
         if self.arm_cmd is not None:
             self._cmd_timeout = self.arm_cmd.set_timeout(self._cmd_timeout)
         return self._cmd_timeout
     
+    def get_comm_stats(self, reset=False):
+        stats = self._comm_stats.to_dict()
+        stats['reconnects'] = self._reconnect_cnts
+        stats['report_reconnects'] = self._report_reconnect_cnts
+        for name, stream in (('main', self._stream), ('report', self._stream_report), ('503', self._stream_503)):
+            if stream is not None:
+                stats[name] = {'bytes_in': stream.bytes_in, 'bytes_out': stream.bytes_out, 'flushed': stream.flushed}
+                if getattr(stream, 'report_mailbox', None) is not None:
+                    stats[name]['frames'] = stream.report_mailbox.seq
+                    stats[name]['missed'] = stream.report_missed
+                if reset:
+                    stream.reset_stats()
+        if reset:
+            self._comm_stats.reset()
+            self._reconnect_cnts = 0
+            self._report_reconnect_cnts = 0
+        return 0, stats
+
+    def get_report_timing(self, reset=False):
+        stream = self._stream_report
+        timing = getattr(stream, 'report_timing', None) if stream is not None else None
+        if timing is None:
+            return APIState.NOT_CONNECTED, {}
+        stats = timing.to_dict()
+        stats['max_handle_interval'] = self._max_report_interval * 1000
+        if getattr(stream, 'report_clock', None) is not None:
+            stats['clock'] = stream.report_clock.to_dict()
+        if reset:
+            timing.reset()
+            self._max_report_interval = 0
+        return 0, stats
+
     def set_baud_checkset_enable(self, enable):
         self._baud_checkset = enable
         return 0
@@ -1008,7 +1502,7 @@ class Base(BaseObject, Events):
             return 0, self._default_linear_track_baud
         return APIState.API_EXCEPTION, 0
 
-    def _connect_report(self):
+    def _connect_report(self, reconnect=False):
         if self._enable_report:
             if self._stream_report:
                 try:
@@ -1020,17 +1514,21 @@ class Base(BaseObject, Events):
                 self._stream_report = SocketPort(
                     self._port, XCONF.SocketConf.TCP_REPORT_REAL_PORT,
                     buffer_size=1024 if not self._is_old_protocol else 87,
-                    forbid_uds=self._forbid_uds)
+                    forbid_uds=self._forbid_uds, reactor=self._reactor)
             elif self._report_type == 'normal':
                 self._stream_report = SocketPort(
                     self._port, XCONF.SocketConf.TCP_REPORT_NORM_PORT,
                     buffer_size=XCONF.SocketConf.TCP_REPORT_NORMAL_BUF_SIZE if not self._is_old_protocol else 87,
-                    forbid_uds=self._forbid_uds)
+                    forbid_uds=self._forbid_uds, reactor=self._reactor)
             else:
                 self._stream_report = SocketPort(
                     self._port, XCONF.SocketConf.TCP_REPORT_RICH_PORT,
                     buffer_size=1024 if not self._is_old_protocol else 187,
-                    forbid_uds=self._forbid_uds)
+                    forbid_uds=self._forbid_uds, reactor=self._reactor)
+            if self._reactor is not None and self._stream_report.report_mailbox is not None:
+                self._stream_report.report_mailbox.listener = self._reactor_report_received
+            if reconnect and self._stream_report.connected:
+                self._report_reconnect_cnts += 1
 
     def __report_callback(self, report_id, item, name=''):
         if report_id in self._report_callbacks.keys():
@@ -1045,6 +1543,14 @@ class Base(BaseObject, Events):
                     'reported': self._stream_report and self._stream_report.connected if report_connected is None else report_connected,
                 }, name='connect_changed')
 
+    def _report_session_restored_callback(self, restored, failed=None, ready=True):
+        self.__report_callback(self.REPORT_SESSION_RESTORED_ID, {
+            'restored': restored,
+            'failed': failed or {},
+            'ready': ready,
+            'reconnects': self._reconnect_cnts,
+        }, name='session_restored')
+
     def _report_state_changed_callback(self):
         if self._ignore_state:
             return
@@ -1092,6 +1598,7 @@ class Base(BaseObject, Events):
                     ret['cartesian'] = self.position.copy()
                 if item['joints']:
                     ret['joints'] = self.angles.copy()
+                ret['timestamp'] = self._report_timestamp
                 self._run_callback(callback, ret, name='location')
 
     def _report_callback(self):
@@ -1117,36 +1624,25 @@ class Base(BaseObject, Events):
                     ret['mtbrake'] = mtbrake.copy()
                 if item['cmdnum']:
                     ret['cmdnum'] = self._cmd_num
+                ret['timestamp'] = self._report_timestamp
                 self._run_callback(callback, ret, name='report')
 
     def _report_thread_handle(self):
+        # the keepalive of the control socket is sent by the keepalive thread, see _keepalive_tick
         main_socket_connected = self.connected
         report_socket_connected = self.reported
-        prot_flag = 2
-        last_send_time = 0
         max_reconnect_cnts = 10
         connect_failed_cnt = 0
 
         while self.connected:
             try:
-                curr_time = time.monotonic()
-                if self._keep_heart:
-                    if prot_flag != 3 and self.version_is_ge(1, 8, 6) and self.arm_cmd.set_prot_flag(3) == 0:
-                        prot_flag = 3
-                    if prot_flag == 3 and curr_time - last_send_time > 10 and curr_time - self.arm_cmd.last_comm_time > 30:
-                        code, _ = self.get_state()
-                        # print('send heartbeat, code={}'.format(code))
-                        if code >= 0:
-                            last_send_time = curr_time
-                        if curr_time - self.arm_cmd.last_comm_time > 90:
-                            logger.error('client timeout over 90s, disconnect')
-                            break
+                prot_flag = self.arm_cmd.get_prot_flag()
                 if not self.reported:
                     # self.get_err_warn_code()
                     if report_socket_connected:
                         report_socket_connected = False
                         self._report_connect_changed_callback(main_socket_connected, report_socket_connected)
-                    self._connect_report()
+                    self._connect_report(reconnect=True)
                     if not self.reported:
                         connect_failed_cnt += 1
                         if self.connected and (connect_failed_cnt <= max_reconnect_cnts or prot_flag == 3):
@@ -1161,12 +1657,14 @@ class Base(BaseObject, Events):
                 if not report_socket_connected:
                     report_socket_connected = True
                     self._report_connect_changed_callback(main_socket_connected, report_socket_connected)
+                # woken as soon as a frame arrives, see ReportMailbox
                 recv_data = self._stream_report.read(1)
                 if recv_data != -1:
                     size = convert.bytes_to_u32(recv_data)
                     if self._is_old_protocol and size > 256:
                         self._is_old_protocol = False
-                    self._handle_report_data(recv_data)
+                    self._handle_report_data(recv_data, self._stream_report.report_timestamp, self._stream_report.report_time)
+                    continue
                 # else:
                 #     if self.connected:
                 #         code, err_warn = self.get_err_warn_code()
@@ -1183,566 +1681,407 @@ class Base(BaseObject, Events):
                 if not self.connected:
                     break
                 if not self._stream_report or not self._stream_report.connected:
-                    self._connect_report()
+                    self._connect_report(reconnect=True)
             time.sleep(0.001)
         if self._pause_cnts > 0:
             with self._pause_cond:
                 self._pause_cond.notifyAll()
-        self.disconnect()
+        self._connection_lost()
 
-    def _handle_report_data(self, data):
-        def __handle_report_normal_old(rx_data):
-            report_time = time.monotonic()
-            interval = report_time - self._last_report_time
-            self._max_report_interval = max(self._max_report_interval, interval)
-            self._last_report_time = report_time
-            # print('length:', convert.bytes_to_u32(rx_data[0:4]))
-            state, mtbrake, mtable, error_code, warn_code = rx_data[4:9]
-            angles = convert.bytes_to_fp32s(rx_data[9:7 * 4 + 9], 7)
-            pose = convert.bytes_to_fp32s(rx_data[37:6 * 4 + 37], 6)
-            cmd_num = convert.bytes_to_u16(rx_data[61:63])
-            pose_offset = convert.bytes_to_fp32s(rx_data[63:6 * 4 + 63], 6)
-
-            if error_code != self._error_code or warn_code != self._warn_code:
-                if error_code != self._error_code:
-                    self._error_code = error_code
-                    if self._error_code != 0:
-                        pretty_print('Error, code: {}'.format(self._error_code), color='red')
-                    else:
-                        pretty_print('Error had clean', color='blue')
-                if warn_code != self._warn_code:
-                    self._warn_code = warn_code
-                    if self._warn_code != 0:
-                        pretty_print('Warn, code: {}'.format(self._warn_code), color='yellow')
-                    else:
-                        pretty_print('Warnning had clean', color='blue')
-                self._report_error_warn_changed_callback()
-                logger.info('OnReport -> err={}, warn={}, state={}, cmdnum={}, mtbrake={}, mtable={}'.format(
-                    error_code, warn_code, state, cmd_num, mtbrake, mtable
-                ))
-            elif not self._only_report_err_warn_changed:
-                self._report_error_warn_changed_callback()
+    def _reactor_report_received(self):
+        # reactor io thread: the latest frame waits in the mailbox of the report socket, it is handled on the worker of the arm
+        with self._reactor_lock:
+            if self._reactor_report_pending:
+                return
+            self._reactor_report_pending = True
+        self._reactor_worker.submit(self._reactor_report_handle)
+
+    def _reactor_report_handle(self):
+        with self._reactor_lock:
+            self._reactor_report_pending = False
+        stream = self._stream_report
+        if stream is None or not self.connected or self._reactor_timer is None:
+            return
+        data = stream.read(0)
+        if data == -1:
+            return
+        try:
+            if self._is_old_protocol and convert.bytes_to_u32(data) > 256:
+                self._is_old_protocol = False
+            self._handle_report_data(data, stream.report_timestamp, stream.report_time)
+        except Exception as e:
+            logger.error(e)
 
-            if cmd_num != self._cmd_num:
-                self._cmd_num = cmd_num
-                self._report_cmdnum_changed_callback()
+    def _reactor_tick_submit(self):
+        with self._reactor_lock:
+            if self._reactor_tick_pending:
+                return
+            self._reactor_tick_pending = True
+        self._reactor_worker.submit(self._reactor_tick)
 
-            if state != self._state:
-                self._state = state
-                self._report_state_changed_callback()
+    def _reactor_tick(self):
+        """
+        Reactor mode replacement of the keepalive thread and the reconnect part of the report thread
+        """
+        with self._reactor_lock:
+            self._reactor_tick_pending = False
+        if self._reactor_timer is None:
+            return
+        if not self.connected:
+            self._connection_lost()
+            return
+        ticks = self._reactor_ticks
+        curr_time = time.monotonic()
+        try:
+            if not self._keepalive_tick(ticks):
+                self._connection_lost()
+                return
+            if self._enable_report:
+                if self.reported:
+                    if not ticks['reported']:
+                        ticks['reported'] = True
+                        self._report_connect_changed_callback(True, True)
+                else:
+                    if ticks['reported']:
+                        ticks['reported'] = False
+                        self._report_connect_changed_callback(True, False)
+                    if self._stream_report is not None:
+                        self._stream_report.close()
+                        self._stream_report = None
+                        ticks['report_connect'] = curr_time
+                    elif curr_time - ticks['report_connect'] >= 2:
+                        ticks['report_connect'] = curr_time
+                        self._connect_report(reconnect=True)
+        except Exception as e:
+            logger.error(e)
 
-            mtbrake = [mtbrake & 0x01, mtbrake >> 1 & 0x01, mtbrake >> 2 & 0x01, mtbrake >> 3 & 0x01,
-                       mtbrake >> 4 & 0x01, mtbrake >> 5 & 0x01, mtbrake >> 6 & 0x01, mtbrake >> 7 & 0x01]
-            mtable = [mtable & 0x01, mtable >> 1 & 0x01, mtable >> 2 & 0x01, mtable >> 3 & 0x01,
-                      mtable >> 4 & 0x01, mtable >> 5 & 0x01, mtable >> 6 & 0x01, mtable >> 7 & 0x01]
+    def _handle_report_data(self, data, timestamp=None, recv_time=None):
+        """
+        :param timestamp: host time (time.monotonic()) of the frame, default is now, see Port._read_report
+        :param recv_time: host time when the frame was received, default is now
+        """
+        now = time.monotonic()
+        self._report_timestamp = now if timestamp is None else timestamp
+        self._report_recv_time = now if recv_time is None else recv_time
+        is_sync, need_sync = self._is_sync, self._need_sync
+        last_frame = self._report_frame
+        try:
+            if self._report_type == 'real':
+                self._handle_report_real(ReportFrame(report_codec.REAL, data))
+            elif self._report_type == 'rich':
+                if self._is_old_protocol:
+                    self._handle_report_rich_old(ReportFrame(report_codec.RICH_OLD, data))
+                else:
+                    self._handle_report_rich(ReportFrame(report_codec.RICH, data))
+            else:
+                if self._is_old_protocol:
+                    self._handle_report_normal_old(ReportFrame(report_codec.NORMAL_OLD, data))
+                else:
+                    self._handle_report_normal(ReportFrame(report_codec.NORMAL, data))
+        except Exception as e:
+            logger.error(e)
+        if last_frame is not None and last_frame is not self._report_frame:
+            # the slot of the replaced frame is reused after the next read, see Port._read_report
+            last_frame.release()
+        self._notify_robot_state(force=self._is_sync != is_sync or self._need_sync != need_sync)
+
+    def _reset_params_by_error(self, error_code, linear_track_speed):
+        reset_tgpio_params = False
+        reset_linear_track_params = False
+        if 0 < error_code <= 17:
+            reset_tgpio_params = True
+            reset_linear_track_params = True
+        elif error_code in [19, 28]:
+            reset_tgpio_params = True
+        elif error_code == 111:
+            reset_linear_track_params = True
+        if reset_tgpio_params:
+            self.modbus_baud = -1
+            self.robotiq_is_activated = False
+            self.gripper_is_enabled = False
+            self.bio_gripper_is_enabled = False
+            self.bio_gripper_speed = 0
+            self.gripper_is_enabled = False
+            self.gripper_speed = 0
+            self.gripper_version_numbers = [-1, -1, -1]
+        if reset_linear_track_params:
+            self.linear_track_baud = -1
+            self.linear_track_is_enabled = False
+            self.linear_track_speed = linear_track_speed
 
-            if mtbrake != self._arm_motor_brake_states or mtable != self._arm_motor_enable_states:
-                self._arm_motor_enable_states = mtable
-                self._arm_motor_brake_states = mtbrake
-                self._report_mtable_mtbrake_changed_callback()
+    def _update_ready_by_report(self, state, mtbrake, mtable):
+        # mtbrake, mtable: the bytes of the report, bit i is the motor i + 1
+        if not self._is_first_report:
+            mask = (1 << self.axis) - 1
+            self._is_ready = state not in [4, 5] and mtbrake & mtable & mask == mask
+        else:
+            self._is_ready = False
+        self._is_first_report = False
+        if not self._is_ready:
+            self._sleep_finish_time = 0
 
-            if not self._is_first_report:
-                if state in [4, 5] or not all([bool(item[0] & item[1]) for item in zip(mtbrake, mtable)][:self.axis]):
-                    # if self._is_ready:
-                    #     pretty_print('[report], xArm is not ready to move', color='red')
-                    self._is_ready = False
+    def _handle_report_normal_old(self, frame):
+        report_time = time.monotonic()
+        interval = report_time - self._last_report_time
+        self._max_report_interval = max(self._max_report_interval, interval)
+        self._last_report_time = report_time
+        state, mtbrake, mtable, error_code, warn_code = frame.state, frame.mtbrake, frame.mtable, frame.error_code, frame.warn_code
+        cmd_num = frame.cmd_num
+        last_frame = self._report_frame
+
+        if error_code != self._error_code or warn_code != self._warn_code:
+            if error_code != self._error_code:
+                self._error_code = error_code
+                if self._error_code != 0:
+                    pretty_print('Error, code: {}'.format(self._error_code), color='red')
                 else:
-                    # if not self._is_ready:
-                    #     pretty_print('[report], xArm is ready to move', color='green')
-                    self._is_ready = True
-            else:
-                self._is_ready = False
-            self._is_first_report = False
-            if not self._is_ready:
-                self._sleep_finish_time = 0
+                    pretty_print('Error had clean', color='blue')
+            if warn_code != self._warn_code:
+                self._warn_code = warn_code
+                if self._warn_code != 0:
+                    pretty_print('Warn, code: {}'.format(self._warn_code), color='yellow')
+                else:
+                    pretty_print('Warnning had clean', color='blue')
+            self._report_error_warn_changed_callback()
+            logger.info('OnReport -> err={}, warn={}, state={}, cmdnum={}, mtbrake={}, mtable={}'.format(
+                error_code, warn_code, state, cmd_num, mtbrake, mtable
+            ))
+        elif not self._only_report_err_warn_changed:
+            self._report_error_warn_changed_callback()
+
+        if cmd_num != self._cmd_num:
+            self._cmd_num = cmd_num
+            self._report_cmdnum_changed_callback()
 
-            reset_tgpio_params = False
-            reset_linear_track_params = False
-            if 0 < error_code <= 17:
-                reset_tgpio_params = True
-                reset_linear_track_params = True
-            elif error_code in [19, 28]:
-                reset_tgpio_params = True
-            elif error_code == 111:
-                reset_linear_track_params = True
-            if reset_tgpio_params:
-                self.modbus_baud = -1
-                self.robotiq_is_activated = False
-                self.gripper_is_enabled = False
-                self.bio_gripper_is_enabled = False
-                self.bio_gripper_speed = 0
-                self.gripper_is_enabled = False
-                self.gripper_speed = 0
-                self.gripper_version_numbers = [-1, -1, -1]
-            if reset_linear_track_params:
-                self.linear_track_baud = -1
-                self.linear_track_is_enabled = False
-                self.linear_track_speed = 1
-
-            # if error_code in [1, 10, 11, 12, 13, 14, 15, 16, 17, 19, 28]:
-            #     self.modbus_baud = -1
-            #     self.robotiq_is_activated = False
-            #     self.gripper_is_enabled = False
-            #     self.bio_gripper_is_enabled = False
-            #     self.bio_gripper_speed = 0
-            #     self.gripper_is_enabled = False
-            #     self.gripper_speed = 0
-            #     self.gripper_version_numbers = [-1, -1, -1]
-            #     self.linear_track_is_enabled = False
-            #     self.linear_track_speed = 0
-
-            self._error_code = error_code
-            self._warn_code = warn_code
-            self.arm_cmd.has_err_warn = error_code != 0 or warn_code != 0
-            _state = self._state
+        if state != self._state:
             self._state = state
-            if self.state != 3 and (_state == 3 or self._pause_cnts > 0):
-                with self._pause_cond:
-                    self._pause_cond.notifyAll()
+            self._report_state_changed_callback()
+
+        # the brake/enable states are decoded from the frame on access, see _arm_motor_brake_states
+        self._report_frame = frame
+        if last_frame is None or mtbrake != last_frame.mtbrake or mtable != last_frame.mtable:
+            self._report_mtable_mtbrake_changed_callback()
+
+        self._update_ready_by_report(state, mtbrake, mtable)
+
+        self._reset_params_by_error(error_code, 1)
+
+        self._error_code = error_code
+        self._warn_code = warn_code
+        self.arm_cmd.has_err_warn = error_code != 0 or warn_code != 0
+        _state = self._state
+        self._state = state
+        if self.state != 3 and (_state == 3 or self._pause_cnts > 0):
+            with self._pause_cond:
+                self._pause_cond.notifyAll()
+        self._cmd_num = cmd_num
+
+        update_time = time.monotonic()
+        self._last_update_cmdnum_time = update_time
+        self._last_update_state_time = update_time
+        self._last_update_err_time = update_time
+
+        if not (0 < self._error_code <= 17):
+            self._position = filter_invaild_numbers(frame.pose, POSE_NDIGITS, self._position)
+            self._angles = filter_invaild_numbers(frame.angles, ANGLE_NDIGITS, self._angles)
+            self._position_offset = filter_invaild_numbers(frame.pose_offset, POSE_NDIGITS, self._position_offset)
+
+        self._publish_robot_state(frame)
+        self._report_location_callback()
+
+        self._report_callback()
+        if not self._is_sync and self._error_code == 0 and self._state not in [4, 5, 6]:
+            self._sync()
+            self._is_sync = True
+
+    def _handle_report_rich_old(self, frame):
+        self._handle_report_normal_old(frame)
+        arm_axis = frame.arm_ids[1]
+        if 7 >= arm_axis >= 5:
+            self._arm_axis = arm_axis
+        arm_type = frame.arm_ids[0]
+        if arm_type == 5:
+            self._arm_axis = 5
+        elif arm_type == 6:
+            self._arm_axis = 6
+        elif arm_type == 3:
+            self._arm_axis = 7
+        self._first_report_over = True
+
+    def _handle_report_real(self, frame):
+        state_mode = frame.state_mode
+        state, mode = state_mode & 0x0F, state_mode >> 4
+        cmd_num = frame.cmd_num
+        self._report_frame = frame
+        if cmd_num != self._cmd_num:
             self._cmd_num = cmd_num
-            self._arm_motor_brake_states = mtbrake
-            self._arm_motor_enable_states = mtable
-
-            update_time = time.monotonic()
-            self._last_update_cmdnum_time = update_time
-            self._last_update_state_time = update_time
-            self._last_update_err_time = update_time
-
-            for i in range(len(pose)):
-                pose[i] = filter_invaild_number(pose[i], 3 if i < 3 else 6, default=self._position[i])
-            for i in range(len(angles)):
-                angles[i] = filter_invaild_number(angles[i], 6, default=self._angles[i])
-            for i in range(len(pose_offset)):
-                pose_offset[i] = filter_invaild_number(pose_offset[i], 3 if i < 3 else 6, default=self._position_offset[i])
-
-            if not (0 < self._error_code <= 17):
-                self._position = pose
-            if not (0 < self._error_code <= 17):
-                self._angles = angles
-            if not (0 < self._error_code <= 17):
-                self._position_offset = pose_offset
-
-            self._report_location_callback()
-
-            self._report_callback()
-            if not self._is_sync and self._error_code == 0 and self._state not in [4, 5, 6]:
-                self._sync()
-                self._is_sync = True
-
-        def __handle_report_rich_old(rx_data):
-            __handle_report_normal_old(rx_data)
-            (self._arm_type,
-             arm_axis,
-             self._arm_master_id,
-             self._arm_slave_id,
-             self._arm_motor_tid,
-             self._arm_motor_fid) = rx_data[87:93]
-
-            if 7 >= arm_axis >= 5:
-                self._arm_axis = arm_axis
-            if self._arm_type == 5:
-                self._arm_axis = 5
-            elif self._arm_type == 6:
-                self._arm_axis = 6
-            elif self._arm_type == 3:
-                self._arm_axis = 7
-
-            ver_msg = rx_data[93:122]
-            # self._version = str(ver_msg, 'utf-8')
-
-            trs_msg = convert.bytes_to_fp32s(rx_data[123:143], 5)
-            # trs_msg = [i[0] for i in trs_msg]
-            (self._tcp_jerk,
-             self._min_tcp_acc,
-             self._max_tcp_acc,
-             self._min_tcp_speed,
-             self._max_tcp_speed) = trs_msg
-            # print('tcp_jerk: {}, min_acc: {}, max_acc: {}, min_speed: {}, max_speed: {}'.format(
-            #     self._tcp_jerk, self._min_tcp_acc, self._max_tcp_acc, self._min_tcp_speed, self._max_tcp_speed
-            # ))
-
-            p2p_msg = convert.bytes_to_fp32s(rx_data[143:163], 5)
-            # p2p_msg = [i[0] for i in p2p_msg]
-            (self._joint_jerk,
-             self._min_joint_acc,
-             self._max_joint_acc,
-             self._min_joint_speed,
-             self._max_joint_speed) = p2p_msg
-            # print('joint_jerk: {}, min_acc: {}, max_acc: {}, min_speed: {}, max_speed: {}'.format(
-            #     self._joint_jerk, self._min_joint_acc, self._max_joint_acc,
-            #     self._min_joint_speed, self._max_joint_speed
-            # ))
-
-            rot_msg = convert.bytes_to_fp32s(rx_data[163:171], 2)
-            # rot_msg = [i[0] for i in rot_msg]
-            self._rot_jerk, self._max_rot_acc = rot_msg
-            # print('rot_jerk: {}, mac_acc: {}'.format(self._rot_jerk, self._max_rot_acc))
-
-            sv3_msg = convert.bytes_to_u16s(rx_data[171:187], 8)
-            self._first_report_over = True
-
-        def __handle_report_real(rx_data):
-            state, mode = rx_data[4] & 0x0F, rx_data[4] >> 4
-            cmd_num = convert.bytes_to_u16(rx_data[5:7])
-            angles = convert.bytes_to_fp32s(rx_data[7:7 * 4 + 7], 7)
-            pose = convert.bytes_to_fp32s(rx_data[35:6 * 4 + 35], 6)
-            torque = convert.bytes_to_fp32s(rx_data[59:7 * 4 + 59], 7)
-            if cmd_num != self._cmd_num:
-                self._cmd_num = cmd_num
-                self._report_cmdnum_changed_callback()
-            if state != self._state:
-                self._state = state
-                self._report_state_changed_callback()
-            if state in [4, 5]:
-                self._is_ready = False
-            else:
-                self._is_ready = True
-
-            if mode != self._mode:
-                self._mode = mode
-                self._report_mode_changed_callback()
-            for i in range(len(pose)):
-                pose[i] = filter_invaild_number(pose[i], 3 if i < 3 else 6, default=self._position[i])
-            for i in range(len(angles)):
-                angles[i] = filter_invaild_number(angles[i], 6, default=self._angles[i])
-
-            if not (0 < self._error_code <= 17):
-                self._position = pose
-            if not (0 < self._error_code <= 17):
-                self._angles = angles
-            self._joints_torque = torque
-
-            self._report_location_callback()
-
-            self._report_callback()
-            if not self._is_sync and self._state not in [4, 5]:
-                self._sync()
-                self._is_sync = True
-            length = len(rx_data)
-            if length >= 135:
-                # FT_SENSOR
-                self._ft_ext_force = convert.bytes_to_fp32s(rx_data[87:111], 6)
-                self._ft_raw_force = convert.bytes_to_fp32s(rx_data[111:135], 6)
-
-        def __handle_report_normal(rx_data):
-            report_time = time.monotonic()
-            interval = report_time - self._last_report_time
-            self._max_report_interval = max(self._max_report_interval, interval)
-            self._last_report_time = report_time
-            # print('length:', convert.bytes_to_u32(rx_data[0:4]), len(rx_data))
-            state, mode = rx_data[4] & 0x0F, rx_data[4] >> 4
-            # if state != self._state or mode != self._mode:
-            #     print('mode: {}, state={}, time={}'.format(mode, state, time.monotonic()))
-            cmd_num = convert.bytes_to_u16(rx_data[5:7])
-            angles = convert.bytes_to_fp32s(rx_data[7:7 * 4 + 7], 7)
-            pose = convert.bytes_to_fp32s(rx_data[35:6 * 4 + 35], 6)
-            torque = convert.bytes_to_fp32s(rx_data[59:7 * 4 + 59], 7)
-            mtbrake, mtable, error_code, warn_code = rx_data[87:91]
-            pose_offset = convert.bytes_to_fp32s(rx_data[91:6 * 4 + 91], 6)
-            tcp_load = convert.bytes_to_fp32s(rx_data[115:4 * 4 + 115], 4)
-            collis_sens, teach_sens = rx_data[131:133]
-            # if (collis_sens not in list(range(6)) or teach_sens not in list(range(6))) \
-            #         and ((error_code != 0 and error_code not in controller_error_keys) or (warn_code != 0 and warn_code not in controller_warn_keys)):
-            #     self._stream_report.close()
-            #     logger.warn('ReportDataException: data={}'.format(rx_data))
-            #     return
-            length = convert.bytes_to_u32(rx_data[0:4])
-            data_len = len(rx_data)
-            if (length != data_len and (length != 233 or data_len != 245)) or collis_sens not in list(range(6)) or teach_sens not in list(range(6)) \
-                or mode not in list(range(12)) or state not in list(range(10)):
-                self._stream_report.close()
-                logger.warn('ReportDataException: length={}, data_len={}, '
-                            'state={}, mode={}, collis_sens={}, teach_sens={}, '
-                            'error_code={}, warn_code={}'.format(
-                    length, data_len,
-                    state, mode, collis_sens, teach_sens, error_code, warn_code
-                ))
-                return
-            self._gravity_direction = convert.bytes_to_fp32s(rx_data[133:3*4 + 133], 3)
-
-            reset_tgpio_params = False
-            reset_linear_track_params = False
-            if 0 < error_code <= 17:
-                reset_tgpio_params = True
-                reset_linear_track_params = True
-            elif error_code in [19, 28]:
-                reset_tgpio_params = True
-            elif error_code == 111:
-                reset_linear_track_params = True
-            if reset_tgpio_params:
-                self.modbus_baud = -1
-                self.robotiq_is_activated = False
-                self.gripper_is_enabled = False
-                self.bio_gripper_is_enabled = False
-                self.bio_gripper_speed = 0
-                self.gripper_is_enabled = False
-                self.gripper_speed = 0
-                self.gripper_version_numbers = [-1, -1, -1]
-            if reset_linear_track_params:
-                self.linear_track_baud = -1
-                self.linear_track_is_enabled = False
-                self.linear_track_speed = 0
-
-            # if error_code in [1, 10, 11, 12, 13, 14, 15, 16, 17, 19, 28]:
-            #     self.modbus_baud = -1
-            #     self.robotiq_is_activated = False
-            #     self.gripper_is_enabled = False
-            #     self.bio_gripper_is_enabled = False
-            #     self.bio_gripper_speed = -1
-            #     self.gripper_speed = -1
-            #     self.gripper_version_numbers = [-1, -1, -1]
-            #     self.linear_track_is_enabled = False
-            #     self.linear_track_speed = -1
-
-            # print('torque: {}'.format(torque))
-            # print('tcp_load: {}'.format(tcp_load))
-            # print('collis_sens: {}, teach_sens: {}'.format(collis_sens, teach_sens))
-
-            if error_code != self._error_code or warn_code != self._warn_code:
-                if error_code != self._error_code:
-                    self._error_code = error_code
-                    if self._error_code != 0:
-                        pretty_print('ControllerError, code: {}'.format(self._error_code), color='red')
-                    else:
-                        pretty_print('ControllerError had clean', color='blue')
-                if warn_code != self._warn_code:
-                    self._warn_code = warn_code
-                    if self._warn_code != 0:
-                        pretty_print('ControllerWarning, code: {}'.format(self._warn_code), color='yellow')
-                    else:
-                        pretty_print('ControllerWarning had clean', color='blue')
-                self._report_error_warn_changed_callback()
-                logger.info('OnReport -> err={}, warn={}, state={}, cmdnum={}, mtbrake={}, mtable={}, mode={}'.format(
-                    error_code, warn_code, state, cmd_num, mtbrake, mtable, mode
-                ))
-            elif not self._only_report_err_warn_changed:
-                self._report_error_warn_changed_callback()
+            self._report_cmdnum_changed_callback()
+        if state != self._state:
+            self._state = state
+            self._report_state_changed_callback()
+        if state in [4, 5]:
+            self._is_ready = False
+        else:
+            self._is_ready = True
 
-            if cmd_num != self._cmd_num:
-                self._cmd_num = cmd_num
-                self._report_cmdnum_changed_callback()
+        if mode != self._mode:
+            self._mode = mode
+            self._report_mode_changed_callback()
+
+        if not (0 < self._error_code <= 17):
+            self._position = filter_invaild_numbers(frame.pose, POSE_NDIGITS, self._position)
+            self._angles = filter_invaild_numbers(frame.angles, ANGLE_NDIGITS, self._angles)
+
+        self._publish_robot_state(frame)
+        self._report_location_callback()
+
+        self._report_callback()
+        if not self._is_sync and self._state not in [4, 5]:
+            self._sync()
+            self._is_sync = True
+
+    def _handle_report_normal(self, frame):
+        report_time = time.monotonic()
+        interval = report_time - self._last_report_time
+        self._max_report_interval = max(self._max_report_interval, interval)
+        self._last_report_time = report_time
+        state_mode = frame.state_mode
+        state, mode = state_mode & 0x0F, state_mode >> 4
+        cmd_num = frame.cmd_num
+        mtbrake, mtable, error_code, warn_code = frame.mtbrake, frame.mtable, frame.error_code, frame.warn_code
+        collis_sens, teach_sens = frame.collis_sens, frame.teach_sens
+        length, data_len = frame.length, frame.size
+        if (length != data_len and (length != 233 or data_len != 245)) or not 0 <= collis_sens < 6 \
+                or not 0 <= teach_sens < 6 or not 0 <= mode < 12 or not 0 <= state < 10:
+            self._stream_report.close()
+            logger.warn('ReportDataException: length={}, data_len={}, '
+                        'state={}, mode={}, collis_sens={}, teach_sens={}, '
+                        'error_code={}, warn_code={}'.format(
+                length, data_len,
+                state, mode, collis_sens, teach_sens, error_code, warn_code
+            ))
+            return
+        # the rarely used fields are decoded from the frame on access, see the ReportAttribute of Base
+        last_frame = self._report_frame
+        self._report_frame = frame
 
-            if state != self._state:
-                if not self._has_motion_cmd and self._state in [0, 1] and state not in [0, 1]:
-                    self._need_sync = True
-                if self._state in [0, 1] and state not in [0, 1]:
-                    self._has_motion_cmd = False
-                # print('old_state: {}, new_state: {}, has_motion_cmd={}, need_sync: {}'.format(self._state, state, self._has_motion_cmd, self._need_sync))
-                self._state = state
-                self._report_state_changed_callback()
-            if mode != self._mode:
-                self._mode = mode
-                self._report_mode_changed_callback()
-
-            mtbrake = [mtbrake & 0x01, mtbrake >> 1 & 0x01, mtbrake >> 2 & 0x01, mtbrake >> 3 & 0x01,
-                       mtbrake >> 4 & 0x01, mtbrake >> 5 & 0x01, mtbrake >> 6 & 0x01, mtbrake >> 7 & 0x01]
-            mtable = [mtable & 0x01, mtable >> 1 & 0x01, mtable >> 2 & 0x01, mtable >> 3 & 0x01,
-                      mtable >> 4 & 0x01, mtable >> 5 & 0x01, mtable >> 6 & 0x01, mtable >> 7 & 0x01]
-
-            if mtbrake != self._arm_motor_brake_states or mtable != self._arm_motor_enable_states:
-                self._arm_motor_enable_states = mtable
-                self._arm_motor_brake_states = mtbrake
-                self._report_mtable_mtbrake_changed_callback()
-
-            if not self._is_first_report:
-                if state in [4, 5] or not all([bool(item[0] & item[1]) for item in zip(mtbrake, mtable)][:self.axis]):
-                    # if self._is_ready:
-                    #     pretty_print('[report], xArm is not ready to move', color='red')
-                    self._is_ready = False
+        self._reset_params_by_error(error_code, 0)
+
+        if error_code != self._error_code or warn_code != self._warn_code:
+            if error_code != self._error_code:
+                self._error_code = error_code
+                if self._error_code != 0:
+                    pretty_print('ControllerError, code: {}'.format(self._error_code), color='red')
                 else:
-                    # if not self._is_ready:
-                    #     pretty_print('[report], xArm is ready to move', color='green')
-                    self._is_ready = True
-            else:
-                self._is_ready = False
-            self._is_first_report = False
-            if not self._is_ready:
-                self._sleep_finish_time = 0
+                    pretty_print('ControllerError had clean', color='blue')
+            if warn_code != self._warn_code:
+                self._warn_code = warn_code
+                if self._warn_code != 0:
+                    pretty_print('ControllerWarning, code: {}'.format(self._warn_code), color='yellow')
+                else:
+                    pretty_print('ControllerWarning had clean', color='blue')
+            self._report_error_warn_changed_callback()
+            logger.info('OnReport -> err={}, warn={}, state={}, cmdnum={}, mtbrake={}, mtable={}, mode={}'.format(
+                error_code, warn_code, state, cmd_num, mtbrake, mtable, mode
+            ))
+        elif not self._only_report_err_warn_changed:
+            self._report_error_warn_changed_callback()
+
+        if cmd_num != self._cmd_num:
+            self._cmd_num = cmd_num
+            self._report_cmdnum_changed_callback()
 
-            self._error_code = error_code
-            self._warn_code = warn_code
-            self.arm_cmd.has_err_warn = error_code != 0 or warn_code != 0
-            _state = self._state
+        if state != self._state:
+            if not self._has_motion_cmd and self._state in [0, 1] and state not in [0, 1]:
+                self._need_sync = True
+            if self._state in [0, 1] and state not in [0, 1]:
+                self._has_motion_cmd = False
             self._state = state
-            if self.state != 3 and (_state == 3 or self._pause_cnts > 0):
-                with self._pause_cond:
-                    self._pause_cond.notifyAll()
+            self._report_state_changed_callback()
+        if mode != self._mode:
             self._mode = mode
-            self._cmd_num = cmd_num
+            self._report_mode_changed_callback()
 
-            update_time = time.monotonic()
-            self._last_update_cmdnum_time = update_time
-            self._last_update_state_time = update_time
-            self._last_update_err_time = update_time
+        if last_frame is None or mtbrake != last_frame.mtbrake or mtable != last_frame.mtable:
+            self._report_mtable_mtbrake_changed_callback()
 
-            self._arm_motor_brake_states = mtbrake
-            self._arm_motor_enable_states = mtable
-            self._joints_torque = torque
-            if compare_version(self.version_number, (0, 2, 0)):
-                self._tcp_load = [float('{:.3f}'.format(tcp_load[0])), [float('{:.3f}'.format(i)) for i in tcp_load[1:]]]
-            else:
-                self._tcp_load = [float('{:.3f}'.format(tcp_load[0])), [float('{:.3f}'.format(i * 1000)) for i in tcp_load[1:]]]
-            self._collision_sensitivity = collis_sens
-            self._teach_sensitivity = teach_sens
-
-            for i in range(len(pose)):
-                pose[i] = filter_invaild_number(pose[i], 3 if i < 3 else 6, default=self._position[i])
-            for i in range(len(angles)):
-                angles[i] = filter_invaild_number(angles[i], 6, default=self._angles[i])
-            for i in range(len(pose_offset)):
-                pose_offset[i] = filter_invaild_number(pose_offset[i], 3 if i < 3 else 6, default=self._position_offset[i])
-
-            if not (0 < self._error_code <= 17):
-                self._position = pose
-            if not (0 < self._error_code <= 17):
-                self._angles = angles
-            if not (0 < self._error_code <= 17):
-                self._position_offset = pose_offset
-
-            self._report_location_callback()
-
-            self._report_callback()
-            if not self._is_sync and self._error_code == 0 and self._state not in [4, 5]:
-                self._sync()
-                self._is_sync = True
-            elif self._need_sync:
-                self._need_sync = False
-                self._sync()
-
-        def __handle_report_rich(rx_data):
-            # print('interval={}, max_interval={}'.format(interval, self._max_report_interval))
-            __handle_report_normal(rx_data)
-            (self._arm_type,
-             arm_axis,
-             self._arm_master_id,
-             self._arm_slave_id,
-             self._arm_motor_tid,
-             self._arm_motor_fid) = rx_data[145:151]
-
-            if 7 >= arm_axis >= 5:
-                self._arm_axis = arm_axis
-
-            # self._version = str(rx_data[151:180], 'utf-8')
-
-            trs_msg = convert.bytes_to_fp32s(rx_data[181:201], 5)
-            # trs_msg = [i[0] for i in trs_msg]
-            (self._tcp_jerk,
-             self._min_tcp_acc,
-             self._max_tcp_acc,
-             self._min_tcp_speed,
-             self._max_tcp_speed) = trs_msg
-            # print('tcp_jerk: {}, min_acc: {}, max_acc: {}, min_speed: {}, max_speed: {}'.format(
-            #     self._tcp_jerk, self._min_tcp_acc, self._max_tcp_acc, self._min_tcp_speed, self._max_tcp_speed
-            # ))
-
-            p2p_msg = convert.bytes_to_fp32s(rx_data[201:221], 5)
-            # p2p_msg = [i[0] for i in p2p_msg]
-            (self._joint_jerk,
-             self._min_joint_acc,
-             self._max_joint_acc,
-             self._min_joint_speed,
-             self._max_joint_speed) = p2p_msg
-            # print('joint_jerk: {}, min_acc: {}, max_acc: {}, min_speed: {}, max_speed: {}'.format(
-            #     self._joint_jerk, self._min_joint_acc, self._max_joint_acc,
-            #     self._min_joint_speed, self._max_joint_speed
-            # ))
-
-            rot_msg = convert.bytes_to_fp32s(rx_data[221:229], 2)
-            # rot_msg = [i[0] for i in rot_msg]
-            self._rot_jerk, self._max_rot_acc = rot_msg
-            # print('rot_jerk: {}, mac_acc: {}'.format(self._rot_jerk, self._max_rot_acc))
-
-            servo_codes = [val for val in rx_data[229:245]]
-            for i in range(self.axis):
-                if self._servo_codes[i][0] != servo_codes[i * 2] or self._servo_codes[i][1] != servo_codes[i * 2 + 1]:
-                    print('servo_error_code, servo_id={}, status={}, code={}'.format(i + 1, servo_codes[i * 2], servo_codes[i * 2 + 1]))
-                self._servo_codes[i][0] = servo_codes[i * 2]
-                self._servo_codes[i][1] = servo_codes[i * 2 + 1]
-
-            self._first_report_over = True
-
-            # length = convert.bytes_to_u32(rx_data[0:4])
-            length = len(rx_data)
-            if length >= 252:
-                temperatures = list(map(int, rx_data[245:252]))
-                if temperatures != self.temperatures:
-                    self._temperatures = temperatures
-                    self._report_temperature_changed_callback()
-            if length >= 284:
-                speeds = convert.bytes_to_fp32s(rx_data[252:8 * 4 + 252], 8)
-                self._realtime_tcp_speed = speeds[0]
-                self._realtime_joint_speeds = speeds[1:]
-                # print(speeds[0], speeds[1:])
-            if length >= 288:
-                count = convert.bytes_to_u32(rx_data[284:288])
-                # print(count, rx_data[284:288])
-                if self._count != -1 and count != self._count:
-                    self._count = count
-                    self._report_count_changed_callback()
-                self._count = count
-            if length >= 312:
-                world_offset = convert.bytes_to_fp32s(rx_data[288:6 * 4 + 288], 6)
-                for i in range(len(world_offset)):
-                    if i < 3:
-                        world_offset[i] = float('{:.3f}'.format(world_offset[i]))
-                    else:
-                        world_offset[i] = float('{:.6f}'.format(world_offset[i]))
-                if math.inf not in world_offset and -math.inf not in world_offset and not (10 <= self._error_code <= 17):
-                    self._world_offset = world_offset
-            if length >= 314:
-                self._cgpio_reset_enable, self._tgpio_reset_enable = rx_data[312:314]
-            if length >= 417:
-                self._is_simulation_robot = bool(rx_data[314])
-                self._is_collision_detection, self._collision_tool_type = rx_data[315:317]
-                self._collision_tool_params = convert.bytes_to_fp32s(rx_data[317:341], 6)
-
-                voltages = convert.bytes_to_u16s(rx_data[341:355], 7)
-                voltages = list(map(lambda x: x / 100, voltages))
-                self._voltages = voltages
-
-                currents = convert.bytes_to_fp32s(rx_data[355:383], 7)
-                self._currents = currents
-
-                cgpio_states = []
-                cgpio_states.extend(rx_data[383:385])
-                cgpio_states.extend(convert.bytes_to_u16s(rx_data[385:401], 8))
-                cgpio_states[6:10] = list(map(lambda x: x / 4095.0 * 10.0, cgpio_states[6:10]))
-                cgpio_states.append(list(map(int, rx_data[401:409])))
-                cgpio_states.append(list(map(int, rx_data[409:417])))
-                if self._control_box_type_is_1300 and length >= 433:
-                    cgpio_states[-2].extend(list(map(int, rx_data[417:425])))
-                    cgpio_states[-1].extend(list(map(int, rx_data[425:433])))
-                self._cgpio_states = cgpio_states
-            if length >= 481:
-                # FT_SENSOR
-                self._ft_ext_force = convert.bytes_to_fp32s(rx_data[433:457], 6)
-                self._ft_raw_force = convert.bytes_to_fp32s(rx_data[457:481], 6)
-            if length >= 482:
-                iden_progress = rx_data[481]
-                if iden_progress != self._iden_progress:
-                    self._iden_progress = iden_progress
-                    self._report_iden_progress_changed_callback()
-            if length >= 494:
-                pose_aa = convert.bytes_to_fp32s(rx_data[482:494], 3)
-                for i in range(len(pose_aa)):
-                    pose_aa[i] = filter_invaild_number(pose_aa[i], 6, default=self._pose_aa[i])
-                self._pose_aa = self._position[:3] + pose_aa
+        self._update_ready_by_report(state, mtbrake, mtable)
 
-        try:
-            if self._report_type == 'real':
-                __handle_report_real(data)
-            elif self._report_type == 'rich':
-                if self._is_old_protocol:
-                    __handle_report_rich_old(data)
-                else:
-                    __handle_report_rich(data)
-            else:
-                if self._is_old_protocol:
-                    __handle_report_normal_old(data)
-                else:
-                    __handle_report_normal(data)
-        except Exception as e:
-            logger.error(e)
+        self._error_code = error_code
+        self._warn_code = warn_code
+        self.arm_cmd.has_err_warn = error_code != 0 or warn_code != 0
+        _state = self._state
+        self._state = state
+        if self.state != 3 and (_state == 3 or self._pause_cnts > 0):
+            with self._pause_cond:
+                self._pause_cond.notifyAll()
+        self._mode = mode
+        self._cmd_num = cmd_num
+
+        update_time = time.monotonic()
+        self._last_update_cmdnum_time = update_time
+        self._last_update_state_time = update_time
+        self._last_update_err_time = update_time
+
+        self._collision_sensitivity = collis_sens
+        self._teach_sensitivity = teach_sens
+
+        if not (0 < self._error_code <= 17):
+            self._position = filter_invaild_numbers(frame.pose, POSE_NDIGITS, self._position)
+            self._angles = filter_invaild_numbers(frame.angles, ANGLE_NDIGITS, self._angles)
+            self._position_offset = filter_invaild_numbers(frame.pose_offset, POSE_NDIGITS, self._position_offset)
+        # rich only, updated with the pose for the snapshot
+        pose_aa = getattr(frame, 'pose_aa', None)
+        if pose_aa is not None:
+            self._pose_aa = self._position[:3] + filter_invaild_numbers(pose_aa, ANGLE_NDIGITS, self._pose_aa)
+
+        self._publish_robot_state(frame)
+        self._report_location_callback()
+
+        self._report_callback()
+        if not self._is_sync and self._error_code == 0 and self._state not in [4, 5]:
+            self._sync()
+            self._is_sync = True
+        elif self._need_sync:
+            self._need_sync = False
+            self._sync()
+        return True
+
+    def _handle_report_rich(self, frame):
+        if not self._handle_report_normal(frame):
+            return
+        arm_axis = frame.arm_ids[1]
+        if 7 >= arm_axis >= 5:
+            self._arm_axis = arm_axis
+
+        servo_codes = frame.servo_codes
+        for i in range(self.axis):
+            if self._servo_codes[i][0] != servo_codes[i * 2] or self._servo_codes[i][1] != servo_codes[i * 2 + 1]:
+                print('servo_error_code, servo_id={}, status={}, code={}'.format(i + 1, servo_codes[i * 2], servo_codes[i * 2 + 1]))
+            self._servo_codes[i][0] = servo_codes[i * 2]
+            self._servo_codes[i][1] = servo_codes[i * 2 + 1]
+
+        self._first_report_over = True
+
+        # the optional sections of the newer firmwares, None if the frame is too short, see report_codec.RICH
+        temperatures = frame.temperatures
+        if temperatures is not None and temperatures != self.temperatures:
+            self._temperatures = temperatures
+            self._report_temperature_changed_callback()
+        count = frame.count
+        if count is not None:
+            if self._count != -1 and count != self._count:
+                self._count = count
+                self._report_count_changed_callback()
+            self._count = count
+        world_offset = frame.world_offset
+        if world_offset is not None and math.inf not in world_offset and -math.inf not in world_offset \
+                and not (10 <= self._error_code <= 17):
+            self._world_offset = [round(v, 3 if i < 3 else 6) for i, v in enumerate(world_offset)]
+        iden_progress = frame.iden_progress
+        if iden_progress is not None and iden_progress != self._iden_progress:
+            self._iden_progress = iden_progress
+            self._report_iden_progress_changed_callback()
 
     def _auto_get_report_thread(self):
         logger.debug('get report thread start')
@@ -1784,6 +2123,8 @@ class Base(BaseObject, Events):
                 elif not self._only_report_err_warn_changed and (self._error_code != 0 or self._warn_code != 0):
                     self._report_error_warn_changed_callback()
 
+                self._publish_robot_state()
+                self._notify_robot_state()
                 self._report_location_callback()
                 self._report_callback()
 
@@ -1939,36 +2280,43 @@ class Base(BaseObject, Events):
 
     def _check_mode_is_correct(self, mode, timeout=1):
         if self._enable_report and self._stream_type == 'socket':
-            cnt = int(10 * timeout)
-            while cnt > 0 and self.mode != mode:
-                time.sleep(0.1)
-                cnt -= 1
-            if self.mode != mode:
-                return False
+            return self.wait_for(lambda robot_state: True if self.mode == mode else None, timeout=timeout) is True
         return True
 
     @xarm_is_connected(_type='get')
     def get_version(self):
         ret = self.arm_cmd.get_version()
         ret[0] = self._check_code(ret[0])
+        self._update_version(ret)
+        return ret[0], self._version
+
+    def _update_version(self, ret):
         if ret[0] == 0:
             version = ''.join(list(map(chr, ret[1:])))
             self._version = version[:version.find('\0')]
-        return ret[0], self._version
 
     @xarm_is_connected(_type='get')
     def get_robot_sn(self):
         ret = self.arm_cmd.get_robot_sn()
         ret[0] = self._check_code(ret[0])
+        self._update_robot_sn(ret)
+        return ret[0], self._robot_sn
+
+    @staticmethod
+    def _parse_robot_sn(ret):
+        """
+        :return: (robot sn, control box sn) of the raw result of get_robot_sn
+        """
+        robot_sn = ''.join(list(map(chr, ret[1:])))
+        split_inx = robot_sn.find('\0')
+        control_box_sn = robot_sn[split_inx+1:]
+        return robot_sn[:split_inx], control_box_sn[:control_box_sn.find('\0')].strip()
+
+    def _update_robot_sn(self, ret):
         if ret[0] == 0:
-            robot_sn = ''.join(list(map(chr, ret[1:])))
-            split_inx = robot_sn.find('\0')
-            self._robot_sn = robot_sn[:split_inx]
-            control_box_sn = robot_sn[split_inx+1:]
-            self._control_box_sn = control_box_sn[:control_box_sn.find('\0')].strip()
+            self._robot_sn, self._control_box_sn = self._parse_robot_sn(ret)
             self._arm_type_is_1300 = int(self._robot_sn[2:6]) >= 1300 if self._robot_sn[2:6].isdigit() else False
             self._control_box_type_is_1300 = int(self._control_box_sn[2:6]) >= 1300 if self._control_box_sn[2:6].isdigit() else False
-        return ret[0], self._robot_sn
 
     @xarm_is_connected(_type='get')
     def check_verification(self):
@@ -2065,17 +2413,28 @@ class Base(BaseObject, Events):
             self._last_update_state_time = time.monotonic()
         return ret[0], ret[1] if ret[0] == 0 else self._state
 
+    def _priority_cmd(self):
+        return self.arm_cmd_503 if self._priority_via_503 and self.connected_503 else self.arm_cmd
+
     @xarm_is_connected(_type='set')
     def set_state(self, state=0):
         _state = self._state
-        ret = self.arm_cmd.set_state(state)
+        if state in [3, 4]:
+            # pause/stop never wait behind the round trip of another thread
+            ret = self._priority_cmd().priority_call('set_state', state)
+        else:
+            ret = self.arm_cmd.set_state(state)
         ret[0] = self._check_code(ret[0])
         if state == 4 and ret[0] == 0:
             # self._last_position[:6] = self.position
             # self._last_angles = self.angles
             self._sleep_finish_time = 0
             # self._is_sync = False
-        self.get_state()
+        if state in [3, 4]:
+            # read back without waiting for the lock either
+            self.arm_cmd.priority_call(self.get_state)
+        else:
+            self.get_state()
         if _state != self._state:
             self._report_state_changed_callback()
         if self.state != 3 and (_state == 3 or self._pause_cnts > 0):
@@ -2090,7 +2449,7 @@ class Base(BaseObject, Events):
             if not self._is_ready:
                 pretty_print('[set_state], xArm is ready to move', color='green')
             self._is_ready = True
-        self.log_api_info('API -> set_state({}) -> code={}, state={}'.format(state, ret[0], self._state), code=ret[0])
+        self.log_api_info('API -> set_state({}) -> code={}, state={}', state, ret[0], self._state, code=ret[0])
         return ret[0]
 
     @xarm_is_connected(_type='set')
@@ -2101,7 +2460,7 @@ class Base(BaseObject, Events):
             detection_param = -1
         ret = self.arm_cmd.set_mode(mode, detection_param=detection_param)
         ret[0] = self._check_code(ret[0])
-        self.log_api_info('API -> set_mode({}) -> code={}'.format(mode, ret[0]), code=ret[0])
+        self.log_api_info('API -> set_mode({}) -> code={}', mode, ret[0], code=ret[0])
         return ret[0]
 
     @xarm_is_connected(_type='get')
@@ -2132,6 +2491,7 @@ class Base(BaseObject, Events):
                          '获取控制器错误警告码' if lang == 'cn' else 'GetErrorWarnCode',
                          '状态' if lang == 'cn' else 'Status',
                          ret[0]), color='light_blue')
+            from ..core.config.x_code import ControllerError, ControllerWarn
             controller_error = ControllerError(self._error_code, status=0)
             controller_warn = ControllerWarn(self._warn_code, status=0)
             pretty_print('* {}: {}, {}: {}'.format(
@@ -2162,13 +2522,13 @@ class Base(BaseObject, Events):
             if not self._is_ready:
                 pretty_print('[clean_error], xArm is ready to move', color='green')
             self._is_ready = True
-        self.log_api_info('API -> clean_error -> code={}'.format(ret[0]), code=ret[0])
+        self.log_api_info('API -> clean_error -> code={}', ret[0], code=ret[0])
         return ret[0]
 
     @xarm_is_connected(_type='set')
     def clean_warn(self):
         ret = self.arm_cmd.clean_war()
-        self.log_api_info('API -> clean_warn -> code={}'.format(ret[0]), code=ret[0])
+        self.log_api_info('API -> clean_warn -> code={}', ret[0], code=ret[0])
         return ret[0]
 
     @xarm_is_connected(_type='set')
@@ -2192,23 +2552,96 @@ class Base(BaseObject, Events):
             if not self._is_ready:
                 pretty_print('[motion_enable], xArm is ready to move', color='green')
             self._is_ready = True
-        self.log_api_info('API -> motion_enable -> code={}'.format(ret[0]), code=ret[0])
+        self.log_api_info('API -> motion_enable -> code={}', ret[0], code=ret[0])
         return ret[0]
     
-    def wait_move(self, timeout=None):
-        if timeout is not None:
-            expired = time.monotonic() + timeout + (self._sleep_finish_time if self._sleep_finish_time > time.monotonic() else 0)
-        else:
-            expired = 0
-        _, state = self.get_state()
-        cnt = 0
-        max_cnt = 1 if _ == 0 and state == 1 else 10
-        while timeout is None or time.monotonic() < expired:
+    def _robot_state_is_fresh(self, max_age=0.5):
+        # the report keeps the robot state up to date, no need to poll over the command socket
+        # by the receive time, the synced timestamp may be earlier than the frame was received
+        return self._enable_report and self.reported and time.monotonic() - self._robot_state.recv_time < max_age
+
+    def wait_for(self, predicate, timeout=None, interval=0.1, source='report'):
+        """
+        Wait until the predicate is met, woken up by its event source instead of sleeping a fixed time
+        :param predicate: predicate(robot_state) => None to wait on, anything else is returned
+        :param timeout: seconds, None is no limit
+        :param interval: max seconds between two checks, the period of the poll if the source is 'poll'
+        :param source: what wakes up the wait
+            'report': the transitions of the robot state (state, mode, cmd_num, error_code) at once, see robot_state
+            'poll': the predicate polls the value itself (such as over modbus), checked every interval
+        :return: result of the predicate, APIState.NOT_CONNECTED if disconnected,
+            APIState.WAIT_FINISH_TIMEOUT if the predicate is not met in time
+        """
+        expired = time.monotonic() + timeout if timeout is not None else None
+        while True:
             if not self.connected:
-                self.log_api_info('wait_move, xarm is disconnect', code=APIState.NOT_CONNECTED)
                 return APIState.NOT_CONNECTED
+            robot_state = self._robot_state
+            check_time = time.monotonic()
+            result = predicate(robot_state)
+            if result is not None:
+                return result
+            curr_time = time.monotonic()
+            if expired is not None and curr_time >= expired:
+                return APIState.WAIT_FINISH_TIMEOUT
+            # the period is from the start of the check, the time of a poll is not added to it
+            wake_time = check_time + interval if expired is None else min(check_time + interval, expired)
+            wait_time = wake_time - curr_time
+            with self._robot_state_cond:
+                if source == 'poll':
+                    # only the disconnection cuts the period short
+                    while self.connected and wait_time > 0:
+                        self._robot_state_cond.wait(wait_time)
+                        wait_time = wake_time - time.monotonic()
+                elif self._robot_state is robot_state:
+                    self._robot_state_cond.wait(wait_time)
+
+    def _wait_move_by_report(self, expired):
+        """
+        wait_move by the robot state of the report, woken up by its transitions
+        :return: code, None if the report is not fresh any more (wait by polling then)
+        """
+        start = time.monotonic()
+        status = {'has_moved': self._robot_state.state == 1, 'stop_since': None}
+
+        def _check(robot_state):
+            if not self._robot_state_is_fresh():
+                return False
+            curr_time = time.monotonic()
+            if robot_state.error_code != 0:
+                self.log_api_info('wait_move, xarm has error, error={}', robot_state.error_code, code=APIState.HAS_ERROR)
+                return APIState.HAS_ERROR
+            if robot_state.mode != 0:
+                return 0
+            if robot_state.state >= 4:
+                self._sleep_finish_time = 0
+                self.log_api_info('wait_move, xarm is stop, state={}', robot_state.state, code=APIState.EMERGENCY_STOP)
+                return APIState.EMERGENCY_STOP
+            if curr_time < self._sleep_finish_time or robot_state.state in [1, 3]:
+                status['has_moved'] = True
+                status['stop_since'] = None
+            elif status['has_moved'] and robot_state.cmd_num == 0 and robot_state.recv_time >= start:
+                # stopped with no command left, reported after the wait started
+                return 0
+            else:
+                # stopped but commands left, or the motion has not started yet, same as polling
+                if status['stop_since'] is None:
+                    status['stop_since'] = curr_time
+                if curr_time - status['stop_since'] >= (0.1 if status['has_moved'] else 0.5):
+                    return 0
+            return None
+
+        # the interval bounds the time to notice a stale report or the end of a settle time
+        code = self.wait_for(_check, timeout=max(expired - start, 0) if expired is not None else None, interval=0.02)
+        return None if code is False else code
+
+    def _wait_move_by_poll(self, expired):
+        _, state = self.get_state()
+        status = {'cnt': 0, 'max_cnt': 1 if _ == 0 and state == 1 else 10}
+
+        def _check(robot_state):
             if self.error_code != 0:
-                self.log_api_info('wait_move, xarm has error, error={}'.format(self.error_code), code=APIState.HAS_ERROR)
+                self.log_api_info('wait_move, xarm has error, error={}', self.error_code, code=APIState.HAS_ERROR)
                 return APIState.HAS_ERROR
             if self.mode != 0:
                 return 0
@@ -2217,24 +2650,35 @@ class Base(BaseObject, Events):
                 return code
             if state >= 4:
                 self._sleep_finish_time = 0
-                self.log_api_info('wait_move, xarm is stop, state={}'.format(state), code=APIState.EMERGENCY_STOP)
+                self.log_api_info('wait_move, xarm is stop, state={}', state, code=APIState.EMERGENCY_STOP)
                 return APIState.EMERGENCY_STOP
             if time.monotonic() < self._sleep_finish_time or state == 3:
-                cnt = 0
-                max_cnt = 2 if state == 3 else max_cnt
-                time.sleep(0.05)
-                continue
-            if state == 1:
-                cnt = 0
-                max_cnt = 2
-                time.sleep(0.05)
-                continue
+                status['cnt'] = 0
+                status['max_cnt'] = 2 if state == 3 else status['max_cnt']
+            elif state == 1:
+                status.update(cnt=0, max_cnt=2)
             else:
-                cnt += 1
-                if cnt >= max_cnt:
+                status['cnt'] += 1
+                if status['cnt'] >= status['max_cnt']:
                     return 0
-                time.sleep(0.05)
-        return APIState.WAIT_FINISH_TIMEOUT
+            return None
+        return self.wait_for(_check, timeout=max(expired - time.monotonic(), 0) if expired is not None else None,
+                             interval=0.05, source='poll')
+
+    def wait_move(self, timeout=None):
+        if timeout is not None:
+            expired = time.monotonic() + timeout + (self._sleep_finish_time if self._sleep_finish_time > time.monotonic() else 0)
+        else:
+            expired = None
+        code = None
+        if self._robot_state_is_fresh():
+            code = self._wait_move_by_report(expired)
+        if code is None:
+            # polling, without the report or the report is not fresh
+            code = self._wait_move_by_poll(expired)
+        if code == APIState.NOT_CONNECTED:
+            self.log_api_info('wait_move, xarm is disconnect', code=APIState.NOT_CONNECTED)
+        return code
 
     # def wait_move(self, timeout=None):
     #     if timeout is not None:
@@ -2252,7 +2696,7 @@ class Base(BaseObject, Events):
     #             self.get_state()
     #             self.get_err_warn_code()
     #         if self.error_code != 0:
-    #             self.log_api_info('wait_move, xarm has error, error={}'.format(self.error_code), code=APIState.HAS_ERROR)
+    #             self.log_api_info('wait_move, xarm has error, error={}', self.error_code, code=APIState.HAS_ERROR)
     #             return APIState.HAS_ERROR
     #         # only wait in position mode
     #         if self.mode != 0:
@@ -2263,7 +2707,7 @@ class Base(BaseObject, Events):
     #                 time.sleep(0.02)
     #                 continue
     #             self._sleep_finish_time = 0
-    #             self.log_api_info('wait_move, xarm is stop, state={}'.format(self.state), code=APIState.EMERGENCY_STOP)
+    #             self.log_api_info('wait_move, xarm is stop, state={}', self.state, code=APIState.EMERGENCY_STOP)
     #             return APIState.EMERGENCY_STOP
     #         if time.monotonic() < self._sleep_finish_time or self.state == 3:
     #             time.sleep(0.02)
@@ -2354,7 +2798,7 @@ class Base(BaseObject, Events):
                 self._ignore_error = False
                 self._ignore_state = False
                 ret, cur_baud_inx = self._get_modbus_baudrate_inx(host_id=host_id)
-                self.log_api_info('API -> checkset_modbus_baud -> code={}, baud_inx={}'.format(ret, cur_baud_inx), code=ret)
+                self.log_api_info('API -> checkset_modbus_baud -> code={}, baud_inx={}', ret, cur_baud_inx, code=ret)
             # if ret == 0 and cur_baud_inx < len(self.arm_cmd.BAUDRATES):
             #     self.modbus_baud = self.arm_cmd.BAUDRATES[cur_baud_inx]
         if host_id == XCONF.TGPIO_HOST_ID:
@@ -2390,13 +2834,14 @@ class Base(BaseObject, Events):
     @xarm_is_connected(_type='set')
     def set_tgpio_modbus_timeout(self, timeout, is_transparent_transmission=False, **kwargs):
         ret = self.arm_cmd.set_modbus_timeout(timeout, is_transparent_transmission=kwargs.get('is_tt', is_transparent_transmission))
-        self.log_api_info('API -> set_tgpio_modbus_timeout -> code={}'.format(ret[0]), code=ret[0])
+        self.log_api_info('API -> set_tgpio_modbus_timeout -> code={}', ret[0], code=ret[0])
         return ret[0]
 
     @xarm_is_connected(_type='set')
     def set_tgpio_modbus_baudrate(self, baud):
         code = self.checkset_modbus_baud(baud, check=False)
-        self.log_api_info('API -> set_tgpio_modbus_baudrate -> code={}'.format(code), code=code)
+        self.log_api_info('API -> set_tgpio_modbus_baudrate -> code={}', code, code=code)
+        self._record_session_param(code, 'modbus_baud', 'set_tgpio_modbus_baudrate', baud)
         return code
 
     @xarm_is_connected(_type='get')
@@ -2421,14 +2866,14 @@ class Base(BaseObject, Events):
             ret = self.arm_cmd.tgpio_set_modbus(datas, len(datas), host_id=host_id)
         ret[0] = self._check_modbus_code(ret, min_res_len + 2, host_id=host_id)
         if not ignore_log:
-            self.log_api_info('API -> getset_tgpio_modbus_data -> code={}, response={}'.format(ret[0], ret[2:]), code=ret[0])
+            self.log_api_info('API -> getset_tgpio_modbus_data -> code={}, response={}', ret[0], ret[2:], code=ret[0])
         return ret[0], ret[2:]
 
     @xarm_is_connected(_type='set')
     def set_simulation_robot(self, on_off):
         ret = self.arm_cmd.set_simulation_robot(on_off)
         ret[0] = self._check_code(ret[0])
-        self.log_api_info('API -> set_simulation_robot({}) -> code={}'.format(on_off, ret[0]), code=ret[0])
+        self.log_api_info('API -> set_simulation_robot({}) -> code={}', on_off, ret[0], code=ret[0])
         return ret[0]
     
     @xarm_wait_until_not_pause
@@ -2440,7 +2885,8 @@ class Base(BaseObject, Events):
         else:
             _center_of_gravity = [item / 1000.0 for item in center_of_gravity]
         ret = self.arm_cmd.set_tcp_load(weight, _center_of_gravity)
-        self.log_api_info('API -> set_tcp_load -> code={}, weight={}, center={}'.format(ret[0], weight, _center_of_gravity), code=ret[0])
+        self.log_api_info('API -> set_tcp_load -> code={}, weight={}, center={}', ret[0], weight, _center_of_gravity, code=ret[0])
+        self._record_session_param(ret[0], 'tcp_load', 'set_tcp_load', weight, list(center_of_gravity))
         return ret[0]
 
     def set_only_check_type(self, only_check_type):
@@ -63,9 +63,9 @@ class BaseBoard(Base):
                 code = self._check_code(ret[0])
                 time.sleep(0.1)
                 if code != 0:
-                    self.log_api_info('API -> write_sn -> code={}, sn={}'.format(code, sn), code=code)
+                    self.log_api_info('API -> write_sn -> code={}, sn={}', code, sn, code=code)
                     return code
-        self.log_api_info('API -> write_sn -> code={}, sn={}'.format(code, sn), code=code)
+        self.log_api_info('API -> write_sn -> code={}, sn={}', code, sn, code=code)
         return code
 
     @xarm_is_connected(_type='get')
@@ -79,9 +79,9 @@ class BaseBoard(Base):
             rd_sn = ''.join([rd_sn, chr((ret[1] >> 8) & 0x00FF)])
             ret[0] = self._check_code(ret[0])
             if ret[0] != 0:
-                self.log_api_info('API -> get_sn -> code={}, sn={}'.format(ret[0], rd_sn), code=ret[0])
+                self.log_api_info('API -> get_sn -> code={}, sn={}', ret[0], rd_sn, code=ret[0])
                 return ret[0], ''
-        self.log_api_info('API -> get_sn -> code={}, sn={}'.format(ret[0], rd_sn), code=ret[0])
+        self.log_api_info('API -> get_sn -> code={}, sn={}', ret[0], rd_sn, code=ret[0])
         return ret[0], rd_sn
 
     @xarm_is_connected(_type='set')
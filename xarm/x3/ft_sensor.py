@@ -43,7 +43,7 @@ class FtSensor(Base):
                     logger.error('set_impedance, the value of B[{}] must be greater than or equal to 0'.format(i))
                     return APIState.API_EXCEPTION
         ret = self.arm_cmd.set_impedance(coord, c_axis, M, K, B)
-        self.log_api_info('API -> set_impedance -> code={}'.format(ret[0]), code=ret[0])
+        self.log_api_info('API -> set_impedance -> code={}', ret[0], code=ret[0])
         return self._check_code(ret[0])
 
     @xarm_is_connected(_type='set')
@@ -72,7 +72,7 @@ class FtSensor(Base):
                     logger.error('set_impedance_mbk, the value of B[{}] must be greater than or equal to 0'.format(i))
                     return APIState.API_EXCEPTION
         ret = self.arm_cmd.set_impedance_mbk(M, K, B)
-        self.log_api_info('API -> set_impedance_mbk -> code={}'.format(ret[0]), code=ret[0])
+        self.log_api_info('API -> set_impedance_mbk -> code={}', ret[0], code=ret[0])
         return self._check_code(ret[0])
 
     @xarm_is_connected(_type='set')
@@ -81,7 +81,7 @@ class FtSensor(Base):
             logger.error('set_impedance_config: parameters error')
             return APIState.API_EXCEPTION
         ret = self.arm_cmd.set_impedance_config(coord, c_axis)
-        self.log_api_info('API -> set_impedance_config -> code={}'.format(ret[0]), code=ret[0])
+        self.log_api_info('API -> set_impedance_config -> code={}', ret[0], code=ret[0])
         return self._check_code(ret[0])
 
     @xarm_is_connected(_type='set')
@@ -97,7 +97,7 @@ class FtSensor(Base):
                     logger.error('config_force_control, f_ref[{}] over range, range=[{}, {}]'.format(i, -max_f_ref[i], max_f_ref[i]))
                     return APIState.API_EXCEPTION
         ret = self.arm_cmd.config_force_control(coord, c_axis, f_ref, limits)
-        self.log_api_info('API -> config_force_control -> code={}'.format(ret[0]), code=ret[0])
+        self.log_api_info('API -> config_force_control -> code={}', ret[0], code=ret[0])
         return self._check_code(ret[0])
 
     @xarm_is_connected(_type='set')
@@ -121,13 +121,13 @@ class FtSensor(Base):
                     logger.error('set_force_control_pid, xe_limit[{}] over range, range=[0, 200]'.format(i))
                     return APIState.API_EXCEPTION
         ret = self.arm_cmd.set_force_control_pid(kp, ki, kd, xe_limit)
-        self.log_api_info('API -> set_force_control_pid -> code={}'.format(ret[0]), code=ret[0])
+        self.log_api_info('API -> set_force_control_pid -> code={}', ret[0], code=ret[0])
         return self._check_code(ret[0])
 
     @xarm_is_connected(_type='set')
     def ft_sensor_set_zero(self):
         ret = self.arm_cmd.ft_sensor_set_zero()
-        self.log_api_info('API -> ft_sensor_set_zero -> code={}'.format(ret[0]), code=ret[0])
+        self.log_api_info('API -> ft_sensor_set_zero -> code={}', ret[0], code=ret[0])
         return self._check_code(ret[0])
 
     @xarm_is_connected(_type='get')
@@ -138,7 +138,7 @@ class FtSensor(Base):
         ret = self.arm_cmd.ft_sensor_iden_load()
         self.arm_cmd.set_prot_flag(prot_flag)
         self._keep_heart = True
-        self.log_api_info('API -> ft_sensor_iden_load -> code={}'.format(ret[0]), code=ret[0])
+        self.log_api_info('API -> ft_sensor_iden_load -> code={}', ret[0], code=ret[0])
         code = self._check_code(ret[0])
         if code == 0 or len(ret) > 5:
             ret[2] = ret[2] * 1000  # x_centroid, 从m转成mm
@@ -155,7 +155,7 @@ class FtSensor(Base):
         params[2] = params[2] / 1000.0  # y_centroid, 从mm转成m
         params[3] = params[3] / 1000.0  # z_centroid, 从mm转成m
         ret = self.arm_cmd.ft_sensor_cali_load(params)
-        self.log_api_info('API -> ft_sensor_cali_load -> code={}, iden_result_list={}'.format(ret[0], iden_result_list), code=ret[0])
+        self.log_api_info('API -> ft_sensor_cali_load -> code={}, iden_result_list={}', ret[0], iden_result_list, code=ret[0])
         ret[0] = self._check_code(ret[0])
         if ret[0] == 0 and association_setting_tcp_load:
             m = kwargs.get('m', 0.325)
@@ -174,13 +174,13 @@ class FtSensor(Base):
     @xarm_is_connected(_type='set')
     def ft_sensor_enable(self, on_off):
         ret = self.arm_cmd.ft_sensor_enable(on_off)
-        self.log_api_info('API -> ft_sensor_enable -> code={}, on_off={}'.format(ret[0], on_off), code=ret[0])
+        self.log_api_info('API -> ft_sensor_enable -> code={}, on_off={}', ret[0], on_off, code=ret[0])
         return self._check_code(ret[0])
 
     @xarm_is_connected(_type='get')
     def ft_sensor_app_set(self, app_code):
         ret = self.arm_cmd.ft_sensor_app_set(app_code)
-        self.log_api_info('API -> ft_sensor_app_set -> code={}, app_code={}'.format(ret[0], app_code), code=ret[0])
+        self.log_api_info('API -> ft_sensor_app_set -> code={}, app_code={}', ret[0], app_code, code=ret[0])
         return self._check_code(ret[0])
 
     @xarm_is_connected(_type='get')
@@ -220,7 +220,7 @@ class FtSensor(Base):
                 if ret[0] != 0:
                     break
                 time.sleep(0.05)
-        self.log_api_info('API -> set_ft_sensor_sn -> code={}, sn={}'.format(ret[0], sn), code=ret[0])
+        self.log_api_info('API -> set_ft_sensor_sn -> code={}, sn={}', ret[0], sn, code=ret[0])
         return ret[0]
 
     def get_ft_sensor_sn(self):
@@ -241,7 +241,7 @@ class FtSensor(Base):
             else:
                 rd_sn = ''.join([rd_sn, '*'])
             time.sleep(0.05)
-        self.log_api_info('API -> get_ft_sensor_sn -> code={}, sn={}'.format(ret[0], rd_sn), code=ret[0])
+        self.log_api_info('API -> get_ft_sensor_sn -> code={}, sn={}', ret[0], rd_sn, code=ret[0])
         return ret[0], rd_sn
 
     def get_ft_sensor_version(self):
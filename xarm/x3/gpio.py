@@ -6,7 +6,6 @@
 #
 # Author: Vinman <vinman.wen@ufactory.cc> <vinman.cub@gmail.com>
 
-import time
 from ..core.utils.log import logger
 from ..core.config.x_config import XCONF
 from .code import APIState
@@ -100,10 +99,10 @@ class GPIO(Base):
         assert ionum == 0 or ionum == 1, 'The value of parameter ionum can only be 0 or 1.'
         if delay_sec is not None and delay_sec > 0:
             ret = self.arm_cmd.tgpio_delay_set_digital(ionum, value, delay_sec)
-            self.log_api_info('API -> set_tgpio_digital(ionum={}, value={}, delay_sec={}) -> code={}'.format(ionum, value, delay_sec, ret[0]), code=ret[0])
+            self.log_api_info('API -> set_tgpio_digital(ionum={}, value={}, delay_sec={}) -> code={}', ionum, value, delay_sec, ret[0], code=ret[0])
         else:
             ret = self.arm_cmd.tgpio_set_digital(ionum+1, value)
-            self.log_api_info('API -> set_tgpio_digital(ionum={}, value={}) -> code={}'.format(ionum, value, ret[0]), code=ret[0])
+            self.log_api_info('API -> set_tgpio_digital(ionum={}, value={}) -> code={}', ionum, value, ret[0], code=ret[0])
         return ret[0]
 
     @xarm_is_connected(_type='get')
@@ -181,10 +180,10 @@ class GPIO(Base):
         assert isinstance(ionum, int) and 15 >= ionum >= 0
         if delay_sec is not None and delay_sec > 0:
             ret = self.arm_cmd.cgpio_delay_set_digital(ionum, value, delay_sec)
-            self.log_api_info('API -> set_cgpio_digital(ionum={}, value={}, delay_sec={}) -> code={}'.format(ionum, value, delay_sec, ret[0]), code=ret[0])
+            self.log_api_info('API -> set_cgpio_digital(ionum={}, value={}, delay_sec={}) -> code={}', ionum, value, delay_sec, ret[0], code=ret[0])
         else:
             ret = self.arm_cmd.cgpio_set_auxdigit(ionum, value)
-            self.log_api_info('API -> set_cgpio_digital(ionum={}, value={}) -> code={}'.format(ionum, value, ret[0]), code=ret[0])
+            self.log_api_info('API -> set_cgpio_digital(ionum={}, value={}) -> code={}', ionum, value, ret[0], code=ret[0])
         return ret[0]
 
     @xarm_wait_until_not_pause
@@ -197,21 +196,21 @@ class GPIO(Base):
             ret = self.arm_cmd.cgpio_set_analog1(value)
         else:
             ret = self.arm_cmd.cgpio_set_analog2(value)
-        self.log_api_info('API -> set_cgpio_analog(ionum={}, value={}) -> code={}'.format(ionum, value, ret[0]), code=ret[0])
+        self.log_api_info('API -> set_cgpio_analog(ionum={}, value={}) -> code={}', ionum, value, ret[0], code=ret[0])
         return ret[0]
 
     @xarm_is_connected(_type='set')
     def set_cgpio_digital_input_function(self, ionum, fun):
         assert isinstance(ionum, int) and 15 >= ionum >= 0
         ret = self.arm_cmd.cgpio_set_infun(ionum, fun)
-        self.log_api_info('API -> set_cgpio_digital_input_function(ionum={}, fun={}) -> code={}'.format(ionum, fun, ret[0]), code=ret[0])
+        self.log_api_info('API -> set_cgpio_digital_input_function(ionum={}, fun={}) -> code={}', ionum, fun, ret[0], code=ret[0])
         return ret[0]
 
     @xarm_is_connected(_type='set')
     def set_cgpio_digital_output_function(self, ionum, fun):
         assert isinstance(ionum, int) and 15 >= ionum >= 0
         ret = self.arm_cmd.cgpio_set_outfun(ionum, fun)
-        self.log_api_info('API -> set_cgpio_digital_output_function(ionum={}, fun={}) -> code={}'.format(ionum, fun, ret[0]), code=ret[0])
+        self.log_api_info('API -> set_cgpio_digital_output_function(ionum={}, fun={}) -> code={}', ionum, fun, ret[0], code=ret[0])
         return ret[0]
 
     @xarm_is_connected(_type='get')
@@ -264,12 +263,9 @@ class GPIO(Base):
 
     @xarm_is_connected(_type='get')
     def get_cgpio_li_state(self, Ci_Li, timeout=3, is_ci=True):
-        start_time = time.monotonic()
-        is_first = True
-        while is_first or time.monotonic() - start_time < timeout:
+        def _check(robot_state):
             code = 0
-            is_first = False
-            if not self.connected or self.state == 4:
+            if self.state == 4:
                 return False
             codes, ret = self.get_cgpio_state()
             digitals = [ret[3] >> i & 0x0001 if ret[10][i] in [0, 255] else 1 for i in
@@ -283,8 +279,8 @@ class GPIO(Base):
                         break
                 if code == 0:
                     return True
-            time.sleep(0.1)
-        return False
+            return None
+        return self.wait_for(_check, timeout=timeout, interval=0.1, source='poll') is True
 
     @xarm_wait_until_not_pause
     @xarm_wait_until_cmdnum_lt_max
@@ -299,27 +295,25 @@ class GPIO(Base):
             code2 = self.set_tgpio_digital(ionum=1, value=1, delay_sec=delay_sec)
         code = code1 if code2 == 0 else code2
         if code == 0 and wait:
-            start = time.monotonic()
-            code = APIState.SUCTION_CUP_TOUT
             if delay_sec is not None and delay_sec > 0:
                 timeout += delay_sec
-            while time.monotonic() - start < timeout:
+
+            def _check(robot_state):
                 ret = self.get_suction_cup()
                 if ret[0] == XCONF.UxbusState.ERR_CODE:
-                    code = XCONF.UxbusState.ERR_CODE
-                    break
+                    return XCONF.UxbusState.ERR_CODE
                 if ret[0] == 0:
                     if on and ret[1] == 1:
-                        code = 0
-                        break
+                        return 0
                     if not on and ret[1] == 0:
-                        code = 0
-                        break
-                if not self.connected or self.state == 4:
-                    code = APIState.EMERGENCY_STOP
-                    break
-                time.sleep(0.1)
-        self.log_api_info('API -> set_suction_cup(on={}, wait={}, delay_sec={}) -> code={}'.format(on, wait, delay_sec, code), code=code)
+                        return 0
+                if self.state == 4:
+                    return APIState.EMERGENCY_STOP
+                return None
+            code = self.wait_for(_check, timeout=timeout, interval=0.1, source='poll')
+            code = APIState.SUCTION_CUP_TOUT if code == APIState.WAIT_FINISH_TIMEOUT \
+                else APIState.EMERGENCY_STOP if code == APIState.NOT_CONNECTED else code
+        self.log_api_info('API -> set_suction_cup(on={}, wait={}, delay_sec={}) -> code={}', on, wait, delay_sec, code, code=code)
         return code
 
     @xarm_is_connected(_type='get')
@@ -334,7 +328,7 @@ class GPIO(Base):
         assert isinstance(ionum, int) and 1 >= ionum >= 0
         assert fault_tolerance_radius >= 0, 'The value of parameter fault_tolerance_radius must be greater than or equal to 0.'
         ret = self.arm_cmd.tgpio_position_set_digital(ionum, value, xyz, fault_tolerance_radius)
-        self.log_api_info('API -> set_tgpio_digital_with_xyz(ionum={}, value={}, xyz={}, fault_tolerance_radius={}) -> code={}'.format(ionum, value, xyz, fault_tolerance_radius, ret[0]), code=ret[0])
+        self.log_api_info('API -> set_tgpio_digital_with_xyz(ionum={}, value={}, xyz={}, fault_tolerance_radius={}) -> code={}', ionum, value, xyz, fault_tolerance_radius, ret[0], code=ret[0])
         return ret[0]
 
     @xarm_wait_until_not_pause
@@ -345,7 +339,7 @@ class GPIO(Base):
         assert isinstance(ionum, int) and 15 >= ionum >= 0
         assert fault_tolerance_radius >= 0, 'The value of parameter fault_tolerance_radius must be greater than or equal to 0.'
         ret = self.arm_cmd.cgpio_position_set_digital(ionum, value, xyz, fault_tolerance_radius)
-        self.log_api_info('API -> set_cgpio_digital_with_xyz(ionum={}, value={}, xyz={}, fault_tolerance_radius={}) -> code={}'.format(ionum, value, xyz, fault_tolerance_radius, ret[0]), code=ret[0])
+        self.log_api_info('API -> set_cgpio_digital_with_xyz(ionum={}, value={}, xyz={}, fault_tolerance_radius={}) -> code={}', ionum, value, xyz, fault_tolerance_radius, ret[0], code=ret[0])
         return ret[0]
 
     @xarm_wait_until_not_pause
@@ -356,7 +350,7 @@ class GPIO(Base):
         assert ionum == 0 or ionum == 1, 'The value of parameter ionum can only be 0 or 1.'
         assert fault_tolerance_radius >= 0, 'The value of parameter fault_tolerance_radius must be greater than or equal to 0.'
         ret = self.arm_cmd.cgpio_position_set_analog(ionum, value, xyz, fault_tolerance_radius)
-        self.log_api_info('API -> set_cgpio_analog_with_xyz(ionum={}, value={}, xyz={}, fault_tolerance_radius={}) -> code={}'.format(ionum, value, xyz, fault_tolerance_radius, ret[0]), code=ret[0])
+        self.log_api_info('API -> set_cgpio_analog_with_xyz(ionum={}, value={}, xyz={}, fault_tolerance_radius={}) -> code={}', ionum, value, xyz, fault_tolerance_radius, ret[0], code=ret[0])
         return ret[0]
 
     @xarm_is_connected(_type='set')
@@ -367,11 +361,8 @@ class GPIO(Base):
     @xarm_is_connected(_type='set')
     @xarm_is_not_simulation_mode(ret=False)
     def check_air_pump_state(self, state, timeout=3):
-        start_time = time.monotonic()
-        is_first = True
-        while is_first or time.monotonic() - start_time < timeout:
-            is_first = False
-            if not self.connected or self.state == 4:
+        def _check(robot_state):
+            if self.state == 4:
                 return False
             ret = self.get_suction_cup()
             if ret[0] == XCONF.UxbusState.ERR_CODE:
@@ -381,7 +372,7 @@ class GPIO(Base):
                     return True
                 if not state and ret[1] == 0:
                     return True
-            time.sleep(0.1)
-        return False
+            return None
+        return self.wait_for(_check, timeout=timeout, interval=0.1, source='poll') is True
 
 
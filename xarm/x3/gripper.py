@@ -6,7 +6,6 @@
 #
 # Author: Vinman <vinman.wen@ufactory.cc> <vinman.cub@gmail.com>
 
-import time
 import struct
 from ..core.config.x_config import XCONF
 from ..core.utils.log import logger
@@ -92,9 +91,11 @@ class Gripper(GPIO):
         if code != 0:
             return code
         if is_modbus:
-            return self._set_modbus_gripper_enable(enable)
+            code = self._set_modbus_gripper_enable(enable)
         else:
-            return self._set_gripper_enable(enable)
+            code = self._set_gripper_enable(enable)
+        self._record_session_param(code, 'gripper_enable', 'set_gripper_enable', enable, is_modbus=is_modbus)
+        return code
 
     @xarm_is_connected(_type='set')
     @xarm_is_not_simulation_mode(ret=0)
@@ -187,26 +188,26 @@ class Gripper(GPIO):
             code1 = self.set_tgpio_digital(ionum=0, value=0, delay_sec=delay_sec)
             code2 = self.set_tgpio_digital(ionum=1, value=1, delay_sec=delay_sec)
         code = code1 if code2 == 0 else code2
-        self.log_api_info('API -> set_gripper_status(status={}, delay_sec={}) -> code={}'.format(status, delay_sec, code), code=code)
+        self.log_api_info('API -> set_gripper_status(status={}, delay_sec={}) -> code={}', status, delay_sec, code, code=code)
         return code
 
     ########################### Old Protocol #################################
     @xarm_is_connected(_type='set')
     def _set_gripper_enable(self, enable):
         ret = self.arm_cmd.gripper_set_en(int(enable))
-        self.log_api_info('API -> set_gripper_enable(enable={}) -> code={}'.format(enable, ret[0]), code=ret[0])
+        self.log_api_info('API -> set_gripper_enable(enable={}) -> code={}', enable, ret[0], code=ret[0])
         return ret[0]
 
     @xarm_is_connected(_type='set')
     def _set_gripper_mode(self, mode):
         ret = self.arm_cmd.gripper_set_mode(mode)
-        self.log_api_info('API -> set_gripper_mode(mode={}) -> code={}'.format(mode, ret[0]), code=ret[0])
+        self.log_api_info('API -> set_gripper_mode(mode={}) -> code={}', mode, ret[0], code=ret[0])
         return ret[0]
 
     @xarm_is_connected(_type='set')
     def _set_gripper_speed(self, speed):
         ret = self.arm_cmd.gripper_set_posspd(speed)
-        self.log_api_info('API -> set_gripper_speed(speed={}) -> code={}'.format(speed, ret[0]), code=ret[0])
+        self.log_api_info('API -> set_gripper_speed(speed={}) -> code={}', speed, ret[0], code=ret[0])
         return ret[0]
 
     @xarm_is_connected(_type='get')
@@ -240,7 +241,7 @@ class Gripper(GPIO):
         if speed is not None:
             self.arm_cmd.gripper_set_posspd(speed)
         ret = self.arm_cmd.gripper_set_pos(pos)
-        self.log_api_info('API -> set_gripper_position(pos={}) -> code={}'.format(pos, ret[0]), code=ret[0])
+        self.log_api_info('API -> set_gripper_position(pos={}) -> code={}', pos, ret[0], code=ret[0])
         if wait:
             is_add = True
             last_pos = 0
@@ -250,48 +251,43 @@ class Gripper(GPIO):
                 if last_pos == pos:
                     return 0
                 is_add = True if pos > last_pos else False
-            count = 0
-            count2 = 0
+            status = {'last_pos': last_pos, 'count': 0, 'count2': 0}
             if not timeout or not isinstance(timeout, (int, float)):
                 timeout = 10
-            expired = time.monotonic() + timeout
-            while time.monotonic() < expired:
+
+            def _check(robot_state):
                 _, p = self._get_gripper_position()
                 if _ == 0 and p is not None:
                     cur_pos = int(p)
                     if abs(pos - cur_pos) <= 1:
-                        last_pos = cur_pos
-                        break
+                        return ret[0]
                     if is_add:
-                        if cur_pos <= last_pos:
-                            count += 1
+                        if cur_pos <= status['last_pos']:
+                            status['count'] += 1
                         elif cur_pos <= pos:
-                            last_pos = cur_pos
-                            count = 0
-                            count2 = 0
+                            status.update(last_pos=cur_pos, count=0, count2=0)
                         else:
-                            count2 += 1
-                            if count2 >= 10:
-                                break
+                            status['count2'] += 1
+                            if status['count2'] >= 10:
+                                return ret[0]
                     else:
-                        if cur_pos >= last_pos:
-                            count += 1
+                        if cur_pos >= status['last_pos']:
+                            status['count'] += 1
                         elif cur_pos >= pos:
-                            last_pos = cur_pos
-                            count = 0
-                            count2 = 0
+                            status.update(last_pos=cur_pos, count=0, count2=0)
                         else:
-                            count2 += 1
-                            if count2 >= 10:
-                                break
-                    if count >= 7:
+                            status['count2'] += 1
+                            if status['count2'] >= 10:
+                                return ret[0]
+                    if status['count'] >= 7:
                         # print('gripper target: {}, current: {}'.format(pos, cur_pos))
-                        break
-                    time.sleep(0.2)
+                        return ret[0]
+                    return None
                 else:
                     return _
-            # print('gripper, pos: {}, last: {}'.format(pos, last_pos))
-            return ret[0]
+            code = self.wait_for(_check, timeout=timeout, interval=0.2, source='poll')
+            # print('gripper, pos: {}, last: {}'.format(pos, status['last_pos']))
+            return ret[0] if code == APIState.WAIT_FINISH_TIMEOUT else code
         else:
             return ret[0]
 
@@ -312,7 +308,7 @@ class Gripper(GPIO):
     @xarm_is_connected(_type='set')
     def _clean_gripper_error(self):
         ret = self.arm_cmd.gripper_clean_err()
-        self.log_api_info('API -> clean_gripper_error -> code={}'.format(ret[0]), code=ret[0])
+        self.log_api_info('API -> clean_gripper_error -> code={}', ret[0], code=ret[0])
         return ret[0]
 
     @xarm_is_connected(_type='set')
@@ -322,7 +318,7 @@ class Gripper(GPIO):
         :return: 
         """
         ret = self.arm_cmd.gripper_set_zero()
-        self.log_api_info('API -> set_gripper_zero -> code={}'.format(ret[0]), code=ret[0])
+        self.log_api_info('API -> set_gripper_zero -> code={}', ret[0], code=ret[0])
         return ret[0]
 
     ########################### Modbus Protocol #################################
@@ -330,7 +326,7 @@ class Gripper(GPIO):
     def _set_modbus_gripper_enable(self, enable):
         ret = self.arm_cmd.gripper_modbus_set_en(int(enable))
         _, err = self._get_modbus_gripper_err_code()
-        self.log_api_info('API -> set_modbus_gripper_enable(enable={}) -> code={}, code2={}, err={}'.format(enable, ret[0], _, err), code=ret[0])
+        self.log_api_info('API -> set_modbus_gripper_enable(enable={}) -> code={}, code2={}, err={}', enable, ret[0], _, err, code=ret[0])
         ret[0] = self._check_modbus_code(ret, only_check_code=True)
         if ret[0] == 0 and self.gripper_error_code == 0:
             self.gripper_is_enabled = True
@@ -340,7 +336,7 @@ class Gripper(GPIO):
     def _set_modbus_gripper_mode(self, mode):
         ret = self.arm_cmd.gripper_modbus_set_mode(mode)
         _, err = self._get_modbus_gripper_err_code()
-        self.log_api_info('API -> set_modbus_gripper_mode(mode={}) -> code={}, code2={}, err={}'.format(mode, ret[0], _, err), code=ret[0])
+        self.log_api_info('API -> set_modbus_gripper_mode(mode={}) -> code={}, code2={}, err={}', mode, ret[0], _, err, code=ret[0])
         ret[0] = self._check_modbus_code(ret, only_check_code=True)
         return ret[0] if self._gripper_error_code == 0 else APIState.END_EFFECTOR_HAS_FAULT
 
@@ -348,7 +344,7 @@ class Gripper(GPIO):
     def _set_modbus_gripper_speed(self, speed):
         ret = self.arm_cmd.gripper_modbus_set_posspd(speed)
         _, err = self._get_modbus_gripper_err_code()
-        self.log_api_info('API -> set_modbus_gripper_speed(speed={}) -> code={}, code2={}, err={}'.format(speed, ret[0], _, err), code=ret[0])
+        self.log_api_info('API -> set_modbus_gripper_speed(speed={}) -> code={}, code2={}, err={}', speed, ret[0], _, err, code=ret[0])
         ret[0] = self._check_modbus_code(ret, only_check_code=True)
         if ret[0] == 0 and self.gripper_error_code == 0:
             self.gripper_speed = speed
@@ -378,80 +374,69 @@ class Gripper(GPIO):
             if last_pos == target_pos:
                 return 0
             is_add = True if target_pos > last_pos else False
-        count = 0
-        count2 = 0
+        status = {'last_pos': last_pos, 'count': 0, 'count2': 0, 'failed_cnt': 0}
         if not timeout or not isinstance(timeout, (int, float)) or timeout <= 0:
             timeout = 10
-        expired = time.monotonic() + timeout
-        failed_cnt = 0
-        code = APIState.WAIT_FINISH_TIMEOUT
-        while self.connected and time.monotonic() < expired:
+
+        def _check(robot_state):
             _, p = self._get_modbus_gripper_position()
             if self._gripper_error_code != 0:
                 print('xArm Gripper ErrorCode: {}'.format(self._gripper_error_code))
                 return APIState.END_EFFECTOR_HAS_FAULT
-            failed_cnt = 0 if _ == 0 and p is not None else failed_cnt + 1
+            status['failed_cnt'] = 0 if _ == 0 and p is not None else status['failed_cnt'] + 1
             if _ == 0 and p is not None:
                 cur_pos = int(p)
                 if abs(target_pos - cur_pos) <= 1:
                     return 0
                 if is_add:
-                    if cur_pos <= last_pos:
-                        count += 1
+                    if cur_pos <= status['last_pos']:
+                        status['count'] += 1
                     elif cur_pos <= target_pos:
-                        last_pos = cur_pos
-                        count = 0
-                        count2 = 0
+                        status.update(last_pos=cur_pos, count=0, count2=0)
                     else:
-                        count2 += 1
-                        if count2 >= 10:
+                        status['count2'] += 1
+                        if status['count2'] >= 10:
                             return 0
                 else:
-                    if cur_pos >= last_pos:
-                        count += 1
+                    if cur_pos >= status['last_pos']:
+                        status['count'] += 1
                     elif cur_pos >= target_pos:
-                        last_pos = cur_pos
-                        count = 0
-                        count2 = 0
+                        status.update(last_pos=cur_pos, count=0, count2=0)
                     else:
-                        count2 += 1
-                        if count2 >= 10:
+                        status['count2'] += 1
+                        if status['count2'] >= 10:
                             return 0
-                if count >= 8:
+                if status['count'] >= 8:
                     return 0
             else:
-                if failed_cnt > 10:
+                if status['failed_cnt'] > 10:
                     return APIState.CHECK_FAILED
-            time.sleep(0.2)
-        return code
+            return None
+        return self.wait_for(_check, timeout=timeout, interval=0.2, source='poll')
 
     def __check_gripper_status(self, timeout=None):
-        start_move = False
-        not_start_move_cnt = 0
-        failed_cnt = 0
+        status = {'start_move': False, 'not_start_move_cnt': 0, 'failed_cnt': 0}
         if not timeout or not isinstance(timeout, (int, float)) or timeout <= 0:
             timeout = 10
-        expired = time.monotonic() + timeout
-        code = APIState.WAIT_FINISH_TIMEOUT
-        while self.connected and time.monotonic() < expired:
-            _, status = self.get_gripper_status()
-            failed_cnt = 0 if _ == 0 else failed_cnt + 1
+
+        def _check(robot_state):
+            _, gripper_status = self.get_gripper_status()
+            status['failed_cnt'] = 0 if _ == 0 else status['failed_cnt'] + 1
             if _ == 0:
-                if status & 0x03 == 0 or status & 0x03 == 2:
-                    if start_move:
+                if gripper_status & 0x03 == 0 or gripper_status & 0x03 == 2:
+                    if status['start_move']:
                         return 0
                     else:
-                        not_start_move_cnt += 1
-                        if not_start_move_cnt > 20:
+                        status['not_start_move_cnt'] += 1
+                        if status['not_start_move_cnt'] > 20:
                             return 0
-                elif not start_move:
-                    not_start_move_cnt = 0
-                    start_move = True
+                elif not status['start_move']:
+                    status.update(start_move=True, not_start_move_cnt=0)
             else:
-                if failed_cnt > 10:
+                if status['failed_cnt'] > 10:
                     return APIState.CHECK_FAILED
-            time.sleep(0.1)
-        return code
+            return None
+        return self.wait_for(_check, timeout=timeout, interval=0.1, source='poll')
 
     @xarm_is_connected(_type='set')
     def _set_modbus_gripper_position(self, pos, wait=False, speed=None, auto_enable=False, timeout=None, **kwargs):
@@ -478,7 +463,7 @@ class Gripper(GPIO):
             if ret[0] == 0:
                 self.gripper_speed = speed
         ret = self.arm_cmd.gripper_modbus_set_pos(pos)
-        self.log_api_info('API -> set_modbus_gripper_position(pos={}) -> code={}'.format(pos, ret[0]), code=ret[0])
+        self.log_api_info('API -> set_modbus_gripper_position(pos={}) -> code={}', pos, ret[0], code=ret[0])
         _, err = self._get_modbus_gripper_err_code()
         if self._gripper_error_code != 0:
             print('xArm Gripper ErrorCode: {}'.format(self._gripper_error_code))
@@ -509,7 +494,7 @@ class Gripper(GPIO):
         ret = self.arm_cmd.gripper_modbus_clean_err()
         self._gripper_error_code = 0
         _, err = self._get_modbus_gripper_err_code()
-        self.log_api_info('API -> clean_modbus_gripper_error -> code={}, code2={}, err={}'.format(ret[0], _, err), code=ret[0])
+        self.log_api_info('API -> clean_modbus_gripper_error -> code={}, code2={}, err={}', ret[0], _, err, code=ret[0])
         ret[0] = self._check_modbus_code(ret, only_check_code=True)
         return ret[0] if self._gripper_error_code == 0 else APIState.END_EFFECTOR_HAS_FAULT
 
@@ -521,7 +506,7 @@ class Gripper(GPIO):
         """
         ret = self.arm_cmd.gripper_modbus_set_zero()
         _, err = self._get_modbus_gripper_err_code()
-        self.log_api_info('API -> set_modbus_gripper_zero -> code={}, code2={}, err={}'.format(ret[0], _, err), code=ret[0])
+        self.log_api_info('API -> set_modbus_gripper_zero -> code={}, code2={}, err={}', ret[0], _, err, code=ret[0])
         ret[0] = self._check_modbus_code(ret, only_check_code=True)
         return ret[0] if self._gripper_error_code == 0 else APIState.END_EFFECTOR_HAS_FAULT
 
@@ -532,22 +517,20 @@ class Gripper(GPIO):
         return self.getset_tgpio_modbus_data(data_frame, min_res_len=min_res_len, ignore_log=True)
 
     def __bio_gripper_wait_motion_completed(self, timeout=5, **kwargs):
-        failed_cnt = 0
-        expired = time.monotonic() + timeout
-        code = APIState.WAIT_FINISH_TIMEOUT
+        status = {'failed_cnt': 0}
         check_detected = kwargs.get('check_detected', False)
-        while time.monotonic() < expired:
-            _, status = self.get_bio_gripper_status()
-            failed_cnt = 0 if _ == 0 else failed_cnt + 1
+
+        def _check(robot_state):
+            _, gripper_status = self.get_bio_gripper_status()
+            status['failed_cnt'] = 0 if _ == 0 else status['failed_cnt'] + 1
             if _ == 0:
-                code = code if (status & 0x03) == XCONF.BioGripperState.IS_MOTION \
-                    else APIState.END_EFFECTOR_HAS_FAULT if (status & 0x03) == XCONF.BioGripperState.IS_FAULT \
-                    else 0 if not check_detected or (status & 0x03) == XCONF.BioGripperState.IS_DETECTED else code
+                return None if (gripper_status & 0x03) == XCONF.BioGripperState.IS_MOTION \
+                    else APIState.END_EFFECTOR_HAS_FAULT if (gripper_status & 0x03) == XCONF.BioGripperState.IS_FAULT \
+                    else 0 if not check_detected or (gripper_status & 0x03) == XCONF.BioGripperState.IS_DETECTED else None
             else:
-                code = APIState.NOT_CONNECTED if _ == APIState.NOT_CONNECTED else APIState.CHECK_FAILED if failed_cnt > 10 else code
-            if code != APIState.WAIT_FINISH_TIMEOUT:
-                break
-            time.sleep(0.1)
+                return APIState.NOT_CONNECTED if _ == APIState.NOT_CONNECTED \
+                    else APIState.CHECK_FAILED if status['failed_cnt'] > 10 else None
+        code = self.wait_for(_check, timeout=timeout, interval=0.1, source='poll')
         if self.bio_gripper_error_code != 0:
             print('BIO Gripper ErrorCode: {}'.format(self.bio_gripper_error_code))
         if code == 0 and not self.bio_gripper_is_enabled:
@@ -555,20 +538,17 @@ class Gripper(GPIO):
         return code
 
     def __bio_gripper_wait_enable_completed(self, timeout=3):
-        failed_cnt = 0
-        expired = time.monotonic() + timeout
-        code = APIState.WAIT_FINISH_TIMEOUT
-        while time.monotonic() < expired:
-            _, status = self.get_bio_gripper_status()
-            failed_cnt = 0 if _ == 0 else failed_cnt + 1
+        status = {'failed_cnt': 0}
+
+        def _check(robot_state):
+            _, gripper_status = self.get_bio_gripper_status()
+            status['failed_cnt'] = 0 if _ == 0 else status['failed_cnt'] + 1
             if _ == 0:
-                code = 0 if self.bio_gripper_is_enabled else code
+                return 0 if self.bio_gripper_is_enabled else None
             else:
-                code = APIState.NOT_CONNECTED if _ == APIState.NOT_CONNECTED else APIState.CHECK_FAILED if failed_cnt > 10 else code
-            if code != APIState.WAIT_FINISH_TIMEOUT:
-                break
-            time.sleep(0.1)
-        return code
+                return APIState.NOT_CONNECTED if _ == APIState.NOT_CONNECTED \
+                    else APIState.CHECK_FAILED if status['failed_cnt'] > 10 else None
+        return self.wait_for(_check, timeout=timeout, interval=0.1, source='poll')
 
     @xarm_is_connected(_type='set')
     @xarm_is_not_simulation_mode(ret=False)
@@ -582,7 +562,7 @@ class Gripper(GPIO):
         code, _ = self.__bio_gripper_send_modbus(data_frame, 6)
         if code == 0 and enable and wait:
             code = self.__bio_gripper_wait_enable_completed(timeout=timeout)
-        self.log_api_info('API -> set_bio_gripper_enable(enable={}, wait={}, timeout={}) ->code={}'.format(enable, wait, timeout, code), code=code)
+        self.log_api_info('API -> set_bio_gripper_enable(enable={}, wait={}, timeout={}) ->code={}', enable, wait, timeout, code, code=code)
         # self.bio_gripper_is_enabled = True if code == 0 else self.bio_gripper_is_enabled
         return code
 
@@ -591,7 +571,7 @@ class Gripper(GPIO):
     def set_bio_gripper_speed(self, speed):
         data_frame = [0x08, 0x06, 0x03, 0x03, speed // 256 % 256, speed % 256]
         code, _ = self.__bio_gripper_send_modbus(data_frame, 6)
-        self.log_api_info('API -> set_bio_gripper_speed(speed={}) ->code={}'.format(speed, code), code=code)
+        self.log_api_info('API -> set_bio_gripper_speed(speed={}) ->code={}', speed, code, code=code)
         self.bio_gripper_speed = speed if code == 0 else self.bio_gripper_speed
         return code
 
@@ -615,7 +595,7 @@ class Gripper(GPIO):
         code, _ = self.__bio_gripper_send_modbus(data_frame, 6)
         if code == 0 and wait:
             code = self.__bio_gripper_wait_motion_completed(timeout=timeout)
-        self.log_api_info('API -> set_bio_gripper_position(pos={}, wait={}, timeout={}) ->code={}'.format(pos, wait, timeout, code), code=code)
+        self.log_api_info('API -> set_bio_gripper_position(pos={}, wait={}, timeout={}) ->code={}', pos, wait, timeout, code, code=code)
         return code
 
     @xarm_is_connected(_type='set')
@@ -629,7 +609,7 @@ class Gripper(GPIO):
         # code, _ = self.__bio_gripper_send_modbus(data_frame, 6)
         # if code == 0 and wait:
         #     code = self.__bio_gripper_wait_motion_completed(timeout=timeout, **kwargs)
-        # self.log_api_info('API -> open_bio_gripper(wait={}, timeout={}) ->code={}'.format(wait, timeout, code), code=code)
+        # self.log_api_info('API -> open_bio_gripper(wait={}, timeout={}) ->code={}', wait, timeout, code, code=code)
         # return code
 
     @xarm_is_connected(_type='set')
@@ -643,7 +623,7 @@ class Gripper(GPIO):
         # code, _ = self.__bio_gripper_send_modbus(data_frame, 6)
         # if code == 0 and wait:
         #     code = self.__bio_gripper_wait_motion_completed(timeout=timeout, **kwargs)
-        # self.log_api_info('API -> close_bio_gripper(wait={}, timeout={}) ->code={}'.format(wait, timeout, code), code=code)
+        # self.log_api_info('API -> close_bio_gripper(wait={}, timeout={}) ->code={}', wait, timeout, code, code=code)
         # return code
 
     @xarm_is_connected(_type='get')
@@ -692,7 +672,7 @@ class Gripper(GPIO):
     def clean_bio_gripper_error(self):
         data_frame = [0x08, 0x06, 0x00, 0x0F, 0x00, 0x00]
         code, _ = self.__bio_gripper_send_modbus(data_frame, 6)
-        self.log_api_info('API -> clean_bio_gripper_error -> code={}'.format(code), code=code)
+        self.log_api_info('API -> clean_bio_gripper_error -> code={}', code, code=code)
         self.get_bio_gripper_status()
         return code
 
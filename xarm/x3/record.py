@@ -8,7 +8,6 @@
 
 import json
 import time
-from urllib import request
 from .code import APIState
 from ..core.config.x_config import XCONF
 from ..core.utils.log import logger
@@ -27,6 +26,7 @@ class Record(Base):
         else:
             url = 'http://{}:18333/cmd'.format(ip)
         try:
+            from urllib import request
             data = {'cmd': 'xarm_list_trajs'}
             req = request.Request(url, headers={'Content-Type': 'application/json'}, data=json.dumps(data).encode('utf-8'))
             res = request.urlopen(req)
@@ -41,7 +41,7 @@ class Record(Base):
     @xarm_is_connected(_type='set')
     def start_record_trajectory(self):
         ret = self.arm_cmd.set_record_traj(1)
-        self.log_api_info('API -> start_record_trajectory -> code={}'.format(ret[0]), code=ret[0])
+        self.log_api_info('API -> start_record_trajectory -> code={}', ret[0], code=ret[0])
         return ret[0]
 
     @xarm_is_connected(_type='set')
@@ -51,7 +51,7 @@ class Record(Base):
             ret2 = self.save_record_trajectory(filename, wait=True, timeout=10)
             if ret2 != 0:
                 return ret2
-        self.log_api_info('API -> stop_record_trajectory -> code={}'.format(ret[0]), code=ret[0])
+        self.log_api_info('API -> stop_record_trajectory -> code={}', ret[0], code=ret[0])
         return ret[0]
 
     @xarm_is_connected(_type='set')
@@ -63,29 +63,13 @@ class Record(Base):
         else:
             full_filename = filename
         ret = self.arm_cmd.save_traj(full_filename, wait_time=0)
-        self.log_api_info('API -> save_record_trajectory -> code={}'.format(ret[0]), code=ret[0])
+        self.log_api_info('API -> save_record_trajectory -> code={}', ret[0], code=ret[0])
         ret[0] = self._check_code(ret[0])
         if ret[0] == 0:
             if wait:
-                expired = time.monotonic() + timeout
-                idle_cnts = 0
-                while time.monotonic() < expired:
-                    time.sleep(0.1)
-                    code, status = self.get_trajectory_rw_status()
-                    if self._check_code(code) == 0:
-                        if status == XCONF.TrajState.IDLE:
-                            idle_cnts += 1
-                            if idle_cnts >= 5:
-                                logger.error('Save {} failed, idle'.format(filename))
-                                return APIState.TRAJ_RW_FAILED
-                        elif status == XCONF.TrajState.SAVE_SUCCESS:
-                            logger.info('Save {} success'.format(filename))
-                            return 0
-                        elif status == XCONF.TrajState.SAVE_FAIL:
-                            logger.error('Save {} failed'.format(filename))
-                            return APIState.TRAJ_RW_FAILED
-                logger.warning('Save {} timeout'.format(filename))
-                return APIState.TRAJ_RW_TOUT
+                code = self.__wait_trajectory_rw('Save', filename, timeout,
+                                                 XCONF.TrajState.SAVE_SUCCESS, XCONF.TrajState.SAVE_FAIL)
+                return code
             else:
                 return ret[0]
         logger.error('Save {} failed, ret={}'.format(filename, ret))
@@ -100,33 +84,42 @@ class Record(Base):
         else:
             full_filename = filename
         ret = self.arm_cmd.load_traj(full_filename, wait_time=0)
-        self.log_api_info('API -> load_trajectory -> code={}'.format(ret[0]), code=ret[0])
+        self.log_api_info('API -> load_trajectory -> code={}', ret[0], code=ret[0])
         if ret[0] == 0:
             if wait:
-                expired = time.monotonic() + timeout
-                idle_cnts = 0
-                while time.monotonic() < expired:
-                    time.sleep(0.1)
-                    code, status = self.get_trajectory_rw_status()
-                    if code == 0:
-                        if status == XCONF.TrajState.IDLE:
-                            idle_cnts += 1
-                            if idle_cnts >= 5:
-                                logger.info('Load {} failed, idle'.format(filename))
-                                return APIState.TRAJ_RW_FAILED
-                        elif status == XCONF.TrajState.LOAD_SUCCESS:
-                            logger.info('Load {} success'.format(filename))
-                            return 0
-                        elif status == XCONF.TrajState.LOAD_FAIL:
-                            logger.error('Load {} failed'.format(filename))
-                            return APIState.TRAJ_RW_FAILED
-                logger.warning('Load {} timeout'.format(filename))
-                return APIState.TRAJ_RW_TOUT
+                code = self.__wait_trajectory_rw('Load', filename, timeout,
+                                                 XCONF.TrajState.LOAD_SUCCESS, XCONF.TrajState.LOAD_FAIL)
+                return code
             else:
                 return ret[0]
         logger.error('Load {} failed, ret={}'.format(filename, ret))
         return ret[0]
 
+    def __wait_trajectory_rw(self, action, filename, timeout, success_status, fail_status):
+        status = {'idle_cnts': 0}
+
+        def _check(robot_state):
+            code, rw_status = self.get_trajectory_rw_status()
+            if self._check_code(code) == 0:
+                if rw_status == XCONF.TrajState.IDLE:
+                    # polled at once, the 6 idle polls span 0.5s as the 5 polls after a first sleep did
+                    status['idle_cnts'] += 1
+                    if status['idle_cnts'] >= 6:
+                        logger.error('{} {} failed, idle'.format(action, filename))
+                        return APIState.TRAJ_RW_FAILED
+                elif rw_status == success_status:
+                    logger.info('{} {} success'.format(action, filename))
+                    return 0
+                elif rw_status == fail_status:
+                    logger.error('{} {} failed'.format(action, filename))
+                    return APIState.TRAJ_RW_FAILED
+            return None
+        code = self.wait_for(_check, timeout=timeout, interval=0.1, source='poll')
+        if code == APIState.WAIT_FINISH_TIMEOUT:
+            logger.warning('{} {} timeout'.format(action, filename))
+            return APIState.TRAJ_RW_TOUT
+        return code
+
     @xarm_is_connected(_type='set')
     def playback_trajectory(self, times=1, filename=None, wait=False, double_speed=1):
         assert isinstance(times, int)
@@ -142,40 +135,52 @@ class Record(Base):
             ret = self.arm_cmd.playback_traj(times, double_speed)
         else:
             ret = self.arm_cmd.playback_traj_old(times)
-        self.log_api_info('API -> playback_trajectory -> code={}'.format(ret[0]), code=ret[0])
+        self.log_api_info('API -> playback_trajectory -> code={}', ret[0], code=ret[0])
         if ret[0] == 0 and wait:
             start_time = time.monotonic()
-            while self.state != 1:
-                if self.state in [4]:
-                    return APIState.NOT_READY
-                if time.monotonic() - start_time > 5:
-                    return APIState.TRAJ_PLAYBACK_TOUT
-                time.sleep(0.1)
-            max_count = int((time.monotonic() - start_time) / 0.1)
-            max_count = max_count if max_count > 10 else 10
-            start_time = time.monotonic()
-            while self.mode != 11:
+
+            def _check_start(robot_state):
+                return 0 if self.state == 1 else APIState.NOT_READY if self.state in [4] else None
+            code = self.wait_for(_check_start, timeout=5)
+            if code != 0:
+                return APIState.TRAJ_PLAYBACK_TOUT if code == APIState.WAIT_FINISH_TIMEOUT else code
+            # the time to start the playback, at least 1s, it is done once stopped that long (times != 1)
+            max_stop_time = max(time.monotonic() - start_time, 1)
+            status = {'start_time': time.monotonic(), 'stop_since': None}
+
+            def _check_playback(robot_state):
+                if self.mode == 11:
+                    status['mode_time'] = time.monotonic()
+                    return 0
                 if self.state == 1:
-                    start_time = time.monotonic()
-                    time.sleep(0.1)
-                    continue
+                    status['start_time'] = time.monotonic()
+                    return None
                 if self.state in [4]:
                     return APIState.NOT_READY
-                if time.monotonic() - start_time > 5:
+                if time.monotonic() - status['start_time'] > 5:
                     return APIState.TRAJ_PLAYBACK_TOUT
-                time.sleep(0.1)
-            time.sleep(0.1)
-            count = 0
-            while self.state not in [4]:
+                return None
+            code = self.wait_for(_check_playback)
+            if code != 0:
+                return code
+
+            def _check_stop(robot_state):
+                if self.state in [4]:
+                    return 0
+                if time.monotonic() - status['mode_time'] < 0.1:
+                    # the state just after switching to mode 11 is not trusted
+                    return None
                 if self.state == 2:
                     if times == 1:
-                        break
-                    count += 1
+                        return 0
+                    if status['stop_since'] is None:
+                        status['stop_since'] = time.monotonic()
+                    elif time.monotonic() - status['stop_since'] >= max_stop_time:
+                        return 0
                 else:
-                    count = 0
-                if count > max_count:
-                    break
-                time.sleep(0.1)
+                    status['stop_since'] = None
+                return None
+            self.wait_for(_check_stop)
             # while self.state != 4 and self.state != 2:
             #     time.sleep(0.1)
             if self.state not in [4]:
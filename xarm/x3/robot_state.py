@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+# Software License Agreement (BSD License)
+#
+# Copyright (c) 2020, UFACTORY, Inc.
+# All rights reserved.
+#
+# Author: Vinman <vinman.wen@ufactory.cc> <vinman.cub@gmail.com>
+
+
+class RobotState(object):
+    """
+    Immutable snapshot of the reported state, built once per report frame and published by one reference swap,
+    so every field of a snapshot is from the same frame and reading it copies nothing.
+    The sequences are tuples, the units are the same as the properties of the arm (see default_is_radian).
+    timestamp is the controller time of the frame on the host clock (for aligning the sensor data),
+    recv_time is when the host received the frame, which orders the frames against the host events.
+    Ex:
+        robot_state = arm.robot_state
+        if robot_state.state == 2 and robot_state.position[2] > 200:
+            ...
+    """
+    __slots__ = ('seq', 'timestamp', 'recv_time', 'state', 'mode', 'cmd_num', 'error_code', 'warn_code', 'is_ready',
+                 'position', 'position_aa', 'angles', 'motor_brake_states', 'motor_enable_states')
+
+    def __init__(self, *values):
+        """
+        :param values: value of every field, in the order of __slots__
+        """
+        if len(values) != len(self.__slots__):
+            raise TypeError('RobotState takes {} values, {} given'.format(len(self.__slots__), len(values)))
+        for name, value in zip(self.__slots__, values):
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('RobotState is immutable')
+
+    def __delattr__(self, name):
+        raise AttributeError('RobotState is immutable')
+
+    def __repr__(self):
+        return 'RobotState({})'.format(', '.join('{}={}'.format(name, getattr(self, name)) for name in self.__slots__))
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
@@ -6,7 +6,6 @@
 #
 # Author: Vinman <vinman.wen@ufactory.cc> <vinman.cub@gmail.com>
 
-import time
 from ..core.utils.log import logger
 from .code import APIState
 from .base import Base
@@ -82,7 +81,7 @@ class RobotIQ(Base):
     def robotiq_reset(self):
         params = [0x00, 0x00, 0x00, 0x00, 0x00, 0x00]
         code, ret = self.__robotiq_set(params)
-        self.log_api_info('API -> robotiq_reset -> code={}, response={}'.format(code, ret), code=code)
+        self.log_api_info('API -> robotiq_reset -> code={}, response={}', code, ret, code=code)
         return code, ret
 
     @xarm_is_connected(_type='get')
@@ -92,7 +91,7 @@ class RobotIQ(Base):
         code, ret = self.__robotiq_set(params)
         if wait and code == 0:
             code = self.robotiq_wait_activation_completed(timeout)
-        self.log_api_info('API -> robotiq_set_activate ->code={}, response={}'.format(code, ret), code=code)
+        self.log_api_info('API -> robotiq_set_activate ->code={}, response={}', code, ret, code=code)
         if code == 0:
             self.robotiq_is_activated = True
         return code, ret
@@ -115,7 +114,7 @@ class RobotIQ(Base):
         code, ret = self.__robotiq_set(params)
         if wait and code == 0:
             code = self.robotiq_wait_motion_completed(timeout, **kwargs)
-        self.log_api_info('API -> robotiq_set_position ->code={}, response={}'.format(code, ret), code=code)
+        self.log_api_info('API -> robotiq_set_position ->code={}, response={}', code, ret, code=code)
         return code, ret
 
     def robotiq_open(self, speed=0xFF, force=0xFF, wait=True, timeout=5, **kwargs):
@@ -134,44 +133,41 @@ class RobotIQ(Base):
         return self.__robotiq_get(params)
 
     def robotiq_wait_activation_completed(self, timeout=3):
-        failed_cnt = 0
-        expired = time.monotonic() + timeout if timeout is not None and timeout > 0 else 0
-        code = APIState.WAIT_FINISH_TIMEOUT
-        while expired == 0 or time.monotonic() < expired:
+        status = {'failed_cnt': 0}
+
+        def _check(robot_state):
             _, ret = self.robotiq_get_status(number_of_registers=3)
-            failed_cnt = 0 if _ == 0 else failed_cnt + 1
+            status['failed_cnt'] = 0 if _ == 0 else status['failed_cnt'] + 1
             if _ == 0:
                 gFLT = self._robotiq_status['gFLT']
                 gSTA = self._robotiq_status['gSTA']
-                code = APIState.END_EFFECTOR_HAS_FAULT if gFLT != 0 and not (gFLT == 5 and gSTA == 1) \
-                    else 0 if gSTA == 3 else code
+                return APIState.END_EFFECTOR_HAS_FAULT if gFLT != 0 and not (gFLT == 5 and gSTA == 1) \
+                    else 0 if gSTA == 3 else None
             else:
-                code = APIState.NOT_CONNECTED if _ == APIState.NOT_CONNECTED else APIState.CHECK_FAILED if failed_cnt > 10 else code
-            if code != APIState.WAIT_FINISH_TIMEOUT:
-                break
-            time.sleep(0.05)
-        return code
+                return APIState.NOT_CONNECTED if _ == APIState.NOT_CONNECTED \
+                    else APIState.CHECK_FAILED if status['failed_cnt'] > 10 else None
+        return self.wait_for(_check, timeout=timeout if timeout is not None and timeout > 0 else None,
+                             interval=0.05, source='poll')
 
     def robotiq_wait_motion_completed(self, timeout=5, **kwargs):
-        failed_cnt = 0
-        expired = time.monotonic() + timeout if timeout is not None and timeout > 0 else 0
-        code = APIState.WAIT_FINISH_TIMEOUT
+        status = {'failed_cnt': 0}
         check_detected = kwargs.get('check_detected', False)
-        while expired == 0 or time.monotonic() < expired:
+
+        def _check(robot_state):
             _, ret = self.robotiq_get_status(number_of_registers=3)
-            failed_cnt = 0 if _ == 0 else failed_cnt + 1
+            status['failed_cnt'] = 0 if _ == 0 else status['failed_cnt'] + 1
             if _ == 0:
                 gFLT = self._robotiq_status['gFLT']
                 gSTA = self._robotiq_status['gSTA']
                 gOBJ = self._robotiq_status['gOBJ']
-                code = APIState.END_EFFECTOR_HAS_FAULT if gFLT != 0 and not (gFLT == 5 and gSTA == 1) \
+                return APIState.END_EFFECTOR_HAS_FAULT if gFLT != 0 and not (gFLT == 5 and gSTA == 1) \
                     else 0 if (check_detected and (gOBJ == 1 or gOBJ == 2)) or (gOBJ == 1 or gOBJ == 2 or gOBJ == 3) \
-                    else code
+                    else None
             else:
-                code = APIState.NOT_CONNECTED if _ == APIState.NOT_CONNECTED else APIState.CHECK_FAILED if failed_cnt > 10 else code
-            if code != APIState.WAIT_FINISH_TIMEOUT:
-                break
-            time.sleep(0.05)
+                return APIState.NOT_CONNECTED if _ == APIState.NOT_CONNECTED \
+                    else APIState.CHECK_FAILED if status['failed_cnt'] > 10 else None
+        code = self.wait_for(_check, timeout=timeout if timeout is not None and timeout > 0 else None,
+                             interval=0.05, source='poll')
         if self.robotiq_error_code != 0:
             print('ROBOTIQ Gripper ErrorCode: {}'.format(self.robotiq_error_code))
         if code == 0 and not self.robotiq_is_activated:
@@ -7,7 +7,6 @@
 # Author: Vinman <vinman.wen@ufactory.cc> <vinman.cub@gmail.com>
 
 from ..core.config.x_config import XCONF
-from ..core.config.x_code import ServoError
 from ..core.utils.log import logger, pretty_print
 from .base import Base
 from .decorator import xarm_is_connected
@@ -23,6 +22,7 @@ class Servo(Base):
         dbmsg = []
         lang = lang if lang == 'cn' else 'en'
         if self._check_code(ret[0]) == 0:
+            from ..core.config.x_code import ServoError
             for i in range(1, 9):
                 servo_error = ServoError(ret[i * 2], status=ret[i * 2 - 1])
                 name = ('伺服-{}'.format(i) if lang == 'cn' else 'Servo-{}'.format(i)) if i < 8 else ('机械爪' if lang == 'cn' else 'Gripper')
@@ -61,7 +61,7 @@ class Servo(Base):
         """
         assert isinstance(servo_id, int) and 1 <= servo_id <= 8, 'The value of parameter servo_id can only be 1-8.'
         ret = self.arm_cmd.servo_set_zero(servo_id)
-        self.log_api_info('API -> set_servo_zero(servo_id={}) -> code={}'.format(servo_id, ret[0]), code=ret[0])
+        self.log_api_info('API -> set_servo_zero(servo_id={}) -> code={}', servo_id, ret[0], code=ret[0])
         return ret[0]
 
     @xarm_is_connected(_type='set')
@@ -79,7 +79,7 @@ class Servo(Base):
         assert addr is not None, 'The value of parameter addr cannot be None.'
         assert value is not None, 'The value of parameter value cannot be None.'
         ret = self.arm_cmd.servo_addr_w16(servo_id, addr, value)
-        self.log_api_info('API -> set_servo_addr_16(servo_id={}, addr={}, value={}) -> code={}'.format(servo_id, addr, value, ret[0]), code=ret[0])
+        self.log_api_info('API -> set_servo_addr_16(servo_id={}, addr={}, value={}) -> code={}', servo_id, addr, value, ret[0], code=ret[0])
         return ret[0]
 
     @xarm_is_connected(_type='get')
@@ -110,7 +110,7 @@ class Servo(Base):
         assert addr is not None, 'The value of parameter addr cannot be None.'
         assert value is not None, 'The value of parameter value cannot be None.'
         ret = self.arm_cmd.servo_addr_w32(servo_id, addr, value)
-        self.log_api_info('API -> set_servo_addr_32(servo_id={}, addr={}, value={}) -> code={}'.format(servo_id, addr, value, ret[0]), code=ret[0])
+        self.log_api_info('API -> set_servo_addr_32(servo_id={}, addr={}, value={}) -> code={}', servo_id, addr, value, ret[0], code=ret[0])
         return ret[0]
 
     @xarm_is_connected(_type='get')
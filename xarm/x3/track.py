@@ -122,8 +122,8 @@ class Track(GPIO):
             self.linear_track_is_enabled = self._linear_track_status['is_enabled'] == 1
         else:
             self.linear_track_is_enabled = False
-        self.log_api_info('API -> set_linear_track_enable(enable={}) -> code1={}, code2={}, err={}, enabled={}, zero={}'.format(
-            enable, ret[0], code2, status['error'], status['is_enabled'], status['on_zero']), code=ret[0])
+        self.log_api_info('API -> set_linear_track_enable(enable={}) -> code1={}, code2={}, err={}, enabled={}, zero={}',
+            enable, ret[0], code2, status['error'], status['is_enabled'], status['on_zero'], code=ret[0])
         return ret[0] if self.linear_track_error_code == 0 else APIState.LINEAR_TRACK_HAS_FAULT
 
     @xarm_is_connected(_type='set')
@@ -139,8 +139,8 @@ class Track(GPIO):
         # get_status: error, is_enable, on_zero
         code2, status = self.get_linear_track_registers(addr=0x0A23, number_of_registers=3)
         self.log_api_info(
-            'API -> set_linear_track_back_origin() -> code1={}, code2={}, err={}, enabled={}, zero={}'.format(
-                ret[0], code2, status['error'], status['is_enabled'], status['on_zero']), code=ret[0])
+            'API -> set_linear_track_back_origin() -> code1={}, code2={}, err={}, enabled={}, zero={}',
+                ret[0], code2, status['error'], status['is_enabled'], status['on_zero'], code=ret[0])
         if ret[0] == 0 and wait:
             ret[0] = self.__wait_linear_track_back_origin(timeout)
         if auto_enable:
@@ -167,9 +167,9 @@ class Track(GPIO):
         ret = self.arm_cmd.track_modbus_w16s(XCONF.ServoConf.TAGET_POS, value, 2)
         self.get_linear_track_registers(addr=0x0A23, number_of_registers=3)
         ret[0] = self._check_modbus_code(ret, length=8, host_id=XCONF.LINEER_TRACK_HOST_ID)
-        self.log_api_info('API -> set_linear_track_pos(pos={}) -> code={}, err={}, enabled={}, zero={}'.format(
+        self.log_api_info('API -> set_linear_track_pos(pos={}) -> code={}, err={}, enabled={}, zero={}',
             pos, ret[0], self._linear_track_status['error'],
-            self._linear_track_status['is_enabled'], self._linear_track_status['on_zero']), code=ret[0])
+            self._linear_track_status['is_enabled'], self._linear_track_status['on_zero'], code=ret[0])
         if ret[0] == 0 and wait:
             return self.__wait_linear_track_stop(timeout)
         return ret[0] if self.linear_track_error_code == 0 else APIState.LINEAR_TRACK_HAS_FAULT
@@ -185,7 +185,7 @@ class Track(GPIO):
         ret[0] = self._check_modbus_code(ret, length=8, host_id=XCONF.LINEER_TRACK_HOST_ID)
         if ret[0] == 0:
             self.linear_track_speed = speed
-        self.log_api_info('API -> set_linear_track_speed(speed={}) -> code={}'.format(speed, ret[0]), code=ret[0])
+        self.log_api_info('API -> set_linear_track_speed(speed={}) -> code={}', speed, ret[0], code=ret[0])
         return ret[0]
 
     @xarm_is_connected(_type='set')
@@ -199,8 +199,8 @@ class Track(GPIO):
         ret[0] = self._check_modbus_code(ret, length=8, host_id=XCONF.LINEER_TRACK_HOST_ID)
         # get_status: error, is_enable, on_zero
         code2, status = self.get_linear_track_registers(addr=0x0A22, number_of_registers=2)
-        self.log_api_info('API -> set_linear_track_stop() -> code={}, code2={}, status={}, err={}'.format(
-            ret[0], code2, status['status'], status['error']), code=ret[0])
+        self.log_api_info('API -> set_linear_track_stop() -> code={}, code2={}, status={}, err={}',
+            ret[0], code2, status['status'], status['error'], code=ret[0])
         return ret[0]
 
     @xarm_is_connected(_type='get')
@@ -213,52 +213,38 @@ class Track(GPIO):
         self.linear_track_error_code = 0
         ret = self.arm_cmd.track_modbus_w16s(XCONF.ServoConf.RESET_ERR, value, 1)
         _, err = self.get_linear_track_error()
-        self.log_api_info('API -> clean_linear_track_error -> code={}, code2={}, err={}'.format(ret[0], _, err),
+        self.log_api_info('API -> clean_linear_track_error -> code={}, code2={}, err={}', ret[0], _, err,
                           code=ret[0])
         ret[0] = self._check_modbus_code(ret, length=8, host_id=XCONF.LINEER_TRACK_HOST_ID)
         return ret[0] if self.linear_track_error_code == 0 else APIState.LINEAR_TRACK_HAS_FAULT
 
-    def __wait_linear_track_stop(self, timeout=100):
-        failed_cnt = 0
-        if not timeout or not isinstance(timeout, (int, float)) or timeout <= 0:
-            timeout = 100
-        expired = time.monotonic() + timeout
-        code = APIState.WAIT_FINISH_TIMEOUT
-        while self.connected and time.monotonic() < expired:
-            _, status = self.get_linear_track_registers(addr=0x0A22, number_of_registers=5)
-            if _ == 0 and status['sci'] == 0:
+    def __wait_linear_track(self, is_done, timeout):
+        status = {'failed_cnt': 0}
+
+        def _check(robot_state):
+            _, track_status = self.get_linear_track_registers(addr=0x0A22, number_of_registers=5)
+            if _ == 0 and track_status['sci'] == 0:
                 return APIState.LINEAR_TRACK_SCI_IS_LOW
-            if _ == 0 and status['error'] != 0:
+            if _ == 0 and track_status['error'] != 0:
                 return APIState.LINEAR_TRACK_HAS_FAULT
-            failed_cnt = 0 if _ == 0 else failed_cnt + 1
-            if _ == 0 and (status['status'] & 0x01 == 0):
+            status['failed_cnt'] = 0 if _ == 0 else status['failed_cnt'] + 1
+            if _ == 0 and is_done(track_status):
                 return 0
             else:
-                if failed_cnt > 10:
+                if status['failed_cnt'] > 10:
                     return APIState.CHECK_FAILED
-            time.sleep(0.1)
-        return code
+            return None
+        return self.wait_for(_check, timeout=timeout, interval=0.1, source='poll')
+
+    def __wait_linear_track_stop(self, timeout=100):
+        if not timeout or not isinstance(timeout, (int, float)) or timeout <= 0:
+            timeout = 100
+        return self.__wait_linear_track(lambda status: status['status'] & 0x01 == 0, timeout)
 
     def __wait_linear_track_back_origin(self, timeout=10):
-        failed_cnt = 0
         if not timeout or not isinstance(timeout, (int, float)) or timeout <= 0:
             timeout = 10
-        expired = time.monotonic() + timeout
-        code = APIState.WAIT_FINISH_TIMEOUT
-        while self.connected and time.monotonic() < expired:
-            _, status = self.get_linear_track_registers(addr=0x0A22, number_of_registers=5)
-            if _ == 0 and status['sci'] == 0:
-                return APIState.LINEAR_TRACK_SCI_IS_LOW
-            if _ == 0 and status['error'] != 0:
-                return APIState.LINEAR_TRACK_HAS_FAULT
-            failed_cnt = 0 if _ == 0 else failed_cnt + 1
-            if _ == 0 and status['on_zero'] == 1:
-                return 0
-            else:
-                if failed_cnt > 10:
-                    return APIState.CHECK_FAILED
-            time.sleep(0.1)
-        return code
+        return self.__wait_linear_track(lambda status: status['on_zero'] == 1, timeout)
 
     @xarm_is_connected(_type='get')
     @xarm_is_not_simulation_mode(ret=(0, []))
@@ -38,6 +38,20 @@ def filter_invaild_number(num, ndigits=3, default=0.0):
     return round(num, 0) if ndigits < 0 else round(num, ndigits)
 
 
+def filter_invaild_numbers(nums, ndigits, defaults):
+    """
+    filter_invaild_number of every number
+    :param ndigits: ndigits of every number, not negative
+    :param defaults: default of every number
+    """
+    return [round(num if math.isfinite(num) else default, n) for num, n, default in zip(nums, ndigits, defaults)]
+
+
+# ndigits of a pose (mm, rad) and of the joint angles (rad), see filter_invaild_numbers
+POSE_NDIGITS = (3, 3, 3, 6, 6, 6)
+ANGLE_NDIGITS = (6, 6, 6, 6, 6, 6, 6)
+
+
 def to_radian(val, is_radian=False, default=0):
     return default if val is None else float(val) if is_radian else math.radians(val)
 
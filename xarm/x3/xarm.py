@@ -25,12 +25,6 @@ from .parse import GcodeParser
 from .code import APIState
 from .decorator import xarm_is_connected, xarm_is_ready, xarm_wait_until_not_pause, xarm_wait_until_cmdnum_lt_max
 from .utils import to_radian
-try:
-    # from ..tools.blockly_tool import BlocklyTool
-    from ..tools.blockly import BlocklyTool
-except:
-    print('import BlocklyTool module failed')
-    BlocklyTool = None
 
 gcode_p = GcodeParser()
 
@@ -56,7 +50,7 @@ class XArm(Gripper, Servo, Record, RobotIQ, BaseBoard, Track, FtSensor):
             if limit[0] == limit[1]:
                 return False
             if value < limit[0] - math.radians(0.1) or value > limit[1] + math.radians(0.1):
-                self.log_api_info('API -> set_position -> out_of_tcp_range -> code={}, i={} value={}'.format(APIState.OUT_OF_RANGE, i, value), code=APIState.OUT_OF_RANGE)
+                self.log_api_info('API -> set_position -> out_of_tcp_range -> code={}, i={} value={}', APIState.OUT_OF_RANGE, i, value, code=APIState.OUT_OF_RANGE)
                 return True
         return False
 
@@ -67,20 +61,21 @@ class XArm(Gripper, Servo, Record, RobotIQ, BaseBoard, Track, FtSensor):
         if i < len(joint_limit):
             angle_range = joint_limit[i]
             if angle < angle_range[0] - math.radians(0.1) or angle > angle_range[1] + math.radians(0.1):
-                self.log_api_info('API -> set_servo_angle -> out_of_joint_range -> code={}, i={} value={}'.format(APIState.OUT_OF_RANGE, i, angle), code=APIState.OUT_OF_RANGE)
+                self.log_api_info('API -> set_servo_angle -> out_of_joint_range -> code={}, i={} value={}', APIState.OUT_OF_RANGE, i, angle, code=APIState.OUT_OF_RANGE)
                 return True
         return False
     
     def __wait_sync(self):
-        while not self._is_sync or self._need_sync:
-            if not self.connected:
-                return APIState.NOT_CONNECTED
+        def _check(robot_state):
+            if self._is_sync and not self._need_sync:
+                return 0
             elif self.has_error:
                 return APIState.HAS_ERROR
             elif self.is_stop:
                 return APIState.NOT_READY
-            time.sleep(0.05)
-        return 0
+            return None
+        # the sync is done by the report, which notifies the waiters after the frame, see Base._handle_report_data
+        return self.wait_for(_check, interval=0.05)
 
     def __update_tcp_motion_params(self, speed, acc, mvtime, pose=None):
         self._last_tcp_speed = speed
@@ -144,8 +139,8 @@ class XArm(Gripper, Servo, Record, RobotIQ, BaseBoard, Track, FtSensor):
             else:
                 ret = self.arm_cmd.move_line(tcp_pos, spd, acc, mvt, only_check_type, motion_type=motion_type)
         ret[0] = self._check_code(ret[0], is_move_cmd=True)
-        self.log_api_info('API -> set_position -> code={}, pos={}, radius={}, velo={}, acc={}'.format(
-            ret[0], tcp_pos, radius, spd, acc), code=ret[0])
+        self.log_api_info('API -> set_position -> code={}, pos={}, radius={}, velo={}, acc={}',
+            ret[0], tcp_pos, radius, spd, acc, code=ret[0])
         self._is_set_move = True
         self._only_check_result = 0
         if only_check_type > 0 and ret[0] == 0:
@@ -180,8 +175,8 @@ class XArm(Gripper, Servo, Record, RobotIQ, BaseBoard, Track, FtSensor):
             radius = radius if radius is not None else -1
             ret = self.arm_cmd.move_relative(tcp_pos, spd, acc, mvt, radius, False, False, only_check_type, motion_type=motion_type)
             ret[0] = self._check_code(ret[0], is_move_cmd=True)
-            self.log_api_info('API -> set_relative_position -> code={}, pos={}, radius={}, velo={}, acc={}'.format(
-                ret[0], tcp_pos, radius, spd, acc), code=ret[0])
+            self.log_api_info('API -> set_relative_position -> code={}, pos={}, radius={}, velo={}, acc={}',
+                ret[0], tcp_pos, radius, spd, acc, code=ret[0])
             self._is_set_move = True
             self._only_check_result = 0
             if only_check_type > 0 and ret[0] == 0:
@@ -258,8 +253,8 @@ class XArm(Gripper, Servo, Record, RobotIQ, BaseBoard, Track, FtSensor):
         else:
             ret = self.arm_cmd.move_line_tool(tcp_pos, spd, acc, mvt, only_check_type, motion_type=motion_type)
         ret[0] = self._check_code(ret[0], is_move_cmd=True)
-        self.log_api_info('API -> set_tool_position -> code={}, pos={}, velo={}, acc={}'.format(
-            ret[0], tcp_pos, spd, acc), code=ret[0])
+        self.log_api_info('API -> set_tool_position -> code={}, pos={}, velo={}, acc={}',
+            ret[0], tcp_pos, spd, acc, code=ret[0])
         self._is_set_move = True
         self._only_check_result = 0
         if only_check_type > 0 and ret[0] == 0:
@@ -300,8 +295,8 @@ class XArm(Gripper, Servo, Record, RobotIQ, BaseBoard, Track, FtSensor):
         else:
             ret = self.arm_cmd.move_line_aa(tcp_pos, spd, acc, mvt, mvcoord, int(relative), only_check_type, motion_type=motion_type)
         ret[0] = self._check_code(ret[0], is_move_cmd=True)
-        self.log_api_info('API -> set_position_aa -> code={}, pos={}, velo={}, acc={}'.format(
-            ret[0], tcp_pos, spd, acc), code=ret[0])
+        self.log_api_info('API -> set_position_aa -> code={}, pos={}, velo={}, acc={}',
+            ret[0], tcp_pos, spd, acc, code=ret[0])
         self._is_set_move = True
         self._only_check_result = 0
         if only_check_type > 0 and ret[0] == 0:
@@ -329,9 +324,8 @@ class XArm(Gripper, Servo, Record, RobotIQ, BaseBoard, Track, FtSensor):
         self._has_motion_cmd = True
         ret = self.arm_cmd.move_servo_cart_aa(mvpose=tcp_pos, mvvelo=spd, mvacc=acc, tool_coord=tool_coord, relative=int(relative))
         ret[0] = self._check_code(ret[0], is_move_cmd=True, mode=1)
-        self.log_api_info('API -> set_servo_cartesian_aa -> code={}, pose={}, velo={}, acc={}'.format(
-            ret[0], tcp_pos, spd, acc
-        ), code=ret[0])
+        self.log_api_info('API -> set_servo_cartesian_aa -> code={}, pose={}, velo={}, acc={}',
+            ret[0], tcp_pos, spd, acc, code=ret[0])
         self._is_set_move = True
         return ret[0]
 
@@ -357,9 +351,8 @@ class XArm(Gripper, Servo, Record, RobotIQ, BaseBoard, Track, FtSensor):
         else:
             ret = self.arm_cmd.move_joint(joints, spd, acc, mvt, only_check_type)
         ret[0] = self._check_code(ret[0], is_move_cmd=True)
-        self.log_api_info('API -> set_servo_angle -> code={}, angles={}, velo={}, acc={}, radius={}'.format(
-            ret[0], joints, spd, acc, radius
-        ), code=ret[0])
+        self.log_api_info('API -> set_servo_angle -> code={}, angles={}, velo={}, acc={}, radius={}',
+            ret[0], joints, spd, acc, radius, code=ret[0])
         self._is_set_move = True
         self._only_check_result = 0
         if only_check_type > 0 and ret[0] == 0:
@@ -390,9 +383,8 @@ class XArm(Gripper, Servo, Record, RobotIQ, BaseBoard, Track, FtSensor):
             radius = radius if radius is not None else -1
             ret = self.arm_cmd.move_relative(joints, spd, acc, mvt, radius, True, False, only_check_type)
             ret[0] = self._check_code(ret[0], is_move_cmd=True)
-            self.log_api_info('API -> set_relative_servo_angle -> code={}, angles={}, velo={}, acc={}, radius={}'.format(
-                ret[0], joints, spd, acc, radius
-            ), code=ret[0])
+            self.log_api_info('API -> set_relative_servo_angle -> code={}, angles={}, velo={}, acc={}, radius={}',
+                ret[0], joints, spd, acc, radius, code=ret[0])
             self._is_set_move = True
             self._only_check_result = 0
             if only_check_type > 0 and ret[0] == 0:
@@ -463,9 +455,8 @@ class XArm(Gripper, Servo, Record, RobotIQ, BaseBoard, Track, FtSensor):
         self._has_motion_cmd = True
         ret = self.arm_cmd.move_servoj(angs, spd, acc, mvt)
         ret[0] = self._check_code(ret[0], is_move_cmd=True, mode=1)
-        self.log_api_info('API -> set_servo_angle_j -> code={}, angles={}, velo={}, acc={}'.format(
-            ret[0], angs, spd, acc
-        ), code=ret[0])
+        self.log_api_info('API -> set_servo_angle_j -> code={}, angles={}, velo={}, acc={}',
+            ret[0], angs, spd, acc, code=ret[0])
         self._is_set_move = True
         return ret[0]
 
@@ -480,9 +471,8 @@ class XArm(Gripper, Servo, Record, RobotIQ, BaseBoard, Track, FtSensor):
         self._has_motion_cmd = True
         ret = self.arm_cmd.move_servo_cartesian(tcp_pos, spd, acc, int(is_tool_coord))
         ret[0] = self._check_code(ret[0], is_move_cmd=True, mode=1)
-        self.log_api_info('API -> set_servo_cartisian -> code={}, pose={}, velo={}, acc={}, is_tool_coord={}'.format(
-            ret[0], tcp_pos, spd, acc, is_tool_coord
-        ), code=ret[0])
+        self.log_api_info('API -> set_servo_cartisian -> code={}, pose={}, velo={}, acc={}, is_tool_coord={}',
+            ret[0], tcp_pos, spd, acc, is_tool_coord, code=ret[0])
         self._is_set_move = True
         return ret[0]
 
@@ -509,8 +499,8 @@ class XArm(Gripper, Servo, Record, RobotIQ, BaseBoard, Track, FtSensor):
         else:
             ret = self.arm_cmd.move_circle(pose_1, pose_2, spd, acc, mvt, percent, only_check_type)
         ret[0] = self._check_code(ret[0], is_move_cmd=True)
-        self.log_api_info('API -> move_circle -> code={}, pos1={}, pos2={}, percent={}%, velo={}, acc={}'.format(
-            ret[0], pose_1, pose_2, percent, spd, acc), code=ret[0])
+        self.log_api_info('API -> move_circle -> code={}, pos1={}, pos2={}, percent={}%, velo={}, acc={}',
+            ret[0], pose_1, pose_2, percent, spd, acc, code=ret[0])
         self._is_set_move = True
         self._only_check_result = 0
         if only_check_type > 0 and ret[0] == 0:
@@ -539,9 +529,8 @@ class XArm(Gripper, Servo, Record, RobotIQ, BaseBoard, Track, FtSensor):
         self._has_motion_cmd = True
         ret = self.arm_cmd.move_gohome(spd, acc, mvt, only_check_type)
         ret[0] = self._check_code(ret[0], is_move_cmd=True)
-        self.log_api_info('API -> move_gohome -> code={}, velo={}, acc={}'.format(
-            ret[0], spd, acc
-        ), code=ret[0])
+        self.log_api_info('API -> move_gohome -> code={}, velo={}, acc={}',
+            ret[0], spd, acc, code=ret[0])
         self._is_set_move = True
         self._only_check_result = 0
         if only_check_type > 0 and ret[0] == 0:
@@ -650,26 +639,26 @@ class XArm(Gripper, Servo, Record, RobotIQ, BaseBoard, Track, FtSensor):
         """
         assert isinstance(servo_id, int) and 1 <= servo_id <= 8, 'The value of parameter servo_id can only be 1-8.'
         ret = self.arm_cmd.set_brake(servo_id, 1)
-        self.log_api_info('API -> set_servo_detach -> code={}'.format(ret[0]), code=ret[0])
+        self.log_api_info('API -> set_servo_detach -> code={}', ret[0], code=ret[0])
         self._sync()
         return ret[0]
 
     @xarm_is_connected(_type='set')
     def shutdown_system(self, value=1):
         ret = self.arm_cmd.shutdown_system(value)
-        self.log_api_info('API -> shutdown_system -> code={}'.format(ret[0]), code=ret[0])
+        self.log_api_info('API -> shutdown_system -> code={}', ret[0], code=ret[0])
         return ret[0]
 
     @xarm_is_connected(_type='set')
     def set_reduced_mode(self, on_off):
         ret = self.arm_cmd.set_reduced_mode(int(on_off))
-        self.log_api_info('API -> set_reduced_mode -> code={}'.format(ret[0]), code=ret[0])
+        self.log_api_info('API -> set_reduced_mode -> code={}', ret[0], code=ret[0])
         return ret[0]
 
     @xarm_is_connected(_type='set')
     def set_reduced_max_tcp_speed(self, speed):
         ret = self.arm_cmd.set_reduced_linespeed(speed)
-        self.log_api_info('API -> set_reduced_linespeed -> code={}, speed={}'.format(ret[0], speed), code=ret[0])
+        self.log_api_info('API -> set_reduced_linespeed -> code={}, speed={}', ret[0], speed, code=ret[0])
         return ret[0]
 
     @xarm_is_connected(_type='set')
@@ -677,7 +666,7 @@ class XArm(Gripper, Servo, Record, RobotIQ, BaseBoard, Track, FtSensor):
         is_radian = self._default_is_radian if is_radian is None else is_radian
         speed = to_radian(speed, is_radian)
         ret = self.arm_cmd.set_reduced_jointspeed(speed)
-        self.log_api_info('API -> set_reduced_linespeed -> code={}, speed={}'.format(ret[0], speed), code=ret[0])
+        self.log_api_info('API -> set_reduced_linespeed -> code={}, speed={}', ret[0], speed, code=ret[0])
         return ret[0]
 
     @xarm_is_connected(_type='get')
@@ -708,7 +697,7 @@ class XArm(Gripper, Servo, Record, RobotIQ, BaseBoard, Track, FtSensor):
         limits[2:4] = boundary[2:4] if boundary[2] >= boundary[3] else boundary[2:4][::-1]
         limits[4:6] = boundary[4:6] if boundary[4] >= boundary[5] else boundary[4:6][::-1]
         ret = self.arm_cmd.set_xyz_limits(limits)
-        self.log_api_info('API -> set_reduced_tcp_boundary -> code={}, boundary={}'.format(ret[0], limits), code=ret[0])
+        self.log_api_info('API -> set_reduced_tcp_boundary -> code={}, boundary={}', ret[0], limits, code=ret[0])
         return ret[0]
 
     @xarm_is_connected(_type='set')
@@ -738,19 +727,19 @@ class XArm(Gripper, Servo, Record, RobotIQ, BaseBoard, Track, FtSensor):
                 if limits[i * 2 + 1] <= angle_range[0]:
                     return APIState.OUT_OF_RANGE
         ret = self.arm_cmd.set_reduced_jrange(limits)
-        self.log_api_info('API -> set_reduced_joint_range -> code={}, boundary={}'.format(ret[0], limits), code=ret[0])
+        self.log_api_info('API -> set_reduced_joint_range -> code={}, boundary={}', ret[0], limits, code=ret[0])
         return ret[0]
 
     @xarm_is_connected(_type='set')
     def set_fense_mode(self, on_off):
         ret = self.arm_cmd.set_fense_on(int(on_off))
-        self.log_api_info('API -> set_fense_mode -> code={}, on={}'.format(ret[0], on_off), code=ret[0])
+        self.log_api_info('API -> set_fense_mode -> code={}, on={}', ret[0], on_off, code=ret[0])
         return ret
 
     @xarm_is_connected(_type='set')
     def set_collision_rebound(self, on_off):
         ret = self.arm_cmd.set_collis_reb(int(on_off))
-        self.log_api_info('API -> set_collision_rebound -> code={}, on={}'.format(ret[0], on_off), code=ret[0])
+        self.log_api_info('API -> set_collision_rebound -> code={}, on={}', ret[0], on_off, code=ret[0])
         return ret
 
     @xarm_is_connected(_type='set')
@@ -772,7 +761,8 @@ class XArm(Gripper, Servo, Record, RobotIQ, BaseBoard, Track, FtSensor):
         for i in range(min(len(offset), 6)):
             world_offset[i] = to_radian(offset[i], is_radian or i <= 2)
         ret = self.arm_cmd.set_world_offset(world_offset)
-        self.log_api_info('API -> set_world_offset -> code={}, offset={}'.format(ret[0], world_offset), code=ret[0])
+        self.log_api_info('API -> set_world_offset -> code={}, offset={}', ret[0], world_offset, code=ret[0])
+        self._record_session_param(ret[0], 'world_offset', 'set_world_offset', world_offset, is_radian=True)
         return ret[0]
 
     def reset(self, speed=None, mvacc=None, mvtime=None, is_radian=None, wait=False, timeout=None):
@@ -796,7 +786,7 @@ class XArm(Gripper, Servo, Record, RobotIQ, BaseBoard, Track, FtSensor):
     @xarm_is_ready(_type='set')
     def set_joints_torque(self, joints_torque):
         ret = self.arm_cmd.set_servot(joints_torque)
-        self.log_api_info('API -> set_joints_torque -> code={}, joints_torque={}'.format(ret[0], joints_torque), code=ret[0])
+        self.log_api_info('API -> set_joints_torque -> code={}, joints_torque={}', ret[0], joints_torque, code=ret[0])
         return ret[0]
 
     @xarm_is_connected(_type='get')
@@ -818,7 +808,7 @@ class XArm(Gripper, Servo, Record, RobotIQ, BaseBoard, Track, FtSensor):
     @xarm_is_connected(_type='set')
     def set_safe_level(self, level=4):
         ret = self.arm_cmd.set_safe_level(level)
-        self.log_api_info('API -> set_safe_level -> code={}, level={}'.format(ret[0], level), code=ret[0])
+        self.log_api_info('API -> set_safe_level -> code={}, level={}', ret[0], level, code=ret[0])
         return ret[0]
 
     @xarm_wait_until_not_pause
@@ -834,7 +824,7 @@ class XArm(Gripper, Servo, Record, RobotIQ, BaseBoard, Track, FtSensor):
                 self._sleep_finish_time = time.monotonic() + sltime
             else:
                 self._sleep_finish_time += sltime
-        self.log_api_info('API -> set_pause_time -> code={}, sltime={}'.format(ret[0], sltime), code=ret[0])
+        self.log_api_info('API -> set_pause_time -> code={}, sltime={}', ret[0], sltime, code=ret[0])
         return ret[0]
 
     def set_sleep_time(self, sltime, wait=False):
@@ -851,7 +841,8 @@ class XArm(Gripper, Servo, Record, RobotIQ, BaseBoard, Track, FtSensor):
         if kwargs.get('wait', False):
             self.wait_move()
         ret = self.arm_cmd.set_tcp_offset(tcp_offset)
-        self.log_api_info('API -> set_tcp_offset -> code={}, offset={}'.format(ret[0], tcp_offset), code=ret[0])
+        self.log_api_info('API -> set_tcp_offset -> code={}, offset={}', ret[0], tcp_offset, code=ret[0])
+        self._record_session_param(ret[0], 'tcp_offset', 'set_tcp_offset', tcp_offset, is_radian=True)
         return ret[0]
 
     @xarm_wait_until_not_pause
@@ -859,7 +850,8 @@ class XArm(Gripper, Servo, Record, RobotIQ, BaseBoard, Track, FtSensor):
     @xarm_is_ready(_type='set')
     def set_tcp_jerk(self, jerk):
         ret = self.arm_cmd.set_tcp_jerk(jerk)
-        self.log_api_info('API -> set_tcp_jerk -> code={}, jerk={}'.format(ret[0], jerk), code=ret[0])
+        self.log_api_info('API -> set_tcp_jerk -> code={}, jerk={}', ret[0], jerk, code=ret[0])
+        self._record_session_param(ret[0], 'tcp_jerk', 'set_tcp_jerk', jerk)
         return ret[0]
 
     @xarm_wait_until_not_pause
@@ -867,7 +859,8 @@ class XArm(Gripper, Servo, Record, RobotIQ, BaseBoard, Track, FtSensor):
     @xarm_is_ready(_type='set')
     def set_tcp_maxacc(self, acc):
         ret = self.arm_cmd.set_tcp_maxacc(acc)
-        self.log_api_info('API -> set_tcp_maxacc -> code={}, maxacc={}'.format(ret[0], acc), code=ret[0])
+        self.log_api_info('API -> set_tcp_maxacc -> code={}, maxacc={}', ret[0], acc, code=ret[0])
+        self._record_session_param(ret[0], 'tcp_maxacc', 'set_tcp_maxacc', acc)
         return ret[0]
 
     @xarm_wait_until_not_pause
@@ -877,7 +870,8 @@ class XArm(Gripper, Servo, Record, RobotIQ, BaseBoard, Track, FtSensor):
         is_radian = self._default_is_radian if is_radian is None else is_radian
         jerk = to_radian(jerk, is_radian)
         ret = self.arm_cmd.set_joint_jerk(jerk)
-        self.log_api_info('API -> set_joint_jerk -> code={}, jerk={}'.format(ret[0], jerk), code=ret[0])
+        self.log_api_info('API -> set_joint_jerk -> code={}, jerk={}', ret[0], jerk, code=ret[0])
+        self._record_session_param(ret[0], 'joint_jerk', 'set_joint_jerk', jerk, is_radian=True)
         return ret[0]
 
     @xarm_wait_until_not_pause
@@ -887,7 +881,8 @@ class XArm(Gripper, Servo, Record, RobotIQ, BaseBoard, Track, FtSensor):
         is_radian = self._default_is_radian if is_radian is None else is_radian
         maxacc = to_radian(maxacc, is_radian)
         ret = self.arm_cmd.set_joint_maxacc(maxacc)
-        self.log_api_info('API -> set_joint_maxacc -> code={}, maxacc={}'.format(ret[0], maxacc), code=ret[0])
+        self.log_api_info('API -> set_joint_maxacc -> code={}, maxacc={}', ret[0], maxacc, code=ret[0])
+        self._record_session_param(ret[0], 'joint_maxacc', 'set_joint_maxacc', maxacc, is_radian=True)
         return ret[0]
 
     @xarm_wait_until_not_pause
@@ -895,7 +890,7 @@ class XArm(Gripper, Servo, Record, RobotIQ, BaseBoard, Track, FtSensor):
     def set_collision_sensitivity(self, value):
         assert isinstance(value, int) and 0 <= value <= 5
         ret = self.arm_cmd.set_collis_sens(value)
-        self.log_api_info('API -> set_collision_sensitivity -> code={}, sensitivity={}'.format(ret[0], value), code=ret[0])
+        self.log_api_info('API -> set_collision_sensitivity -> code={}, sensitivity={}', ret[0], value, code=ret[0])
         return ret[0]
 
     @xarm_wait_until_not_pause
@@ -903,14 +898,14 @@ class XArm(Gripper, Servo, Record, RobotIQ, BaseBoard, Track, FtSensor):
     def set_teach_sensitivity(self, value):
         assert isinstance(value, int) and 1 <= value <= 5
         ret = self.arm_cmd.set_teach_sens(value)
-        self.log_api_info('API -> set_teach_sensitivity -> code={}, sensitivity={}'.format(ret[0], value), code=ret[0])
+        self.log_api_info('API -> set_teach_sensitivity -> code={}, sensitivity={}', ret[0], value, code=ret[0])
         return ret[0]
 
     @xarm_wait_until_not_pause
     @xarm_is_connected(_type='set')
     def set_gravity_direction(self, direction):
         ret = self.arm_cmd.set_gravity_dir(direction[:3])
-        self.log_api_info('API -> set_gravity_direction -> code={}, direction={}'.format(ret[0], direction), code=ret[0])
+        self.log_api_info('API -> set_gravity_direction -> code={}, direction={}', ret[0], direction, code=ret[0])
         return ret[0]
 
     @xarm_wait_until_not_pause
@@ -944,19 +939,19 @@ class XArm(Gripper, Servo, Record, RobotIQ, BaseBoard, Track, FtSensor):
             g_new[i] = Rot[i * 3 + 0] * G_normal[0] + Rot[i * 3 + 1] * G_normal[1] + Rot[i * 3 + 2] * G_normal[2]
 
         ret = self.arm_cmd.set_gravity_dir(g_new)
-        self.log_api_info('API -> set_mount_direction -> code={}, tilt={}, rotation={}, direction={}'.format(ret[0], base_tilt_deg, rotation_deg, g_new), code=ret[0])
+        self.log_api_info('API -> set_mount_direction -> code={}, tilt={}, rotation={}, direction={}', ret[0], base_tilt_deg, rotation_deg, g_new, code=ret[0])
         return ret[0]
 
     @xarm_is_connected(_type='set')
     def clean_conf(self):
         ret = self.arm_cmd.clean_conf()
-        self.log_api_info('API -> clean_conf -> code={}'.format(ret[0]), code=ret[0])
+        self.log_api_info('API -> clean_conf -> code={}', ret[0], code=ret[0])
         return ret[0]
 
     @xarm_is_connected(_type='set')
     def save_conf(self):
         ret = self.arm_cmd.save_conf()
-        self.log_api_info('API -> save_conf -> code={}'.format(ret[0]), code=ret[0])
+        self.log_api_info('API -> save_conf -> code={}', ret[0], code=ret[0])
         return ret[0]
 
     @xarm_is_connected(_type='get')
@@ -1000,7 +995,7 @@ class XArm(Gripper, Servo, Record, RobotIQ, BaseBoard, Track, FtSensor):
         assert len(pose) >= 6
         tcp_pose = [to_radian(pose[i], is_radian or i <= 2, self._last_position[i]) for i in range(6)]
         ret = self.arm_cmd.is_tcp_limit(tcp_pose)
-        self.log_api_info('API -> is_tcp_limit -> code={}, limit={}'.format(ret[0], ret[1]), code=ret[0])
+        self.log_api_info('API -> is_tcp_limit -> code={}, limit={}', ret[0], ret[1], code=ret[0])
         ret[0] = self._check_code(ret[0])
         if ret[0] == 0:
             return ret[0], bool(ret[1])
@@ -1016,7 +1011,7 @@ class XArm(Gripper, Servo, Record, RobotIQ, BaseBoard, Track, FtSensor):
             joints[i] = to_radian(joint[i], is_radian, self._last_angles[i])
 
         ret = self.arm_cmd.is_joint_limit(joints)
-        self.log_api_info('API -> is_joint_limit -> code={}, limit={}'.format(ret[0], ret[1]), code=ret[0])
+        self.log_api_info('API -> is_joint_limit -> code={}, limit={}', ret[0], ret[1], code=ret[0])
         ret[0] = self._check_code(ret[0])
         if ret[0] == 0:
             return ret[0], bool(ret[1])
@@ -1026,10 +1021,14 @@ class XArm(Gripper, Servo, Record, RobotIQ, BaseBoard, Track, FtSensor):
     def emergency_stop(self):
         logger.info('emergency_stop--begin')
         self.set_state(4)
-        expired = time.monotonic() + 3
-        while self.state not in [4] and time.monotonic() < expired:
+
+        def _check_stop(robot_state):
+            if self.state == 4:
+                return 0
+            # sent again until the state is 4, woken up by the transitions of the report
             self.set_state(4)
-            time.sleep(0.1)
+
+        self.wait_for(_check_stop, timeout=3)
         self._sleep_finish_time = 0
         self._sync()
         logger.info('emergency_stop--end')
@@ -1390,6 +1389,8 @@ class XArm(Gripper, Servo, Record, RobotIQ, BaseBoard, Track, FtSensor):
                 path = os.path.join(path, 'app.xml')
             if not os.path.exists(path):
                 raise FileNotFoundError
+            # from ..tools.blockly_tool import BlocklyTool
+            from ..tools.blockly import BlocklyTool
             blockly_tool = BlocklyTool(path)
             succeed = blockly_tool.to_python(arm=self._api_instance, is_exec=True, **kwargs)
             if succeed:
@@ -1428,7 +1429,7 @@ class XArm(Gripper, Servo, Record, RobotIQ, BaseBoard, Track, FtSensor):
     def reload_dynamics(self):
         ret = self.arm_cmd.reload_dynamics()
         ret[0] = self._check_code(ret[0])
-        self.log_api_info('API -> reload_dynamics -> code={}'.format(ret[0]), code=ret[0])
+        self.log_api_info('API -> reload_dynamics -> code={}', ret[0], code=ret[0])
         return ret[0]
 
     @xarm_wait_until_not_pause
@@ -1437,7 +1438,7 @@ class XArm(Gripper, Servo, Record, RobotIQ, BaseBoard, Track, FtSensor):
     def set_counter_reset(self):
         ret = self.arm_cmd.cnter_reset()
         ret[0] = self._check_code(ret[0])
-        self.log_api_info('API -> set_counter_reset -> code={}'.format(ret[0]), code=ret[0])
+        self.log_api_info('API -> set_counter_reset -> code={}', ret[0], code=ret[0])
         return ret[0]
 
     @xarm_wait_until_not_pause
@@ -1446,14 +1447,14 @@ class XArm(Gripper, Servo, Record, RobotIQ, BaseBoard, Track, FtSensor):
     def set_counter_increase(self, val=1):
         ret = self.arm_cmd.cnter_plus()
         ret[0] = self._check_code(ret[0])
-        self.log_api_info('API -> set_counter_increase -> code={}'.format(ret[0]), code=ret[0])
+        self.log_api_info('API -> set_counter_increase -> code={}', ret[0], code=ret[0])
         return ret[0]
 
     @xarm_is_connected(_type='set')
     def set_report_tau_or_i(self, tau_or_i=0):
         ret = self.arm_cmd.set_report_tau_or_i(int(tau_or_i))
         ret[0] = self._check_code(ret[0])
-        self.log_api_info('API -> set_report_tau_or_i({}) -> code={}'.format(tau_or_i, ret[0]), code=ret[0])
+        self.log_api_info('API -> set_report_tau_or_i({}) -> code={}', tau_or_i, ret[0], code=ret[0])
         return ret[0]
 
     @xarm_is_connected(_type='get')
@@ -1465,7 +1466,7 @@ class XArm(Gripper, Servo, Record, RobotIQ, BaseBoard, Track, FtSensor):
     def set_self_collision_detection(self, on_off):
         ret = self.arm_cmd.set_self_collision_detection(int(on_off))
         ret[0] = self._check_code(ret[0])
-        self.log_api_info('API -> set_self_collision_detection({}) -> code={}'.format(on_off, ret[0]), code=ret[0])
+        self.log_api_info('API -> set_self_collision_detection({}) -> code={}', on_off, ret[0], code=ret[0])
         return ret[0]
 
     @xarm_is_connected(_type='set')
@@ -1488,7 +1489,7 @@ class XArm(Gripper, Servo, Record, RobotIQ, BaseBoard, Track, FtSensor):
             params = [] if tool_type < XCONF.CollisionToolType.USE_PRIMITIVES else list(args)
         ret = self.arm_cmd.set_collision_tool_model(tool_type, params)
         ret[0] = self._check_code(ret[0])
-        self.log_api_info('API -> set_collision_tool_model({}, {}) -> code={}'.format(tool_type, params, ret[0]), code=ret[0])
+        self.log_api_info('API -> set_collision_tool_model({}, {}) -> code={}', tool_type, params, ret[0], code=ret[0])
         return ret[0]
 
     def get_firmware_config(self):
@@ -1599,9 +1600,8 @@ class XArm(Gripper, Servo, Record, RobotIQ, BaseBoard, Track, FtSensor):
 
         ret = self.arm_cmd.vc_set_jointv(jnt_v, 1 if is_sync else 0, duration if self.version_is_ge(1, 8, 0) else -1)
         ret[0] = self._check_code(ret[0], is_move_cmd=True, mode=4)
-        self.log_api_info('API -> vc_set_joint_velocity -> code={}, speeds={}, is_sync={}'.format(
-            ret[0], jnt_v, is_sync
-        ), code=ret[0])
+        self.log_api_info('API -> vc_set_joint_velocity -> code={}, speeds={}, is_sync={}',
+            ret[0], jnt_v, is_sync, code=ret[0])
         return ret[0]
 
     @xarm_is_connected(_type='set')
@@ -1616,9 +1616,8 @@ class XArm(Gripper, Servo, Record, RobotIQ, BaseBoard, Track, FtSensor):
             line_v[i] = spd if i <= 2 else to_radian(spd, is_radian)
         ret = self.arm_cmd.vc_set_linev(line_v, 1 if is_tool_coord else 0, duration if self.version_is_ge(1, 8, 0) else -1)
         ret[0] = self._check_code(ret[0], is_move_cmd=True, mode=5)
-        self.log_api_info('API -> vc_set_cartesian_velocity -> code={}, speeds={}, is_tool_coord={}'.format(
-            ret[0], line_v, is_tool_coord
-        ), code=ret[0])
+        self.log_api_info('API -> vc_set_cartesian_velocity -> code={}, speeds={}, is_tool_coord={}',
+            ret[0], line_v, is_tool_coord, code=ret[0])
         return ret[0]
 
     @xarm_is_connected(_type='get')
@@ -1667,7 +1666,7 @@ class XArm(Gripper, Servo, Record, RobotIQ, BaseBoard, Track, FtSensor):
     @xarm_is_connected(_type='set')
     def get_tcp_rotation_radius(self, value=6):
         ret = self.arm_cmd.get_tcp_rotation_radius(value)
-        self.log_api_info('API -> get_tcp_rotation_radius -> code={}'.format(ret[0]), code=ret[0])
+        self.log_api_info('API -> get_tcp_rotation_radius -> code={}', ret[0], code=ret[0])
         ret[0] = self._check_code(ret[0])
         return ret[0], ret[1][0]
 
@@ -1689,21 +1688,21 @@ class XArm(Gripper, Servo, Record, RobotIQ, BaseBoard, Track, FtSensor):
         ret = self.arm_cmd.iden_tcp_load(estimated_mass)
         self.arm_cmd.set_prot_flag(prot_flag)
         self._keep_heart = True
-        self.log_api_info('API -> iden_tcp_load -> code={}'.format(ret[0]), code=ret[0])
+        self.log_api_info('API -> iden_tcp_load -> code={}', ret[0], code=ret[0])
         return self._check_code(ret[0]), ret[1:5]
 
     @xarm_is_connected(_type='set')
     def set_cartesian_velo_continuous(self, on_off):
         ret = self.arm_cmd.set_cartesian_velo_continuous(int(on_off))
         ret[0] = self._check_code(ret[0])
-        self.log_api_info('API -> set_cartesian_velo_continuous({}) -> code={}'.format(on_off, ret[0]), code=ret[0])
+        self.log_api_info('API -> set_cartesian_velo_continuous({}) -> code={}', on_off, ret[0], code=ret[0])
         return ret[0]
 
     @xarm_is_connected(_type='set')
     def set_allow_approx_motion(self, on_off):
         ret = self.arm_cmd.set_allow_approx_motion(int(on_off))
         ret[0] = self._check_code(ret[0])
-        self.log_api_info('API -> set_allow_approx_motion({}) -> code={}'.format(on_off, ret[0]), code=ret[0])
+        self.log_api_info('API -> set_allow_approx_motion({}) -> code={}', on_off, ret[0], code=ret[0])
         return ret[0]
 
     @xarm_is_connected(_type='get')
@@ -1711,15 +1710,15 @@ class XArm(Gripper, Servo, Record, RobotIQ, BaseBoard, Track, FtSensor):
         if sn is None:
             code, sn = self.get_robot_sn()
             if code != 0:
-                self.log_api_info('iden_joint_friction -> get_robot_sn failed, code={}'.format(code), code=code)
+                self.log_api_info('iden_joint_friction -> get_robot_sn failed, code={}', code, code=code)
                 return APIState.API_EXCEPTION, -1
         if len(sn) != 14:
-            self.log_api_info('iden_joint_friction, sn is not correct, sn={}'.format(sn), code=APIState.API_EXCEPTION)
+            self.log_api_info('iden_joint_friction, sn is not correct, sn={}', sn, code=APIState.API_EXCEPTION)
             return APIState.API_EXCEPTION, -1
         sn = sn.upper()
         axis_map = {5: 'F', 6: 'I', 7: 'S'}
         if sn[0] != ('L' if self.is_lite6 else 'X') or sn[1] != axis_map.get(self.axis, ''):
-            self.log_api_info('iden_joint_friction, sn is not correct, axis={}, type={}, sn={}'.format(self.axis, self.device_type, sn), code=APIState.API_EXCEPTION)
+            self.log_api_info('iden_joint_friction, sn is not correct, axis={}, type={}, sn={}', self.axis, self.device_type, sn, code=APIState.API_EXCEPTION)
             return APIState.API_EXCEPTION, -1
 
         prot_flag = self.arm_cmd.get_prot_flag()
@@ -1728,5 +1727,5 @@ class XArm(Gripper, Servo, Record, RobotIQ, BaseBoard, Track, FtSensor):
         ret = self.arm_cmd.iden_joint_friction(sn)
         self.arm_cmd.set_prot_flag(prot_flag)
         self._keep_heart = True
-        self.log_api_info('API -> iden_joint_friction -> code={}'.format(ret[0]), code=ret[0])
+        self.log_api_info('API -> iden_joint_friction -> code={}', ret[0], code=ret[0])
         return self._check_code(ret[0]), 0 if int(ret[1]) == 0 else -1